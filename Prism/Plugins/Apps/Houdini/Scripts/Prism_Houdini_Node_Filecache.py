@@ -516,7 +516,7 @@ class Prism_Houdini_Filecache(object):
         if node.parm("nextVersionWrite").eval():
             task = hou.text.expandString(self.getProductName(node))
             versionpath = self.core.products.getLatestVersionpathFromProduct(
-                task, includeMaster=False, entity=entity,
+                task, includeMaster=False, entity=entity, useCache=True
             )
             if not versionpath:
                 latestVersion = 0
@@ -530,7 +530,7 @@ class Prism_Houdini_Filecache(object):
         if node.parm("latestVersionRead").eval():
             if latestVersion is None:
                 task = hou.text.expandString(self.getProductName(node))
-                versionpath = self.core.products.getLatestVersionpathFromProduct(task, entity=entity)
+                versionpath = self.core.products.getLatestVersionpathFromProduct(task, entity=entity, useCache=True)
                 if not versionpath:
                     latestVersion = 0
                 else:
@@ -583,7 +583,7 @@ class Prism_Houdini_Filecache(object):
         entity = state.ui.getOutputEntity()
         result = ts.navigateToProduct(product, entity=entity)
         widget = ts.tw_versions
-        if not result or not widget.rowCount():
+        if not result or not widget.model().rowCount():
             self.core.popup("No versions exist in the current context.")
             return
 
@@ -773,7 +773,7 @@ class Prism_Houdini_Filecache(object):
 
         if version == "latest":
             includeMaster = node.parm("includeMaster").eval()
-            path = self.core.products.getLatestVersionpathFromProduct(product, includeMaster=includeMaster, entity=entity, wedge=wedge)
+            path = self.core.products.getLatestVersionpathFromProduct(product, includeMaster=includeMaster, entity=entity, wedge=wedge, useCache=True)
         else:
             path = self.core.products.getVersionpathFromProductVersion(product, version, entity=entity, wedge=wedge)
 
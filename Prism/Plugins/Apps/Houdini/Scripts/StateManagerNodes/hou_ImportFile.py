@@ -876,7 +876,7 @@ class ImportFileClass(object):
         path = self.getImportPath()
         curVersionName = self.core.products.getVersionFromFilepath(path) or ""
         curVersionData = {"version": curVersionName, "path": path}
-        latestVersion = self.core.products.getLatestVersionFromPath(path)
+        latestVersion = self.core.products.getLatestVersionFromPath(path, useCache=True)
         if latestVersion:
             latestVersionData = {"version": latestVersion["version"], "path": latestVersion["path"]}
         else:
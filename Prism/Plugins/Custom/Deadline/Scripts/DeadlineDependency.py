@@ -33,6 +33,8 @@
 
 
 import os
+import re
+import time
 
 from Deadline.Scripting import RepositoryUtils, ClientUtils
 
@@ -46,6 +48,12 @@ from Deadline.Scripting import RepositoryUtils, ClientUtils
 # perform: "Tools->Perform pending job scan" in super user mode to the log in Deadline console
 
 
+# results of previous scans. Deadline keeps this module loaded between pending job scans,
+# so the caches get reused as long as the dependency file and the directories don't change
+DEPENDENCY_CACHE = {}
+FRAME_CACHE = {}
+
+
 def splitext(path):
     if path.endswith(".bgeo.sc"):
         return [path[: -len(".bgeo.sc")], ".bgeo.sc"]
@@ -53,78 +61,138 @@ def splitext(path):
         return os.path.splitext(path)
 
 
+def getMtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def getFramePattern(filepath):
+    # returns the directory, filename prefix, frame padding and extension of a dependency file.
+    # the frame can be written as digits or as "#" placeholders
+    base, ext = splitext(filepath)
+    match = re.match(r"^(.*?)(\d+|#+)$", base)
+    if match:
+        prefix, frame = match.groups()
+        padding = len(frame)
+    else:
+        prefix = base[:-4]
+        padding = 4
+
+    return os.path.dirname(prefix), os.path.basename(prefix), padding, ext
+
+
+def readDependencies(jobId, depfile):
+    mtime = getMtime(depfile)
+    if mtime is None:
+        return
+
+    cached = DEPENDENCY_CACHE.get(jobId)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(depfile, "r") as dependFile:
+        depData = [x.replace("\n", "") for x in dependFile.readlines()]
+
+    dependencies = []
+    for i in range(int(len(depData) / 2)):
+        offset = int(depData[i * 2])
+        dependencies.append([offset] + list(getFramePattern(depData[1 + (i * 2)])))
+
+    DEPENDENCY_CACHE[jobId] = (mtime, dependencies)
+    return dependencies
+
+
+def listDirectory(directory):
+    try:
+        with os.scandir(directory) as entries:
+            return [entry.name for entry in entries]
+    except AttributeError:
+        return os.listdir(directory)
+
+
+def getExistingFrames(directory, prefix, padding, ext):
+    # lists the directory once and returns the set of frames, which exist for the pattern.
+    # the result is reused until the modification time of the directory changes
+    mtime = getMtime(directory)
+    if mtime is None:
+        return set()
+
+    key = (directory, prefix, padding, ext)
+    cached = FRAME_CACHE.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    frames = set()
+    fmt = "0%sd" % padding
+    for filename in listDirectory(directory):
+        if not filename.startswith(prefix) or not filename.endswith(ext):
+            continue
+
+        frameStr = filename[len(prefix):len(filename) - len(ext)]
+        try:
+            frame = int(frameStr)
+        except ValueError:
+            continue
+
+        if format(frame, fmt) == frameStr:
+            frames.add(frame)
+
+    # directories, which changed very recently, aren't cached, because the mtime resolution of
+    # some filesystems is too coarse to notice files, which get written in the same second
+    if (time.time() - mtime) > 2:
+        FRAME_CACHE[key] = (mtime, frames)
+
+    return frames
+
+
+def getMissingFrames(dependencies, frames):
+    missing = []
+    for offset, directory, prefix, padding, ext in dependencies:
+        existing = getExistingFrames(directory, prefix, padding, ext)
+        for frame in frames:
+            if (frame + offset) not in existing:
+                missing.append(os.path.join(directory, prefix + format(frame + offset, "0%sd" % padding) + ext))
+
+    return missing
+
+
 def __main__(jobId, taskIds=None):
     job = RepositoryUtils.GetJob(jobId, True)
-    jobTasks = RepositoryUtils.GetJobTasks(job, True)
-
-    import os
 
     depfile = os.path.join(RepositoryUtils.GetJobAuxiliaryPath(job), "dependencies.txt")
     ClientUtils.LogText("\nPrism - starting dependency scan for job %s" % jobId)
     ClientUtils.LogText("\nPrism - Dependency filepath: %s" % depfile)
 
+    dependencies = readDependencies(jobId, depfile)
+    if dependencies is None:
+        ClientUtils.LogText("\nPrism - " + str(jobId) + "- No Dependency File")
+        if not taskIds:
+            return False
+
+        return []
+
     if not taskIds:
+        missing = getMissingFrames(dependencies, job.JobFramesList)
+        if missing:
+            ClientUtils.LogText("\nPrism - %s not released. %s files missing, e.g. %s" % (jobId, len(missing), missing[0]))
+            return False
 
-        if os.path.exists(depfile):
-            with open(depfile, "r") as dependFile:
-                depData = dependFile.readlines()
-                depData = [x.replace("\n", "") for x in depData]
-
-            curFrames = job.JobFramesList
-
-            for i in range(int(len(depData) / 2)):
-                offset = depData[i * 2]
-                depPath, depExt = splitext(depData[1 + (i * 2)])
-                for k in curFrames:
-                    if not os.path.exists(
-                        depPath[:-4] + format(k + int(offset), "04") + depExt
-                    ):
-                        ClientUtils.LogText("\nPrism - " + str(jobId) + " not released")
-                        return False
-
-            ClientUtils.LogText("\nPrism - " + str(jobId) + " released")
-            return True
-        else:
-            ClientUtils.LogText("\nPrism - " + str(jobId) + "- No Dependency File")
-
-        return False
+        ClientUtils.LogText("\nPrism - " + str(jobId) + " released")
+        return True
     else:
-
+        jobTasks = RepositoryUtils.GetJobTasks(job, True)
         tasksToRelease = []
-
-        if os.path.exists(depfile):
-            with open(depfile, "r") as dependFile:
-                depData = dependFile.readlines()
-                depData = [x.replace("\n", "") for x in depData]
-
-            for taskID in taskIds:
-                task = jobTasks.Tasks[int(taskID)]
-
-                curFrames = task.TaskFrameList
-
-                release = True
-                for i in range(int(len(depData) / 2)):
-                    offset = depData[i * 2]
-                    depPath, depExt = splitext(depData[1 + (i * 2)])
-                    for k in curFrames:
-                        filepath = depPath[:-4] + format(k + int(offset), "04") + depExt
-                        exists = os.path.exists(filepath)
-                        ClientUtils.LogText("checking if file exists: %s - %s" % (filepath, exists))
-                        if not exists:
-                            release = False
-                            break
-                    else:
-                        continue
-                    break
-
-                if release:
-                    tasksToRelease.append(taskID)
-
-            msg = "\nPrism - Checked task ids: %s - released tasks: %s" % (taskIds, tasksToRelease)
-            ClientUtils.LogText(msg)
-            # log("\n" + str(jobId) + "\n" + str(taskIds) + "-" + str(tasksToRelease))
-        else:
-            ClientUtils.LogText("\nPrism - " + str(jobId) + "- No Dependency File")
-            # log("\n" + str(jobId) + "- No Dependency File")
+        for taskID in taskIds:
+            task = jobTasks.Tasks[int(taskID)]
+            missing = getMissingFrames(dependencies, task.TaskFrameList)
+            if missing:
+                ClientUtils.LogText("Prism - task %s: %s files missing, e.g. %s" % (taskID, len(missing), missing[0]))
+            else:
+                tasksToRelease.append(taskID)
+
+        msg = "\nPrism - Checked task ids: %s - released tasks: %s" % (taskIds, tasksToRelease)
+        ClientUtils.LogText(msg)
 
         return tasksToRelease
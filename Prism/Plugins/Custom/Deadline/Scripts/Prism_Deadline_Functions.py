@@ -36,6 +36,9 @@ import os
 import sys
 import subprocess
 import time
+import json
+import uuid
+import shutil
 import logging
 import importlib
 
@@ -83,6 +86,15 @@ class Prism_Deadline_Functions(object):
                 "suffix": "_vrscene_export",
             },
         }
+        # pools and groups get queried from Deadline again when they are older than this (in seconds)
+        self.queryCacheTtl = float(os.getenv("PRISM_DEADLINE_CACHE_TTL", "86400"))
+        # failed queries don't get retried for this amount of seconds in the same session
+        self.queryRetryInterval = 300
+        self.failedQueries = {}
+        # e.g. "http://deadline-server:8081". queries and submissions go to the Deadline Web Service
+        # instead of starting a deadlinecommand process for each call
+        self.webServiceUrl = os.getenv("PRISM_DEADLINE_WEBSERVICE", "").rstrip("/")
+        self.deadlineHomeDir = None
         self.core.plugins.registerRenderfarmPlugin(self)
         self.core.registerCallback("onStateStartup", self.onStateStartup, plugin=self.plugin)
         self.core.registerCallback("onStateGetSettings", self.onStateGetSettings, plugin=self.plugin)
@@ -181,20 +193,91 @@ template = base + "_@product@@identifier@_@version@"]"""
 
         return output
 
+    @err_catcher(name=__name__)
+    def callWebService(self, endpoint, data=None, silent=False):
+        if sys.version_info[0] > 2:
+            from urllib.request import Request, urlopen
+        else:
+            from urllib2 import Request, urlopen
+
+        url = self.webServiceUrl + endpoint
+        body = json.dumps(data).encode("utf-8") if data is not None else None
+        request = Request(url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            response = urlopen(request, timeout=float(os.getenv("PRISM_DEADLINE_WEBSERVICE_TIMEOUT", "30")))
+            result = response.read()
+        except Exception as e:
+            msg = "Cannot connect to the Deadline Web Service at %s:\n\n%s" % (self.webServiceUrl, e)
+            if silent:
+                logger.warning(msg)
+            else:
+                self.core.popup(msg)
+
+            return False
+
+        if type(result) == bytes:
+            result = result.decode("utf-8")
+
+        try:
+            return json.loads(result)
+        except ValueError:
+            return result
+
+    @err_catcher(name=__name__)
+    def getDeadlineHomeDir(self):
+        # the home directory doesn't change during a session, so deadlinecommand gets called only once
+        if not self.deadlineHomeDir:
+            homeDir = self.CallDeadlineCommand(["-GetCurrentUserHomeDirectory"])
+            if homeDir is False:
+                return False
+
+            self.deadlineHomeDir = homeDir
+
+        return self.deadlineHomeDir
+
+    @err_catcher(name=__name__)
+    def queryDeadlineList(self, name):
+        # returns None if the query failed, so that callers can tell a failure from an empty list
+        if self.webServiceUrl:
+            result = self.callWebService("/api/%s" % name, silent=True)
+            return [str(item) for item in result] if isinstance(result, list) else None
+
+        output = self.CallDeadlineCommand(["-%s" % name], silent=True)
+        if output is False or "Error" in output:
+            return
+
+        return output.splitlines()
+
+    @err_catcher(name=__name__)
+    def isQueryFailing(self, name):
+        failTime = self.failedQueries.get(name)
+        return bool(failTime) and (time.time() - failTime) < self.queryRetryInterval
+
+    @err_catcher(name=__name__)
+    def isQueryCacheExpired(self, name):
+        refreshTime = self.core.getConfig("deadline", "%sRefreshTime" % name, config="project")
+        if refreshTime is None:
+            return True
+
+        return (time.time() - refreshTime) > self.queryCacheTtl
+
     @err_catcher(name=__name__)
     def refreshPools(self):
         if not hasattr(self.core, "projectPath"):
             return
 
         with self.core.waitPopup(self.core, "Getting pools from Deadline. Please wait..."):
-            output = self.CallDeadlineCommand(["-pools"], silent=True)
+            deadlinePools = self.queryDeadlineList("pools")
 
-        if output and "Error" not in output:
-            deadlinePools = output.splitlines()
-        else:
-            deadlinePools = []
+        if deadlinePools is None:
+            # the stored pools stay valid for all users until Deadline can be queried again
+            logger.warning("failed to get pools from Deadline")
+            self.failedQueries["pools"] = time.time()
+            return
 
-        self.core.setConfig("deadline", "pools", val=deadlinePools, config="project")
+        self.failedQueries.pop("pools", None)
+        data = {"deadline": {"pools": deadlinePools, "poolsRefreshTime": time.time()}}
+        self.core.setConfig(data=data, config="project")
         return deadlinePools
 
     @err_catcher(name=__name__)
@@ -203,9 +286,10 @@ template = base + "_@product@@identifier@_@version@"]"""
             return
 
         pools = self.core.getConfig("deadline", "pools", config="project")
-        if pools is None:
-            self.refreshPools()
-            pools = self.core.getConfig("deadline", "pools", config="project")
+        if (pools is None or self.isQueryCacheExpired("pools")) and not self.isQueryFailing("pools"):
+            result = self.refreshPools()
+            if result is not None:
+                pools = result
 
         pools = pools or []
         return pools
@@ -216,14 +300,17 @@ template = base + "_@product@@identifier@_@version@"]"""
             return
 
         with self.core.waitPopup(self.core, "Getting groups from Deadline. Please wait..."):
-            output = self.CallDeadlineCommand(["-groups"], silent=True)
+            deadlineGroups = self.queryDeadlineList("groups")
 
-        if output and "Error" not in output:
-            deadlineGroups = output.splitlines()
-        else:
-            deadlineGroups = []
+        if deadlineGroups is None:
+            # the stored groups stay valid for all users until Deadline can be queried again
+            logger.warning("failed to get groups from Deadline")
+            self.failedQueries["groups"] = time.time()
+            return
 
-        self.core.setConfig("deadline", "groups", val=deadlineGroups, config="project")
+        self.failedQueries.pop("groups", None)
+        data = {"deadline": {"groups": deadlineGroups, "groupsRefreshTime": time.time()}}
+        self.core.setConfig(data=data, config="project")
         return deadlineGroups
 
     @err_catcher(name=__name__)
@@ -232,9 +319,10 @@ template = base + "_@product@@identifier@_@version@"]"""
             return
 
         groups = self.core.getConfig("deadline", "groups", config="project")
-        if groups is None:
-            self.refreshGroups()
-            groups = self.core.getConfig("deadline", "groups", config="project")
+        if (groups is None or self.isQueryCacheExpired("groups")) and not self.isQueryFailing("groups"):
+            result = self.refreshGroups()
+            if result is not None:
+                groups = result
 
         groups = groups or []
         return groups
@@ -262,8 +350,11 @@ template = base + "_@product@@identifier@_@version@"]"""
 
     @err_catcher(name=__name__)
     def onRefreshPoolsClicked(self, settings):
-        self.refreshPools()
-        self.refreshGroups()
+        pools = self.refreshPools()
+        groups = self.refreshGroups()
+        if pools is None or groups is None:
+            self.core.popup("Failed to get the pools and groups from Deadline. The previous lists are kept.")
+
         settings.gb_dlPoolPresets.refresh()
 
     @err_catcher(name=__name__)
@@ -1075,9 +1166,7 @@ template = base + "_@product@@identifier@_@version@"]"""
         if self.core.appPlugin.pluginName == "Houdini":
             jobOutputFile = self.processHoudiniPath(origin, jobOutputFile)
 
-        homeDir = (
-            self.CallDeadlineCommand(["-GetCurrentUserHomeDirectory"])
-        )
+        homeDir = self.getDeadlineHomeDir()
 
         if homeDir is False:
             return "Execute Canceled: Deadline is not installed"
@@ -1794,9 +1883,7 @@ path = r\"%s\"
         args=None,
         state=None,
     ):
-        homeDir = (
-            self.CallDeadlineCommand(["-GetCurrentUserHomeDirectory"])
-        )
+        homeDir = self.getDeadlineHomeDir()
 
         if homeDir is False:
             return "Execute Canceled: Deadline is not installed"
@@ -1946,9 +2033,7 @@ path = r\"%s\"
         startFrame=1,
         cropped=False,
     ):
-        homeDir = (
-            self.CallDeadlineCommand(["-GetCurrentUserHomeDirectory"])
-        )
+        homeDir = self.getDeadlineHomeDir()
 
         if homeDir is False:
             return "Execute Canceled: Deadline is not installed"
@@ -2135,9 +2220,7 @@ path = r\"%s\"
         cleanupScript=None,
         state=None,
     ):
-        homeDir = (
-            self.CallDeadlineCommand(["-GetCurrentUserHomeDirectory"])
-        )
+        homeDir = self.getDeadlineHomeDir()
 
         if homeDir is False:
             return "Execute Canceled: Deadline is not installed"
@@ -2300,9 +2383,7 @@ path = r\"%s\"
         cleanupScript=None,
         state=None,
     ):
-        homeDir = (
-            self.CallDeadlineCommand(["-GetCurrentUserHomeDirectory"])
-        )
+        homeDir = self.getDeadlineHomeDir()
 
         if homeDir is False:
             return "Execute Canceled: Deadline is not installed"
@@ -2464,9 +2545,7 @@ path = r\"%s\"
         cleanupScript=None,
         state=None,
     ):
-        homeDir = (
-            self.CallDeadlineCommand(["-GetCurrentUserHomeDirectory"])
-        )
+        homeDir = self.getDeadlineHomeDir()
 
         if homeDir is False:
             return "Execute Canceled: Deadline is not installed"
@@ -2625,9 +2704,7 @@ path = r\"%s\"
         cleanupScript=None,
         state=None,
     ):
-        homeDir = (
-            self.CallDeadlineCommand(["-GetCurrentUserHomeDirectory"])
-        )
+        homeDir = self.getDeadlineHomeDir()
 
         if homeDir is False:
             return "Execute Canceled: Deadline is not installed"
@@ -2827,7 +2904,10 @@ path = r\"%s\"
                 fileHandle.write("%s=%s\n" % (i, pluginInfos[i]))
 
         logger.debug("submitting job: " + str(arguments))
-        jobResult = self.CallDeadlineCommand(arguments)
+        if self.webServiceUrl:
+            jobResult = self.submitJobToWebService(jobInfos, pluginInfos, arguments[2:])
+        else:
+            jobResult = self.CallDeadlineCommand(arguments)
 
         if jobResult is False:
             return "Execute Canceled: Deadline is not installed"
@@ -2843,6 +2923,59 @@ path = r\"%s\"
 
         return jobResult
 
+    @err_catcher(name=__name__)
+    def getWebServiceAuxFolder(self):
+        # the Web Service host can't read files from the local Deadline home directory,
+        # so aux files get staged in a folder, which is shared with the farm
+        folder = os.getenv("PRISM_DEADLINE_AUX_FILE_PATH")
+        if not folder and getattr(self.core, "projectPath", None):
+            pipelineFolder = self.core.projects.getPipelineFolder()
+            if pipelineFolder:
+                folder = os.path.join(pipelineFolder, "Deadline", "AuxFiles")
+
+        return folder
+
+    @err_catcher(name=__name__)
+    def stageWebServiceAuxFiles(self, auxFiles):
+        folder = self.getWebServiceAuxFolder()
+        if not folder:
+            return
+
+        stageFolder = os.path.join(folder, "%s_%s" % (time.strftime("%Y%m%d_%H%M%S"), uuid.uuid4().hex[:8]))
+        os.makedirs(stageFolder)
+        stagedFiles = []
+        for auxFile in auxFiles:
+            target = os.path.join(stageFolder, os.path.basename(auxFile))
+            shutil.copy2(auxFile, target)
+            stagedFiles.append(target)
+
+        return stagedFiles
+
+    @err_catcher(name=__name__)
+    def submitJobToWebService(self, jobInfos, pluginInfos, auxFiles):
+        # returns the result in the same format as deadlinecommand
+        if auxFiles:
+            auxFiles = self.stageWebServiceAuxFiles(auxFiles)
+            if auxFiles is None:
+                msg = "Error: the job has aux files, which the Deadline Web Service can't read from this machine. Set PRISM_DEADLINE_AUX_FILE_PATH to a folder, which is shared with the Web Service host, or submit through deadlinecommand."
+                self.core.popup(msg)
+                return msg
+
+        data = {
+            "JobInfo": dict([[key, str(jobInfos[key])] for key in jobInfos]),
+            "PluginInfo": dict([[key, str(pluginInfos[key])] for key in pluginInfos]),
+            "AuxFiles": auxFiles,
+            "IdOnly": True,
+        }
+        result = self.callWebService("/api/jobs", data=data)
+        if result is False:
+            return False
+
+        if isinstance(result, dict) and result.get("_id"):
+            return "Result=Success\nJobID=%s" % result["_id"]
+
+        return "Error: %s" % result
+
     @err_catcher(name=__name__)
     def getRedshiftCleanupScript(self):
         script = """
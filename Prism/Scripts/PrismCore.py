@@ -141,16 +141,21 @@ from PrismUtils.Decorators import err_catcher
 from PrismUtils import (
     Callbacks,
     ConfigManager,
+    CopyEngine,
+    DependencyGraph,
     Integration,
     MediaManager,
     MediaProducts,
     PathManager,
     PluginManager,
-    PrismWidgets,
     Products,
+    ProjectCatalog,
     ProjectEntities,
     Projects,
     SanityChecks,
+    StartupProfiler,
+    TranscodePool,
+    TransferQueue,
     Users,
 )
 
@@ -201,6 +206,9 @@ class PrismCore:
             if "silent" in sys.argv:
                 self.prismArgs.append("silent")
 
+            # set PRISM_STARTUP_PROFILE=1 or pass "profileStartup" to print a startup timing report
+            self.profiler = StartupProfiler.StartupProfiler(self)
+
             self.splashScreen = splashScreen
             if self.splashScreen:
                 self.splashScreen.setVersion(self.version)
@@ -247,8 +255,12 @@ class PrismCore:
             self.activeStyleSheet = None
 
             # if no user ini exists, it will be created with default values
-            self.configs = ConfigManager.ConfigManager(self)
-            self.users = Users.Users(self)
+            with self.profiler.measure("managers", "configs"):
+                self.configs = ConfigManager.ConfigManager(self)
+
+            with self.profiler.measure("managers", "users"):
+                self.users = Users.Users(self)
+
             if not os.path.exists(self.userini):
                 self.configs.createUserPrefs()
 
@@ -268,17 +280,50 @@ class PrismCore:
             if sys.argv and sys.argv[-1] in ["setupStartMenu", "refreshIntegrations"]:
                 self.prismArgs.pop(self.prismArgs.index("loadProject"))
 
-            self.callbacks = Callbacks.Callbacks(self)
+            with self.profiler.measure("managers", "callbacks"):
+                self.callbacks = Callbacks.Callbacks(self)
+
             self.users.refreshEnvironment()
-            self.projects = Projects.Projects(self)
-            self.plugins = PluginManager.PluginManager(self)
-            self.paths = PathManager.PathManager(self)
-            self.integration = Integration.Ingegration(self)
-            self.entities = ProjectEntities.ProjectEntities(self)
-            self.mediaProducts = MediaProducts.MediaProducts(self)
-            self.products = Products.Products(self)
-            self.media = MediaManager.MediaManager(self)
-            self.sanities = SanityChecks.SanityChecks(self)
+            with self.profiler.measure("managers", "projects"):
+                self.projects = Projects.Projects(self)
+
+            with self.profiler.measure("managers", "catalog"):
+                self.catalog = ProjectCatalog.ProjectCatalog(self)
+
+            with self.profiler.measure("managers", "plugins"):
+                self.plugins = PluginManager.PluginManager(self)
+
+            with self.profiler.measure("managers", "paths"):
+                self.paths = PathManager.PathManager(self)
+
+            with self.profiler.measure("managers", "copyEngine"):
+                self.copyEngine = CopyEngine.CopyEngine(self)
+
+            with self.profiler.measure("managers", "transferQueue"):
+                self.transferQueue = TransferQueue.TransferQueue(self)
+
+            with self.profiler.measure("managers", "transcodePool"):
+                self.transcodePool = TranscodePool.TranscodePool(self)
+
+            with self.profiler.measure("managers", "dependencyGraph"):
+                self.dependencyGraph = DependencyGraph.DependencyGraph(self)
+
+            with self.profiler.measure("managers", "integration"):
+                self.integration = Integration.Ingegration(self)
+
+            with self.profiler.measure("managers", "entities"):
+                self.entities = ProjectEntities.ProjectEntities(self)
+
+            with self.profiler.measure("managers", "mediaProducts"):
+                self.mediaProducts = MediaProducts.MediaProducts(self)
+
+            with self.profiler.measure("managers", "products"):
+                self.products = Products.Products(self)
+
+            # the media manager gets created on first use (see the "media" property)
+            with self.profiler.measure("managers", "sanities"):
+                self.sanities = SanityChecks.SanityChecks(self)
+
 
             dftSheet = os.path.join(self.prismRoot, "Scripts", "UserInterfacesPrism", "stylesheets", "blue_moon")
             self.registerStyleSheet(dftSheet, default=True)
@@ -304,7 +349,9 @@ class PrismCore:
 
             self.users.ensureUser()
             self.getUIscale()
-            self.initializePlugins(app)
+            with self.profiler.measure("startup", "initializePlugins"):
+                self.initializePlugins(app)
+
             atexit.register(self.onExit)
             qapp = QApplication.instance()
             if qapp:
@@ -322,6 +369,9 @@ class PrismCore:
 
             endTime = datetime.now()
             logger.debug("startup duration: %s" % (endTime - startTime))
+            if self.profiler.active:
+                self.profiler.stop()
+                self.profiler.printReport()
         except Exception as e:
             exc_type, exc_obj, exc_tb = sys.exc_info()
             erStr = "%s ERROR - PrismCore init %s:\n%s\n\n%s" % (
@@ -775,6 +825,7 @@ class PrismCore:
     def getLocalPath(self):
         defaultLocalPath = self.projects.getDefaultLocalPath()
         if self.uiAvailable:
+            from PrismUtils import PrismWidgets
             self.pathWin = PrismWidgets.SetPath(core=self)
             self.pathWin.setModal(True)
             self.parentWindow(self.pathWin)
@@ -929,6 +980,7 @@ License: GNU LGPL-3.0-or-later<br>
 
     @err_catcher(name=__name__)
     def sendFeedbackDlg(self, state=None):
+        from PrismUtils import PrismWidgets
         fbDlg = PrismWidgets.EnterText()
         fbDlg.setModal(True)
         self.parentWindow(fbDlg)
@@ -1336,6 +1388,7 @@ License: GNU LGPL-3.0-or-later<br>
         dft=None,
         location=None,
         allowCache=True,
+        readOnly=False,
     ):
         return self.configs.getConfig(
             cat=cat,
@@ -1345,6 +1398,7 @@ License: GNU LGPL-3.0-or-later<br>
             dft=dft,
             location=location,
             allowCache=allowCache,
+            readOnly=readOnly,
         )
 
     @err_catcher(name=__name__)
@@ -2023,6 +2077,9 @@ License: GNU LGPL-3.0-or-later<br>
 
         infoPath = self.getVersioninfoPath(filepath)
         self.setConfig(configPath=infoPath, data=sData, updateNestedData=not replace)
+        self.paths.notifyPathChanged(os.path.dirname(infoPath))
+        if doDeps == "always":
+            self.dependencyGraph.indexVersionInfo(infoPath)
 
         if preview:
             self.core.entities.setScenePreview(filepath, preview)
@@ -2047,6 +2104,9 @@ License: GNU LGPL-3.0-or-later<br>
 
         infoFilePath = self.getVersioninfoPath(filepath)
         self.setConfig(data=details, configPath=infoFilePath)
+        self.paths.notifyPathChanged(os.path.dirname(infoFilePath))
+        if depsEnabled == "publish":
+            self.dependencyGraph.indexVersionInfo(infoFilePath)
 
     @err_catcher(name=__name__)
     def saveWithComment(self):
@@ -2060,6 +2120,7 @@ License: GNU LGPL-3.0-or-later<br>
             self.showFileNotInProjectWarning()
             return False
 
+        from PrismUtils import PrismWidgets
         self.savec = PrismWidgets.SaveComment(core=self)
         self.savec.accepted.connect(lambda: self.saveWithCommentAccepted(self.savec))
         self.savec.show()
@@ -2288,6 +2349,8 @@ License: GNU LGPL-3.0-or-later<br>
             except:
                 pass
 
+            self.paths.invalidateDirectoryIndex(path)
+
         if os.path.exists(path) and showMessage:
             msg = "Directory created successfully:\n\n%s" % path
             self.popup(msg, severity="info")
@@ -2355,6 +2418,7 @@ License: GNU LGPL-3.0-or-later<br>
     @err_catcher(name=__name__)
     def copyfolder(self, src, dst, thread=None):
         shutil.copytree(src, dst)
+        self.paths.invalidateDirectoryIndex(dst)
         if thread and thread.canceled:
             try:
                 shutil.rmtree(dst)
@@ -2366,7 +2430,7 @@ License: GNU LGPL-3.0-or-later<br>
         return dst
 
     @err_catcher(name=__name__)
-    def copyfile(self, src, dst, thread=None, follow_symlinks=True):
+    def copyfile(self, src, dst, thread=None, follow_symlinks=True, checksum=None, verify=False):
         """Copy data from src to dst.
 
         If follow_symlinks is not set and src is a symbolic link, a new
@@ -2392,60 +2456,72 @@ License: GNU LGPL-3.0-or-later<br>
         if not follow_symlinks and os.path.islink(src):
             os.symlink(os.readlink(src), dst)
         else:
-            size = os.stat(src).st_size
-            # thread.updated.emit("Getting source hash")
-            # vSourceHash = hashlib.md5(open(src, "rb").read()).hexdigest()
-            # vDestinationHash = ""
-            # while vSourceHash != vDestinationHash:
-            with open(src, "rb") as fsrc:
-                with open(dst, "wb") as fdst:
-                    result = self.copyfileobj(fsrc, fdst, total=size, thread=thread, path=dst)
+            checksum = checksum or self.copyEngine.checksumAlgorithm
+            try:
+                result = self.copyEngine.copyFile(
+                    src,
+                    dst,
+                    progressCallback=self.getCopyProgressCallback(thread),
+                    isCanceled=(lambda: thread.canceled) if thread else None,
+                    checksum=checksum,
+                    verify=verify or bool(checksum),
+                )
+            except (IOError, OSError) as e:
+                # a partial or corrupt destination file must not be left behind
+                if os.path.exists(dst):
+                    try:
+                        os.remove(dst)
+                    except Exception:
+                        pass
 
-            if not result:
+                if not thread:
+                    raise
+
+                msg = "Failed to copy file to:\n%s\n\nError message:%s" % (dst, str(e))
+                thread.warningSent.emit(msg)
                 return
 
-            if thread and thread.canceled:
+            if not result or (thread and thread.canceled):
                 try:
                     os.remove(dst)
                 except:
                     pass
                 return
 
-                # thread.updated.emit("Validating copied file")
-                # vDestinationHash = hashlib.md5(open(dst, "rb").read()).hexdigest()
-
         shutil.copymode(src, dst)
+        self.paths.invalidateDirectoryIndex(os.path.dirname(dst))
         return dst
 
     @err_catcher(name=__name__)
     def copyfileobj(self, fsrc, fdst, total, thread=None, length=16 * 1024, path=""):
-        copied = 0
-        prevPrc = -1
-        while True:
-            if thread and thread.canceled:
-                break
+        # length is unused. the copy engine adapts the chunk size to the throughput
+        try:
+            self.copyEngine.copyFileObj(
+                fsrc,
+                fdst,
+                total=total,
+                progressCallback=self.getCopyProgressCallback(thread),
+                isCanceled=(lambda: thread.canceled) if thread else None,
+            )
+        except Exception as e:
+            if thread:
+                msg = "Failed to copy file to:\n%s\n\nError message:%s" % (path, str(e))
+                thread.warningSent.emit(msg)
 
-            buf = fsrc.read(length)
-            if not buf:
-                break
+            return
 
-            try:
-                fdst.write(buf)
-            except Exception as e:
-                if thread:
-                    msg = "Failed to copy file to:\n%s\n\nError message:%s" % (path, str(e))
-                    thread.warningSent.emit(msg)
+        return True
 
-                return
+    @err_catcher(name=__name__)
+    def getCopyProgressCallback(self, thread):
+        if not thread:
+            return
 
-            copied += len(buf)
-            if thread:
-                prc = int((copied / total) * 100)
-                if prc != prevPrc:
-                    prevPrc = prc
-                    thread.updated.emit("Progress: %s%%" % prc)
+        def onProgress(copied, total):
+            prc = int((copied / float(total)) * 100) if total else 100
+            thread.updated.emit("Progress: %s%%" % prc)
 
-        return True
+        return onProgress
 
     @err_catcher(name=__name__)
     def copyWithProgress(self, src, dst, follow_symlinks=True, popup=True, start=True, finishCallback=None):
@@ -2756,6 +2832,19 @@ License: GNU LGPL-3.0-or-later<br>
 
         return filepath
 
+    @property
+    def media(self):
+        # created on first use, so that processes which don't work with media don't pay for it
+        if "_media" not in self.__dict__:
+            with self.profiler.measure("managers", "media"):
+                self._media = MediaManager.MediaManager(self)
+
+        return self._media
+
+    @media.setter
+    def media(self, value):
+        self._media = value
+
     @property
     @err_catcher(name=__name__)
     def timeMeasure(self):
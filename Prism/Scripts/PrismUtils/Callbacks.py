@@ -34,9 +34,11 @@
 
 import os
 import sys
+import time
 import logging
 import traceback
 import glob
+import importlib.util
 
 from qtpy.QtCore import *
 from qtpy.QtGui import *
@@ -56,6 +58,10 @@ class Callbacks(object):
         self.registeredHooks = {}
         self.callbackNum = 0
         self.hookNum = 0
+        self.hookModules = {}
+        # records how long each callback function and hook takes. can be enabled at runtime with enableCallbackTiming
+        self.timeCallbacks = os.getenv("PRISM_CALLBACK_TIMING", "0") == "1"
+        self.callbackStats = {}
 
     @err_catcher(name=__name__)
     def registerCallback(self, callbackName, function, priority=50, plugin=None):
@@ -70,12 +76,13 @@ class Callbacks(object):
             "id": self.callbackNum,
             "plugin": plugin,
         }
-        self.registeredCallbacks[callbackName].append(cbDict)
-        self.registeredCallbacks[callbackName] = sorted(
-            self.registeredCallbacks[callbackName],
-            key=lambda x: int(x["priority"]),
-            reverse=True,
-        )
+        # keep the list sorted by priority. callbacks with the same priority get called in registration order
+        callbacks = self.registeredCallbacks[callbackName]
+        idx = len(callbacks)
+        while idx > 0 and int(callbacks[idx - 1]["priority"]) < int(priority):
+            idx -= 1
+
+        callbacks.insert(idx, cbDict)
         # logger.debug("registered callback: %s" % str(cbDict))
         return cbDict
 
@@ -124,6 +131,7 @@ class Callbacks(object):
     @err_catcher(name=__name__)
     def registerProjectHooks(self):
         self.registeredHooks = {}
+        self.hookModules = {}
         hooks = self.getProjectHooks()
         for hook in hooks:
             self.registerHook(hook["name"], hook["path"])
@@ -144,8 +152,18 @@ class Callbacks(object):
 
         return hooks
 
+    @err_catcher(name=__name__)
+    def hasCallbacks(self, name):
+        # allows skipping expensive work, which is only needed for the arguments of a callback
+        return bool(self.registeredCallbacks.get(name) or self.registeredHooks.get(name))
+
     @err_catcher(name=__name__)
     def callback(self, name="", *args, **kwargs):
+        callbacks = self.registeredCallbacks.get(name)
+        hooks = self.registeredHooks.get(name)
+        if not callbacks and not hooks:
+            return []
+
         if "args" in kwargs:
             args = list(args)
             args += kwargs["args"]
@@ -154,21 +172,82 @@ class Callbacks(object):
         result = []
         self.core.catchTypeErrors = True
         self.currentCallback["function"] = name
+        timeCallbacks = self.timeCallbacks or self.core.profiler.active
+
+        if callbacks:
+            for cb in list(callbacks):
+                pluginName = getattr(cb["plugin"], "pluginName", "")
+                self.currentCallback["plugin"] = pluginName
+                if timeCallbacks:
+                    start = time.perf_counter()
+                    res = cb["function"](*args, **kwargs)
+                    label = pluginName or getattr(cb["function"], "__qualname__", str(cb["function"]))
+                    self.recordCallbackTime(name, label, time.perf_counter() - start)
+                else:
+                    res = cb["function"](*args, **kwargs)
 
-        if name in self.registeredCallbacks:
-            for cb in list(self.registeredCallbacks[name]):
-                self.currentCallback["plugin"] = getattr(cb["plugin"], "pluginName", "")
-                res = cb["function"](*args, **kwargs)
                 result.append(res)
 
-        if name in self.registeredHooks:
-            for cb in self.registeredHooks[name]:
-                result.append(self.callHook(name, *args, **kwargs))
+        if hooks:
+            for cb in hooks:
+                if timeCallbacks:
+                    start = time.perf_counter()
+                    result.append(self.callHook(name, *args, **kwargs))
+                    self.recordCallbackTime(name, "hook", time.perf_counter() - start)
+                else:
+                    result.append(self.callHook(name, *args, **kwargs))
 
         self.core.catchTypeErrors = False
 
         return result
 
+    @err_catcher(name=__name__)
+    def enableCallbackTiming(self, enabled=True):
+        self.timeCallbacks = enabled
+
+    def recordCallbackTime(self, name, label, duration):
+        self.core.profiler.record("callbacks", "%s - %s" % (name, label), duration)
+        if not self.timeCallbacks:
+            return
+
+        stats = self.callbackStats.setdefault((name, label), [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += duration
+        stats[2] = max(stats[2], duration)
+
+    @err_catcher(name=__name__)
+    def getCallbackStats(self):
+        # returns the recorded callbacks sorted by their total duration
+        stats = []
+        for key, value in self.callbackStats.items():
+            stats.append({
+                "callback": key[0],
+                "function": key[1],
+                "calls": value[0],
+                "total": value[1],
+                "average": value[1] / value[0],
+                "max": value[2],
+            })
+
+        return sorted(stats, key=lambda x: x["total"], reverse=True)
+
+    @err_catcher(name=__name__)
+    def resetCallbackStats(self):
+        self.callbackStats = {}
+
+    @err_catcher(name=__name__)
+    def printCallbackStats(self, maxEntries=30):
+        lines = ["Prism callback timing:"]
+        for stat in self.getCallbackStats()[:maxEntries]:
+            lines.append(
+                "    %8.1f ms  %s - %s (%sx, max %.1f ms)"
+                % (stat["total"] * 1000, stat["callback"], stat["function"], stat["calls"], stat["max"] * 1000)
+            )
+
+        report = "\n".join(lines)
+        print(report)
+        return report
+
     @err_catcher(name=__name__)
     def callHook(self, hookName, *args, **kwargs):
         if not getattr(self.core, "projectPath", None):
@@ -176,33 +255,45 @@ class Callbacks(object):
 
         result = None
         hookPath = os.path.join(self.core.projects.getHookFolder(), hookName + ".py")
-        if os.path.exists(os.path.dirname(hookPath)) and os.path.basename(
-            hookPath
-        ) in os.listdir(os.path.dirname(hookPath)):
-            hookDir = os.path.dirname(hookPath)
-            if hookDir not in sys.path:
-                sys.path.append(os.path.dirname(hookPath))
-
-            if kwargs:
-                kwargs["core"] = self.core
-
-            try:
-                hook = __import__(hookName)
-                result = getattr(hook, "main", lambda *args, **kwargs: None)(*args, **kwargs)
-            except:
-                msg = "An Error occuredwhile calling the %s hook:\n\n%s" % (
-                    hookName,
-                    traceback.format_exc(),
-                )
-                self.core.popup(msg)
-
-            if hookName in sys.modules:
-                del sys.modules[hookName]
-
-            if os.path.exists(hookPath + "c"):
-                try:
-                    os.remove(hookPath + "c")
-                except:
-                    pass
+        try:
+            stat = os.stat(hookPath)
+        except Exception:
+            self.hookModules.pop(hookPath, None)
+            return
+
+        hookDir = os.path.dirname(hookPath)
+        if hookDir not in sys.path:
+            sys.path.append(hookDir)
+
+        if kwargs:
+            kwargs["core"] = self.core
+
+        try:
+            hook = self.getHookModule(hookName, hookPath, stat)
+            result = getattr(hook, "main", lambda *args, **kwargs: None)(*args, **kwargs)
+        except:
+            self.hookModules.pop(hookPath, None)
+            msg = "An Error occuredwhile calling the %s hook:\n\n%s" % (
+                hookName,
+                traceback.format_exc(),
+            )
+            self.core.popup(msg)
 
         return result
+
+    def getHookModule(self, hookName, hookPath, stat):
+        # hooks get imported once and only get reloaded when the hook file changes
+        signature = (stat.st_mtime, stat.st_size)
+        cached = self.hookModules.get(hookPath)
+        if cached and cached["signature"] == signature:
+            return cached["module"]
+
+        spec = importlib.util.spec_from_file_location("prism_hook_%s" % hookName, hookPath)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        self.hookModules[hookPath] = {"signature": signature, "module": module}
+        return module
+
+    @err_catcher(name=__name__)
+    def clearHookCache(self):
+        self.hookModules = {}
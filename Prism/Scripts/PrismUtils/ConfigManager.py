@@ -33,13 +33,26 @@
 
 
 import os
+import re
 import sys
 import platform
 import logging
 import time
+import tempfile
+import threading
 
 from collections import OrderedDict
 
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
+try:
+    from types import MappingProxyType
+except ImportError:
+    MappingProxyType = None
+
 if sys.version[0] == "3":
     import collections.abc as collections
     from configparser import ConfigParser
@@ -64,6 +77,22 @@ class ConfigManager(object):
     def __init__(self, core):
         self.core = core
         self.cachedConfigs = {}
+        # seconds a cached config is trusted before its mtime+size gets checked again. negative disables validation
+        self.cacheValidationInterval = float(os.getenv("PRISM_CONFIG_CACHE_VALIDATION_INTERVAL", "1"))
+        self.prefetchThreads = int(os.getenv("PRISM_CONFIG_PREFETCH_THREADS", "8"))
+        self.cacheStats = {"hits": 0, "misses": 0, "invalidations": 0, "prefetched": 0}
+        # "auto" picks the fastest available backend. round-trip yaml is always used before writing a config
+        self.yamlBackend = os.getenv("PRISM_YAML_BACKEND", "auto")
+        self.jsonBackend = os.getenv("PRISM_JSON_BACKEND", "auto")
+        self.yamlLoaders = None
+        self.jsonLoaders = None
+        # "atomic" writes configs to a temp file and replaces the config with it. readers don't wait for
+        # lockfiles in this mode, so all Prism clients using the same project should use the same mode
+        self.writeMode = os.getenv("PRISM_CONFIG_WRITE_MODE", "lockfile")
+        self.writeLock = threading.RLock()
+        self.heldLocks = {}
+        self.umask = os.umask(0)
+        os.umask(self.umask)
         self.preferredExtension = self.core.preferredExtension
         self.configItems = {}
 
@@ -174,6 +203,303 @@ class ConfigManager(object):
 
         return self.cachedConfigs[path]["modtime"]
 
+    @err_catcher(name=__name__)
+    def getCacheStats(self):
+        stats = self.cacheStats.copy()
+        stats["entries"] = len(self.cachedConfigs)
+        return stats
+
+    @err_catcher(name=__name__)
+    def resetCacheStats(self):
+        for key in self.cacheStats:
+            self.cacheStats[key] = 0
+
+    def getFileStat(self, path):
+        try:
+            stat = os.stat(path)
+        except Exception:
+            return
+
+        return (stat.st_mtime, stat.st_size)
+
+    @err_catcher(name=__name__)
+    def addCacheEntry(self, path, data, stat=None):
+        stat = stat or self.getFileStat(path)
+        if not stat:
+            return
+
+        self.cachedConfigs[path] = {
+            "modtime": stat[0],
+            "size": stat[1],
+            "validated": time.time(),
+            "data": data,
+        }
+
+    def isCacheEntryValid(self, path, stat=None):
+        entry = self.cachedConfigs.get(path)
+        if not entry:
+            return False
+
+        if stat is None:
+            if self.cacheValidationInterval < 0:
+                return True
+
+            now = time.time()
+            if (now - entry.get("validated", 0)) < self.cacheValidationInterval:
+                return True
+
+            stat = self.getFileStat(path)
+        else:
+            now = time.time()
+
+        if stat != (entry["modtime"], entry.get("size")):
+            self.cachedConfigs.pop(path, None)
+            self.cacheStats["invalidations"] += 1
+            return False
+
+        entry["validated"] = now
+        return True
+
+    def parseConfigFile(self, path):
+        # runs in worker threads, so it must not show any UI. the caller falls back to readConfig on failure
+        if not self.useAtomicWrites() and Lockfile.Lockfile(self.core, path).isLocked():
+            return
+
+        ext = os.path.splitext(path)[1]
+        with self.core.profiler.measure("config reads", path):
+            if ext == ".yml":
+                load = self.getYamlLoader()
+                if not load:
+                    return
+
+                with open(path, "r") as f:
+                    data = load(f)
+            elif ext == ".json":
+                with open(path, "r") as f:
+                    data = self.loadJsonString(f.read())
+            else:
+                return
+
+        return data
+
+    def getPyYamlLoaderClass(self):
+        import yaml
+
+        if not getattr(yaml, "__with_libyaml__", False):
+            return
+
+        # PyYAML implements YAML 1.1, where values like "yes", "off" or "12:30" are not strings.
+        # restrict the implicit bool, int and float types to YAML 1.2 like ruamel.yaml reads them
+        class PrismCSafeLoader(yaml.CSafeLoader):
+            pass
+
+        excluded = [
+            "tag:yaml.org,2002:bool",
+            "tag:yaml.org,2002:int",
+            "tag:yaml.org,2002:float",
+        ]
+        resolvers = {}
+        for char, charResolvers in yaml.CSafeLoader.yaml_implicit_resolvers.items():
+            resolvers[char] = [r for r in charResolvers if r[0] not in excluded]
+
+        PrismCSafeLoader.yaml_implicit_resolvers = resolvers
+        PrismCSafeLoader.add_implicit_resolver(
+            "tag:yaml.org,2002:bool",
+            re.compile(r"^(?:true|True|TRUE|false|False|FALSE)$"),
+            list("tTfF"),
+        )
+        PrismCSafeLoader.add_implicit_resolver(
+            "tag:yaml.org,2002:int",
+            re.compile(r"^(?:[-+]?[0-9]+|0x[0-9a-fA-F]+)$"),
+            list("-+0123456789"),
+        )
+        PrismCSafeLoader.add_constructor(
+            "tag:yaml.org,2002:int",
+            lambda loader, node: int(loader.construct_scalar(node), 0 if "x" in node.value else 10),
+        )
+        PrismCSafeLoader.add_implicit_resolver(
+            "tag:yaml.org,2002:float",
+            re.compile(
+                r"^(?:[-+]?(?:\.[0-9]+|[0-9]+(?:\.[0-9]*)?)(?:[eE][-+]?[0-9]+)?"
+                r"|[-+]?\.(?:inf|Inf|INF)|\.(?:nan|NaN|NAN))$"
+            ),
+            list("-+.0123456789"),
+        )
+        return PrismCSafeLoader
+
+    @err_catcher(name=__name__)
+    def getYamlLoaders(self):
+        if self.yamlLoaders is not None:
+            return self.yamlLoaders
+
+        loaders = OrderedDict([])
+        try:
+            from ruamel.yaml import YAML
+        except Exception:
+            YAML = None
+
+        if YAML:
+            try:
+                import _ruamel_yaml
+            except Exception:
+                hasClib = False
+            else:
+                hasClib = True
+
+            if hasClib:
+                loaders["ruamel_safe"] = lambda stream: YAML(typ="safe").load(stream)
+
+        try:
+            loaderClass = self.getPyYamlLoaderClass()
+        except Exception:
+            loaderClass = None
+
+        if loaderClass:
+            import yaml
+
+            loaders["pyyaml_c"] = lambda stream: yaml.load(stream, Loader=loaderClass)
+
+        if YAML:
+            if "ruamel_safe" not in loaders:
+                loaders["ruamel_safe"] = lambda stream: YAML(typ="safe").load(stream)
+
+            loaders["roundtrip"] = lambda stream: YAML().load(stream)
+
+        self.yamlLoaders = loaders
+        return self.yamlLoaders
+
+    @err_catcher(name=__name__)
+    def getYamlLoader(self, roundTrip=False):
+        loaders = self.getYamlLoaders()
+        if roundTrip or self.yamlBackend == "roundtrip":
+            return loaders.get("roundtrip")
+
+        if self.yamlBackend in loaders:
+            return loaders[self.yamlBackend]
+
+        if loaders:
+            return list(loaders.values())[0]
+
+    @err_catcher(name=__name__)
+    def getJsonLoaders(self):
+        if self.jsonLoaders is not None:
+            return self.jsonLoaders
+
+        import json
+
+        loaders = OrderedDict([])
+        try:
+            import orjson
+        except Exception:
+            pass
+        else:
+            loaders["orjson"] = orjson.loads
+
+        try:
+            import ujson
+        except Exception:
+            pass
+        else:
+            loaders["ujson"] = ujson.loads
+
+        loaders["json"] = json.loads
+        self.jsonLoaders = loaders
+        return self.jsonLoaders
+
+    def loadJsonString(self, data):
+        import json
+
+        loaders = self.getJsonLoaders()
+        if self.jsonBackend in loaders:
+            load = loaders[self.jsonBackend]
+        else:
+            load = list(loaders.values())[0]
+
+        if load is not json.loads:
+            # the fast parsers reject some values the json module writes (NaN, big ints)
+            try:
+                return load(data)
+            except Exception:
+                pass
+
+        return json.loads(data)
+
+    @err_catcher(name=__name__)
+    def benchmarkConfigBackends(self, paths, repeats=5):
+        # returns the average parse time per file in milliseconds for each available backend
+        backends = OrderedDict([])
+        yamlPaths = [path for path in paths if os.path.splitext(path)[1] == ".yml"]
+        jsonPaths = [path for path in paths if os.path.splitext(path)[1] == ".json"]
+        if yamlPaths:
+            for name, load in self.getYamlLoaders().items():
+                backends["yaml:" + name] = (load, yamlPaths, False)
+
+        if jsonPaths:
+            for name, load in self.getJsonLoaders().items():
+                backends["json:" + name] = (load, jsonPaths, True)
+
+        results = OrderedDict([])
+        for name, backend in backends.items():
+            load, bpaths, readText = backend
+            contents = []
+            for path in bpaths:
+                with open(path, "r") as f:
+                    contents.append(f.read())
+
+            duration = 0
+            for idx in range(repeats):
+                for content in contents:
+                    start = time.time()
+                    try:
+                        load(content if readText else StringIO(content))
+                    except Exception as e:
+                        logger.debug("backend %s failed to parse: %s" % (name, e))
+
+                    duration += time.time() - start
+
+            results[name] = duration / (repeats * len(contents)) * 1000
+            logger.info("%s: %.3f ms per file" % (name, results[name]))
+
+        return results
+
+    def prefetchConfigWorker(self, path):
+        stat = self.getFileStat(path)
+        entry = self.cachedConfigs.get(path)
+        if not stat or (entry and stat == (entry["modtime"], entry.get("size"))):
+            return path, stat, None
+
+        try:
+            data = self.parseConfigFile(path)
+        except Exception as e:
+            logger.debug("failed to prefetch config: %s - %s" % (path, e))
+            data = None
+
+        return path, stat, data
+
+    @err_catcher(name=__name__)
+    def prefetchConfigs(self, paths):
+        paths = list(OrderedDict.fromkeys([os.path.normpath(path) for path in paths if path]))
+        if not paths:
+            return []
+
+        if ThreadPoolExecutor and self.prefetchThreads > 1 and len(paths) > 1:
+            threads = min(self.prefetchThreads, len(paths))
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                results = list(executor.map(self.prefetchConfigWorker, paths))
+        else:
+            results = [self.prefetchConfigWorker(path) for path in paths]
+
+        loaded = []
+        for path, stat, data in results:
+            if data is None:
+                continue
+
+            self.addCacheEntry(path, data, stat=stat)
+            loaded.append(path)
+
+        self.cacheStats["prefetched"] += len(loaded)
+        return loaded
+
     @err_catcher(name=__name__)
     def createUserPrefs(self):
         if os.path.exists(self.core.userini):
@@ -283,6 +609,7 @@ class ConfigManager(object):
         dft=None,
         location=None,
         allowCache=True,
+        readOnly=False,
     ):
         if not configPath and config:
             configPath = self.getConfigPath(config, location=location)
@@ -292,11 +619,16 @@ class ConfigManager(object):
         if configPath:
             configPath = os.path.normpath(configPath)
 
-        if configPath in self.cachedConfigs and allowCache:
+        if allowCache and self.isCacheEntryValid(configPath):
+            self.cacheStats["hits"] += 1
             configData = self.cachedConfigs[configPath]["data"]
             if isinstance(configData, collections.Mapping):
-                configData = configData.copy()
+                if readOnly and MappingProxyType:
+                    configData = MappingProxyType(configData)
+                else:
+                    configData = configData.copy()
         else:
+            self.cacheStats["misses"] += 1
             if not configPath:
                 if dft is not None:
                     self.setConfig(
@@ -330,16 +662,12 @@ class ConfigManager(object):
             if ext == ".ini":
                 configPath = self.convertDeprecatedConfig(configPath)
 
-            configData = self.readConfig(configPath)
+            configData = self.readConfig(configPath, roundTrip=False)
             if configData is None:
                 return dft
 
             if allowCache:
-                mdate = self.core.getFileModificationDate(configPath, asString=False)
-                self.cachedConfigs[configPath] = {
-                    "modtime": mdate,
-                    "data": configData,
-                }
+                self.addCacheEntry(configPath, configData)
 
             # logger.debug("adding cache: %s ---- %s" % (configPath, configData))
 
@@ -363,12 +691,13 @@ class ConfigManager(object):
         return dft
 
     @err_catcher(name=__name__)
-    def readConfig(self, configPath):
+    def readConfig(self, configPath, roundTrip=True):
         ext = os.path.splitext(configPath)[1]
-        if ext == ".yml":
-            configData = self.readYaml(configPath)
-        else:
-            configData = self.readJson(configPath)
+        with self.core.profiler.measure("config reads", configPath):
+            if ext == ".yml":
+                configData = self.readYaml(configPath, roundTrip=roundTrip)
+            else:
+                configData = self.readJson(configPath)
 
         return configData
 
@@ -410,6 +739,17 @@ class ConfigManager(object):
         if not configPath:
             return
 
+        if self.useAtomicWrites() and self.heldLocks.get(configPath) != threading.current_thread().ident:
+            return self.setConfigLocked(
+                cat=cat,
+                param=param,
+                val=val,
+                data=data,
+                configPath=configPath,
+                delete=delete,
+                updateNestedData=updateNestedData,
+            )
+
         isUserConfig = configPath == self.core.userini
 
         configData = self.readConfig(configPath)
@@ -462,6 +802,11 @@ class ConfigManager(object):
         if not os.path.exists(os.path.dirname(configPath)):
             os.makedirs(os.path.dirname(configPath))
 
+        if self.useAtomicWrites():
+            self.writeConfig(path=configPath, data=configData)
+            self.addCacheEntry(os.path.normpath(configPath), configData)
+            return
+
         lf = Lockfile.Lockfile(self.core, configPath)
         try:
             with lf:
@@ -469,11 +814,89 @@ class ConfigManager(object):
         except Lockfile.LockfileException:
             pass
         else:
-            mdate = self.core.getFileModificationDate(configPath, asString=False)
-            self.cachedConfigs[os.path.normpath(configPath)] = {
-                "modtime": mdate,
-                "data": configData,
-            }
+            self.addCacheEntry(os.path.normpath(configPath), configData)
+
+    @err_catcher(name=__name__)
+    def useAtomicWrites(self):
+        return self.writeMode == "atomic"
+
+    @err_catcher(name=__name__)
+    def setConfigLocked(self, configPath, **kwargs):
+        # holds an OS lock during the read-modify-write of setConfig
+        if not os.path.exists(os.path.dirname(configPath)):
+            os.makedirs(os.path.dirname(configPath))
+
+        with self.writeLock:
+            lock = Lockfile.AdvisoryLock(self.core, configPath)
+            try:
+                lock.acquire()
+            except Lockfile.LockfileException as e:
+                logger.warning("failed to lock config: %s - %s" % (configPath, e))
+                return
+
+            self.heldLocks[configPath] = threading.current_thread().ident
+            try:
+                return self.setConfig(configPath=configPath, **kwargs)
+            finally:
+                self.heldLocks.pop(configPath, None)
+                lock.release()
+
+    @err_catcher(name=__name__)
+    def writeConfigFile(self, path, writeFunc):
+        # writes the file through writeFunc(fileObject). in atomic mode the content gets written to a
+        # temp file, which replaces the config, so readers never see a partially written file
+        if not self.useAtomicWrites():
+            with open(path, "w") as config:
+                writeFunc(config)
+
+            return
+
+        folder, name = os.path.split(path)
+        fd, tmpPath = tempfile.mkstemp(prefix="." + name + ".", suffix=".tmp", dir=folder)
+        try:
+            with os.fdopen(fd, "w") as config:
+                writeFunc(config)
+                config.flush()
+                os.fsync(config.fileno())
+
+            if os.path.exists(path):
+                os.chmod(tmpPath, os.stat(path).st_mode & 0o7777)
+            else:
+                os.chmod(tmpPath, 0o666 & ~self.umask)
+
+            self.replaceFile(tmpPath, path)
+        except Exception:
+            if os.path.exists(tmpPath):
+                try:
+                    os.remove(tmpPath)
+                except Exception:
+                    pass
+
+            raise
+
+        if hasattr(os, "O_DIRECTORY"):
+            try:
+                dirFd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(dirFd)
+                finally:
+                    os.close(dirFd)
+            except OSError:
+                pass
+
+    def replaceFile(self, src, dst, timeout=10):
+        startTime = time.time()
+        while True:
+            try:
+                os.replace(src, dst)
+                return
+            except PermissionError:
+                # on Windows the replace fails while another process has the file open
+                if time.time() - startTime >= timeout:
+                    raise
+
+                time.sleep(0.05)
+
 
     @err_catcher(name=__name__)
     def updateNestedDicts(self, d, u, exclude=None):
@@ -489,16 +912,14 @@ class ConfigManager(object):
         return d
 
     @err_catcher(name=__name__)
-    def readYaml(self, path=None, data=None, stream=None, retry=True):
+    def readYaml(self, path=None, data=None, stream=None, retry=True, roundTrip=True):
         logger.debug("read from config: %s" % path)
 
-        try:
-            from ruamel.yaml import YAML
-        except:
+        load = self.getYamlLoader(roundTrip=roundTrip)
+        if not load:
             self.core.missingModule("ruamel.yaml")
             return
 
-        yaml = YAML()
         yamlData = OrderedDict([])
         if path:
             if not os.path.exists(path):
@@ -506,7 +927,8 @@ class ConfigManager(object):
 
             lf = Lockfile.Lockfile(self.core, path)
             try:
-                lf.waitUntilReady()
+                if not self.useAtomicWrites():
+                    lf.waitUntilReady()
             except Lockfile.LockfileException:
                 msg = (
                     "The following file is locked. It might be used by another process:\n\n%s\n\nReading from this file in a locked state can result in data loss."
@@ -519,7 +941,7 @@ class ConfigManager(object):
                     icon=QMessageBox.Warning,
                 )
                 if result == "Retry":
-                    return self.readYaml(path=path, data=data, stream=stream)
+                    return self.readYaml(path=path, data=data, stream=stream, roundTrip=roundTrip)
                 elif result == "Continue":
                     try:
                         lf.forceRelease()
@@ -536,12 +958,18 @@ class ConfigManager(object):
 
             with open(path, "r") as config:
                 try:
-                    yamlData = yaml.load(config)
+                    yamlData = load(config)
                 except Exception as e:
+                    if not roundTrip:
+                        # let the round-trip loader handle content the safe loaders can't
+                        return self.readYaml(
+                            path=path, data=data, stream=stream, retry=retry, roundTrip=True
+                        )
+
                     if retry:
                         time.sleep(0.5)
                         return self.readYaml(
-                            path=path, data=data, stream=stream, retry=False
+                            path=path, data=data, stream=stream, retry=False, roundTrip=roundTrip
                         )
                     else:
                         if os.path.exists(path):
@@ -563,7 +991,7 @@ class ConfigManager(object):
                         )
                         if result == "Retry":
                             return self.readYaml(
-                                path=path, data=data, stream=stream, retry=False
+                                path=path, data=data, stream=stream, retry=False, roundTrip=roundTrip
                             )
                         elif result == "Reset File":
                             if path == self.core.userini:
@@ -571,14 +999,14 @@ class ConfigManager(object):
                             else:
                                 open(path, "w").close()
 
-                            yamlData = self.readYaml(path)
+                            yamlData = self.readYaml(path, roundTrip=roundTrip)
                         elif result == "Cancel":
                             return
                         else:
                             print(result)
 
-            if lf.isLocked():
-                yamlData = self.readYaml(path=path, data=data, stream=stream)
+            if not self.useAtomicWrites() and lf.isLocked():
+                yamlData = self.readYaml(path=path, data=data, stream=stream, roundTrip=roundTrip)
 
             if not yamlData:
                 logger.warning("empty config: %s" % path)
@@ -589,7 +1017,7 @@ class ConfigManager(object):
                 stream = StringIO(data)
 
             try:
-                yamlData = yaml.load(stream)
+                yamlData = load(stream)
             except ValueError:
                 return
 
@@ -614,8 +1042,7 @@ class ConfigManager(object):
                 os.makedirs(os.path.dirname(path))
 
             try:
-                with open(path, "w") as config:
-                    yaml.dump(data, config)
+                self.writeConfigFile(path, lambda config: yaml.dump(data, config))
             except Exception as e:
                 if getattr(e, "errno", None) == 28:
                     self.core.popup("Not enough diskspace to save config:\n\n%s" % path)
@@ -646,8 +1073,6 @@ class ConfigManager(object):
     @err_catcher(name=__name__)
     def readJson(self, path=None, stream=None, data=None, ignoreErrors=False):
         logger.debug("read from config: %s" % path)
-        import json
-
         jsonData = []
         if path:
             if not os.path.exists(path):
@@ -655,7 +1080,7 @@ class ConfigManager(object):
 
             with open(path, "r") as f:
                 try:
-                    jsonData = json.load(f)
+                    jsonData = self.loadJsonString(f.read())
                 except Exception as e:
                     if not ignoreErrors:
                         msg = "Failed to read json config:\n\n%s\n\n%s" % (path, str(e))
@@ -668,7 +1093,7 @@ class ConfigManager(object):
                 stream = StringIO(data)
 
             try:
-                jsonData = json.load(stream)
+                jsonData = self.loadJsonString(stream.read())
             except Exception as e:
                 if not ignoreErrors:
                     msg = "Failed to read json config:\n\n%s\n\n%s" % (path, str(e))
@@ -693,8 +1118,7 @@ class ConfigManager(object):
                         raise
 
             try:
-                with open(path, "w") as config:
-                    json.dump(data, config, indent=indent)
+                self.writeConfigFile(path, lambda config: json.dump(data, config, indent=indent))
             except Exception as e:
                 if getattr(e, "errno", None) == 13:
                     msg = "Failed to write to config because of missing permissions:\n\n%s\n\n%s" % (path, e)
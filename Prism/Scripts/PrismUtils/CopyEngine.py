@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import sys
+import time
+import errno
+import hashlib
+import logging
+import tempfile
+
+from collections import OrderedDict
+
+from PrismUtils.Decorators import err_catcher
+
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_ERRORS = [
+    getattr(errno, name)
+    for name in ["EXDEV", "ENOSYS", "EINVAL", "EOPNOTSUPP", "ENOTSUP", "EBADF", "EPERM"]
+    if hasattr(errno, name)
+]
+
+
+class CopyEngine(object):
+    def __init__(self, core):
+        self.core = core
+        # progress gets reported at most once per interval (in seconds)
+        self.progressInterval = float(os.getenv("PRISM_COPY_PROGRESS_INTERVAL", "0.25"))
+        # algorithm name from hashlib (e.g. "md5", "sha1", "blake2b") or empty to skip checksums
+        self.checksumAlgorithm = os.getenv("PRISM_COPY_CHECKSUM", "") or None
+        self.minChunkSize = 1024 * 1024
+        self.maxChunkSize = 64 * 1024 * 1024
+        # copies through Python are limited to smaller buffers, which stay in the CPU cache
+        self.maxBufferSize = 8 * 1024 * 1024
+        # the chunk size adapts so that every chunk takes roughly this long (in seconds)
+        self.targetChunkDuration = 0.1
+
+    @err_catcher(name=__name__)
+    def getCopyMethods(self, checksum=None):
+        # kernel-side copies avoid moving the data through Python, but can't be used when the
+        # data needs to be hashed
+        methods = []
+        if not checksum:
+            if hasattr(os, "copy_file_range"):
+                methods.append("copy_file_range")
+
+            if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+                methods.append("sendfile")
+
+        methods.append("readinto")
+        return methods
+
+    def getNextChunkSize(self, chunkSize, duration):
+        if duration < self.targetChunkDuration / 2:
+            chunkSize = min(chunkSize * 2, self.maxChunkSize)
+        elif duration > self.targetChunkDuration * 4:
+            chunkSize = max(chunkSize // 2, self.minChunkSize)
+
+        return chunkSize
+
+    def copyFileObj(self, fsrc, fdst, total=None, progressCallback=None, isCanceled=None, checksum=None, methods=None):
+        # copies from the current position of fsrc to the current position of fdst.
+        # returns a dict with the copied bytes and the checksum or None if the copy got canceled
+        if total is None:
+            total = os.fstat(fsrc.fileno()).st_size
+
+        fdst.flush()
+        srcFd = fsrc.fileno()
+        dstFd = fdst.fileno()
+        srcStart = fsrc.tell()
+        dstStart = fdst.tell()
+        hasher = hashlib.new(checksum) if checksum else None
+        methods = list(methods or self.getCopyMethods(checksum=checksum))
+        copied = 0
+        chunkSize = self.minChunkSize
+        lastProgress = time.time()
+        buf = None
+
+        while methods:
+            method = methods[0]
+            try:
+                while True:
+                    if isCanceled and isCanceled():
+                        return
+
+                    chunkStart = time.time()
+                    if method == "copy_file_range":
+                        count = os.copy_file_range(srcFd, dstFd, chunkSize, srcStart + copied, dstStart + copied)
+                    elif method == "sendfile":
+                        os.lseek(dstFd, dstStart + copied, os.SEEK_SET)
+                        count = os.sendfile(dstFd, srcFd, srcStart + copied, chunkSize)
+                    else:
+                        bufSize = min(chunkSize, self.maxBufferSize)
+                        if buf is None or len(buf) < bufSize:
+                            buf = bytearray(bufSize)
+                            view = memoryview(buf)
+
+                        fsrc.seek(srcStart + copied)
+                        count = fsrc.readinto(view[:bufSize])
+                        if count:
+                            if hasher:
+                                hasher.update(view[:count])
+
+                            fdst.seek(dstStart + copied)
+                            written = 0
+                            while written < count:
+                                written += fdst.write(view[written:count])
+
+                    if not count:
+                        if method != "readinto" and copied < total:
+                            # some filesystems (procfs-like, some FUSE and CIFS mounts) return 0
+                            # before the end of the file
+                            raise EOFError()
+
+                        break
+
+                    copied += count
+                    chunkSize = self.getNextChunkSize(chunkSize, time.time() - chunkStart)
+                    if progressCallback and (time.time() - lastProgress) >= self.progressInterval:
+                        lastProgress = time.time()
+                        progressCallback(copied, total)
+
+                break
+            except EOFError:
+                logger.debug("copy method %s stopped before the end of the file, falling back" % method)
+                methods.pop(0)
+            except OSError as e:
+                # the kernel-side copies aren't supported on all filesystems (e.g. some network shares).
+                # the copy continues from the current offset with the next method
+                if method == "readinto" or e.errno not in FALLBACK_ERRORS:
+                    raise
+
+                logger.debug("copy method %s isn't supported here, falling back: %s" % (method, e))
+                methods.pop(0)
+
+        fsrc.seek(srcStart + copied)
+        fdst.seek(dstStart + copied)
+        if progressCallback:
+            progressCallback(copied, total)
+
+        result = {"copied": copied, "checksum": hasher.hexdigest() if hasher else None}
+        return result
+
+    @err_catcher(name=__name__)
+    def getFileChecksum(self, path, checksum=None):
+        hasher = hashlib.new(checksum or self.checksumAlgorithm or "md5")
+        buf = bytearray(self.maxBufferSize)
+        view = memoryview(buf)
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                count = f.readinto(buf)
+                if not count:
+                    break
+
+                hasher.update(view[:count])
+
+        return hasher.hexdigest()
+
+    def copyFile(self, src, dst, progressCallback=None, isCanceled=None, checksum=None, verify=False):
+        # copies the file content of src to dst. when verify is True, the destination file gets
+        # hashed again and compared to the checksum, which was computed while copying
+        if verify and not checksum:
+            checksum = self.checksumAlgorithm or "md5"
+
+        with open(src, "rb", buffering=0) as fsrc:
+            with open(dst, "wb", buffering=0) as fdst:
+                total = os.fstat(fsrc.fileno()).st_size
+                result = self.copyFileObj(
+                    fsrc,
+                    fdst,
+                    total=total,
+                    progressCallback=progressCallback,
+                    isCanceled=isCanceled,
+                    checksum=checksum,
+                )
+
+        if result and verify:
+            dstChecksum = self.getFileChecksum(dst, checksum=checksum)
+            result["verified"] = dstChecksum == result["checksum"]
+            if not result["verified"]:
+                raise IOError(
+                    "Checksum mismatch after copying \"%s\" to \"%s\" (%s != %s)"
+                    % (src, dst, result["checksum"], dstChecksum)
+                )
+
+        return result
+
+    @err_catcher(name=__name__)
+    def benchmarkCopy(self, path=None, sizeMb=512, repeats=3):
+        # returns the throughput in MB/s of the legacy 16 KiB Python loop and each available copy method
+        tmpDir = tempfile.mkdtemp(prefix="prism_copy_benchmark_")
+        src = path or os.path.join(tmpDir, "source.bin")
+        if not path:
+            with open(src, "wb") as f:
+                block = os.urandom(1024 * 1024)
+                for idx in range(int(sizeMb)):
+                    f.write(block)
+
+        size = os.path.getsize(src)
+        dst = os.path.join(tmpDir, "target.bin")
+
+        def copyLegacy():
+            with open(src, "rb") as fsrc:
+                with open(dst, "wb") as fdst:
+                    while True:
+                        buf = fsrc.read(16 * 1024)
+                        if not buf:
+                            break
+
+                        fdst.write(buf)
+
+        benchmarks = OrderedDict([("legacy", copyLegacy)])
+        for method in self.getCopyMethods():
+            benchmarks[method] = lambda method=method: self.copyFileMethod(src, dst, method)
+
+        benchmarks["readinto+checksum"] = lambda: self.copyFile(src, dst, checksum=self.checksumAlgorithm or "md5")
+
+        results = OrderedDict([])
+        try:
+            for name, func in benchmarks.items():
+                duration = 0
+                for idx in range(repeats):
+                    start = time.time()
+                    func()
+                    duration += time.time() - start
+
+                results[name] = (size / (1024.0 * 1024.0)) / max(duration / repeats, 1e-9)
+                logger.info("%s: %.1f MB/s" % (name, results[name]))
+        finally:
+            for filepath in [dst] + ([] if path else [src]):
+                try:
+                    os.remove(filepath)
+                except Exception:
+                    pass
+
+            try:
+                os.rmdir(tmpDir)
+            except Exception:
+                pass
+
+        return results
+
+    def copyFileMethod(self, src, dst, method):
+        with open(src, "rb", buffering=0) as fsrc:
+            with open(dst, "wb", buffering=0) as fdst:
+                return self.copyFileObj(fsrc, fdst, methods=[method])
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import time
+import hashlib
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from PrismUtils.Decorators import err_catcher
+
+
+logger = logging.getLogger(__name__)
+
+
+class DependencyGraph(object):
+    # resolves the dependencies stored in versioninfo files one level at a time.
+    # nodes are cached until their versioninfo file changes
+    def __init__(self, core):
+        self.core = core
+        self.nodes = {}
+        self.maxThreads = int(os.getenv("PRISM_DEPENDENCY_THREADS", "8"))
+        self.executor = None
+        self.lock = threading.Lock()
+
+    @err_catcher(name=__name__)
+    def getExecutor(self):
+        with self.lock:
+            if not self.executor:
+                self.executor = ThreadPoolExecutor(max_workers=max(1, self.maxThreads))
+
+        return self.executor
+
+    def getMtime(self, path):
+        try:
+            return os.stat(path).st_mtime
+        except Exception:
+            return
+
+    @err_catcher(name=__name__)
+    def getNode(self, infoPath):
+        # returns the dependencies stored in a versioninfo file
+        infoPath = os.path.normpath(infoPath)
+        mtime = self.getMtime(infoPath)
+        if mtime is None:
+            self.core.configs.findDeprecatedConfig(infoPath)
+            mtime = self.getMtime(infoPath)
+
+        node = self.nodes.get(infoPath)
+        if node and node["mtime"] == mtime:
+            return node
+
+        info = {}
+        if mtime is not None:
+            info = self.core.getConfig(configPath=infoPath) or {}
+
+        source = info.get("source scene") or info.get("sourceScene")
+        node = {
+            "infoPath": infoPath,
+            "mtime": mtime,
+            "version": info.get("version"),
+            "source": source,
+            "dependencies": list(info.get("dependencies") or []),
+            "externalFiles": list(info.get("externalFiles") or []),
+        }
+        self.nodes[infoPath] = node
+        return node
+
+    @err_catcher(name=__name__)
+    def getDependencies(self, path):
+        # returns the source scene, dependencies and external files of a version
+        node = self.getNode(self.core.getVersioninfoPath(path))
+        deps = []
+        if node["source"]:
+            deps.append(node["source"])
+
+        deps += node["dependencies"]
+        deps += node["externalFiles"]
+        return deps
+
+    @err_catcher(name=__name__)
+    def getVersionInfoPathFromDependency(self, path):
+        # the versioninfo of a dependency is in the folder of the file or in its parent folder
+        ext = self.core.configs.getProjectExtension()
+        for folder in [os.path.dirname(path), os.path.dirname(os.path.dirname(path))]:
+            infoPath = os.path.join(folder, "versioninfo" + ext)
+            self.core.configs.findDeprecatedConfig(infoPath)
+            if os.path.exists(infoPath):
+                return infoPath
+
+    def resolveEntry(self, path, entryType):
+        entry = {"path": path, "type": entryType, "displayPath": path, "infoPath": None}
+        if not os.path.exists(path):
+            depDir = os.path.dirname(path)
+            if os.path.exists(depDir) and len(os.listdir(depDir)) > 0:
+                entry["displayPath"] = depDir
+
+        entry["date"] = self.getMtime(entry["displayPath"])
+        entry["exists"] = entry["date"] is not None
+        if entryType != "File":
+            entry["infoPath"] = self.getVersionInfoPathFromDependency(path)
+
+        return entry
+
+    @err_catcher(name=__name__)
+    def getChildren(self, infoPath, ignore=None):
+        # returns the direct dependencies of a versioninfo file. the files of all children get checked
+        # in parallel and the versioninfo files of the children get read in parallel, so expanding them is fast
+        node = self.getNode(infoPath)
+        ignore = ignore if ignore is not None else []
+        deps = list(node["dependencies"])
+        if node["source"] is not None:
+            deps.append(node["source"])
+
+        items = []
+        for dep in deps:
+            if dep in ignore:
+                continue
+
+            ignore.append(dep)
+            items.append((dep, "Source Scene" if dep == node["source"] else "Export"))
+
+        for extFile in node["externalFiles"]:
+            if extFile not in deps:
+                items.append((extFile, "File"))
+
+        if len(items) > 1:
+            executor = self.getExecutor()
+            entries = list(executor.map(lambda item: self.resolveEntry(*item), items))
+        else:
+            entries = [self.resolveEntry(*item) for item in items]
+
+        infoPaths = [entry["infoPath"] for entry in entries if entry["infoPath"]]
+        self.core.configs.prefetchConfigs(infoPaths)
+        return entries
+
+    @err_catcher(name=__name__)
+    def clearCache(self):
+        self.nodes = {}
+
+    @err_catcher(name=__name__)
+    def getIndexFolder(self):
+        pipelineFolder = self.core.projects.getPipelineFolder()
+        if not pipelineFolder:
+            return
+
+        return os.path.join(pipelineFolder, "DependencyIndex")
+
+    @err_catcher(name=__name__)
+    def getIndexKey(self, path, isFile=False):
+        # consumers of exports get indexed by the version folder of the file they depend on.
+        # scenefiles of all versions share one folder, so they get indexed by the file itself
+        path = os.path.normpath(path)
+        if not isFile and os.path.splitext(path)[1]:
+            path = os.path.dirname(path)
+
+        return os.path.normcase(path)
+
+    @err_catcher(name=__name__)
+    def getIndexPath(self, path, isFile=False):
+        indexFolder = self.getIndexFolder()
+        if not indexFolder:
+            return
+
+        key = hashlib.sha1(self.getIndexKey(path, isFile=isFile).encode("utf-8")).hexdigest()
+        return os.path.join(indexFolder, key[:2], key + self.core.configs.getProjectExtension())
+
+    @err_catcher(name=__name__)
+    def addEdges(self, infoPath, dependencies, isFile=False):
+        # persists the reverse edges from each dependency to the version, which uses it
+        infoPath = os.path.normpath(infoPath)
+        for dep in dependencies:
+            indexPath = self.getIndexPath(dep, isFile=isFile)
+            if not indexPath:
+                return
+
+            if infoPath in (self.core.getConfig("consumers", configPath=indexPath) or {}):
+                continue
+
+            if not os.path.exists(os.path.dirname(indexPath)):
+                try:
+                    os.makedirs(os.path.dirname(indexPath))
+                except Exception:
+                    pass
+
+            # the entry gets merged into the existing index file in one locked write
+            entry = {
+                "target": self.getIndexKey(dep, isFile=isFile),
+                "consumers": {infoPath: time.time()},
+            }
+            self.core.setConfig(data=entry, configPath=indexPath)
+
+    @err_catcher(name=__name__)
+    def indexVersionInfo(self, infoPath):
+        node = self.getNode(infoPath)
+        self.addEdges(infoPath, node["dependencies"])
+        if node["source"]:
+            self.addEdges(infoPath, [node["source"]], isFile=True)
+
+    @err_catcher(name=__name__)
+    def getConsumers(self, path, isFile=False):
+        # returns the versioninfo files of all versions, which were published with this version as a dependency.
+        # isFile has to be set for scenefiles
+        indexPath = self.getIndexPath(path, isFile=isFile)
+        if not indexPath:
+            return []
+
+        consumers = self.core.getConfig("consumers", configPath=indexPath) or {}
+        return [consumer for consumer in consumers if os.path.exists(consumer)]
@@ -37,6 +37,16 @@ import time
 import errno
 import logging
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
 
 logger = logging.getLogger(__name__)
 
@@ -148,3 +158,102 @@ class Lockfile(object):
 
     def __del__(self):
         self.release()
+
+
+class AdvisoryLock(object):
+    # OS level lock for read-modify-write cycles on configs, which get written atomically.
+    # the OS releases the lock if the owner dies, so a crashed process never leaves a stale lock behind
+    def __init__(self, core, fileName, timeout=10, delay=0.05):
+        self.core = core
+        self.lockPath = fileName + ".lock"
+        self.fileName = fileName
+        self.timeout = timeout
+        self.delay = delay
+        self.fd = None
+
+    def lock(self, fd):
+        startTime = time.time()
+        while True:
+            try:
+                if fcntl:
+                    fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+                return
+            except OSError:
+                if time.time() - startTime >= self.timeout:
+                    raise LockfileException(
+                        "Timeout occurred while writing to file: %s" % self.fileName
+                    )
+
+                time.sleep(self.delay)
+
+    def acquire(self):
+        if not fcntl and not msvcrt:
+            raise LockfileException("No file locking available on this platform.")
+
+        while True:
+            try:
+                fd = os.open(self.lockPath, os.O_CREAT | os.O_RDWR)
+            except OSError as e:
+                if e.errno == errno.EACCES:
+                    msg = "Permission denied to create file:\n\n%s" % self.lockPath
+                    self.core.popup(msg)
+                    raise LockfileException(msg)
+
+                raise
+
+            try:
+                self.lock(fd)
+            except Exception:
+                os.close(fd)
+                raise
+
+            # the previous owner might have removed the lockfile while we were waiting for it
+            try:
+                current = os.stat(self.lockPath).st_ino
+            except OSError:
+                current = None
+
+            if current == os.fstat(fd).st_ino:
+                self.fd = fd
+                break
+
+            os.close(fd)
+
+    def release(self):
+        if self.fd is None:
+            return
+
+        try:
+            os.remove(self.lockPath)
+        except OSError:
+            pass
+
+        if msvcrt and not fcntl:
+            try:
+                os.lseek(self.fd, 0, 0)
+                msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+            except OSError:
+                pass
+
+        os.close(self.fd)
+        self.fd = None
+        if not fcntl and os.path.exists(self.lockPath):
+            # Windows doesn't allow removing files while they are open
+            try:
+                os.remove(self.lockPath)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        if self.fd is None:
+            self.acquire()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.release()
+
+    def __del__(self):
+        self.release()
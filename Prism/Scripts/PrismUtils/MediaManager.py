@@ -70,6 +70,7 @@ from qtpy.QtGui import *
 from qtpy.QtWidgets import *
 
 from PrismUtils.Decorators import err_catcher
+from PrismUtils.TranscodePool import TranscodeJob
 
 
 logger = logging.getLogger(__name__)
@@ -96,7 +97,8 @@ class MediaManager(object):
             ".m4v",
         ]
         self.videoFormats = [".mp4", ".mov", ".avi", ".m4v"]
-        self.getImageIO()
+        self.sequenceCache = OrderedDict()
+        self.sequenceCacheSize = 200
 
     @err_catcher(name=__name__)
     def filterValidMediaFiles(self, filepaths):
@@ -111,6 +113,14 @@ class MediaManager(object):
 
     @err_catcher(name=__name__)
     def detectSequence(self, filepaths):
+        for sequence in self.getSequencesFromFiles(filepaths):
+            if filepaths[0] in sequence.files:
+                if len(sequence.files) > 1:
+                    return list(sequence.files)
+
+                break
+
+        # files without a padded frame number at the end
         seq = []
         base = re.sub(r"\d+", "", filepaths[0])
         for filepath in sorted(filepaths):
@@ -119,6 +129,80 @@ class MediaManager(object):
 
         return seq
 
+    @err_catcher(name=__name__)
+    def parseSequenceFilename(self, filename, supportedFormats, videoFormats, sequencePattern=True):
+        # returns the filename with the frame number replaced by "#" and the frame number as int
+        baseName, extension = os.path.splitext(filename)
+        extension = extension.lower()
+        if extension not in supportedFormats:
+            return None, None
+
+        padding = self.core.framePadding
+        if not sequencePattern or len(baseName) < padding:
+            return filename, None
+
+        postFrameStr = ""
+        if ".cryptomatte" in baseName:
+            baseNameData = baseName.split(".cryptomatte")
+            baseName = baseNameData[0]
+            postFrameStr = ".cryptomatte" + baseNameData[-1]
+
+        endStr = baseName[-padding:]
+        if pVersion == 2:
+            endStr = unicode(endStr)
+
+        if (
+            endStr.isnumeric()
+            and not (len(baseName) > padding and (baseName[-(padding+1)] == "v"))
+            and extension not in videoFormats
+        ):
+            padfile = baseName[:-padding] + "#"*padding + postFrameStr + extension
+            try:
+                frame = int(endStr)
+            except ValueError:
+                frame = None
+
+            return padfile, frame
+
+        return filename, None
+
+    @err_catcher(name=__name__)
+    def getSequencesFromFiles(self, files, sequencePattern=True):
+        supportedFormats = set(self.supportedFormats)
+        videoFormats = set(self.videoFormats)
+        sequences = OrderedDict()
+        for file in sorted(files):
+            pattern, frame = self.parseSequenceFilename(
+                file, supportedFormats, videoFormats, sequencePattern=sequencePattern
+            )
+            if pattern is None:
+                continue
+
+            if pattern not in sequences:
+                sequences[pattern] = MediaSequence(pattern, padding=self.core.framePadding if frame is not None else None)
+
+            sequences[pattern].addFile(file, frame)
+
+        return list(sequences.values())
+
+    @err_catcher(name=__name__)
+    def getSequences(self, path, sequencePattern=True):
+        # detects the media sequences in a folder from its cached directory listing
+        entries = self.core.paths.getDirectoryEntries(path) or []
+        key = (os.path.normpath(path), sequencePattern)
+        cached = self.sequenceCache.pop(key, None)
+        if cached and cached["entries"] is entries:
+            self.sequenceCache[key] = cached
+            return cached["sequences"]
+
+        files = [os.path.join(path, name) for name, isDir in entries if not isDir]
+        sequences = self.getSequencesFromFiles(files, sequencePattern=sequencePattern)
+        self.sequenceCache[key] = {"entries": entries, "sequences": sequences}
+        while len(self.sequenceCache) > self.sequenceCacheSize:
+            self.sequenceCache.popitem(last=False)
+
+        return sequences
+
     @err_catcher(name=__name__)
     def getSequenceFromFilename(self, filename):
         seq = filename
@@ -179,65 +263,41 @@ class MediaManager(object):
 
     @err_catcher(name=__name__)
     def detectSequences(self, files, getFirstFile=False, sequencePattern=True):
-        foundSrc = {}
-        psources = []
-        for file in files:
-            baseName, extension = os.path.splitext(file)
-            extension = extension.lower()
-            if extension in self.core.media.supportedFormats:
-                filename = self.getFilenameWithoutFrameNumber(file)
-                psources.append(os.path.splitext(filename))
-
-        for file in sorted(files):
-            baseName, extension = os.path.splitext(file)
-            extension = extension.lower()
-            if extension in self.core.media.supportedFormats:
-                if getFirstFile:
+        if getFirstFile:
+            for file in sorted(files):
+                if os.path.splitext(file)[1].lower() in self.core.media.supportedFormats:
                     return [file]
 
-                padfile = file
-                if len(baseName) >= self.core.framePadding:
-                    postFrameStr = ""
-                    if ".cryptomatte" in baseName:
-                        baseNameData = baseName.split(".cryptomatte")
-                        baseName = baseNameData[0]
-                        postFrameStr = ".cryptomatte" + baseNameData[-1]
-
-                    endStr = baseName[-self.core.framePadding:]
-                    if pVersion == 2:
-                        endStr = unicode(endStr)
-
-                    if sequencePattern:
-                        if (
-                            endStr.isnumeric()
-                            and not (len(baseName) > self.core.framePadding and (baseName[-(self.core.framePadding+1)] == "v"))
-                            and extension not in self.core.media.videoFormats
-                        ):
-                            pattern = "#"
-                            padfile = baseName[:-self.core.framePadding] + pattern*self.core.framePadding + postFrameStr + extension
-
-                if padfile in foundSrc:
-                    foundSrc[padfile].append(file)
-                else:
-                    foundSrc[padfile] = [file]
+            return {}
+
+        foundSrc = OrderedDict()
+        for sequence in self.getSequencesFromFiles(files, sequencePattern=sequencePattern):
+            foundSrc[sequence.pattern] = list(sequence.files)
 
         return foundSrc
 
     @err_catcher(name=__name__)
     def getImgSources(self, path, getFirstFile=False, sequencePattern=True):
-        foundSrc = []
-        files = []
-        for root, folder, files in os.walk(path):
-            break
-
-        foundSrc = self.detectSequences(files, getFirstFile=getFirstFile, sequencePattern=sequencePattern)
-        if foundSrc:
-            foundSrc = [os.path.join(path, src) for src in foundSrc]
+        if getFirstFile:
+            entries = self.core.paths.getDirectoryEntries(path) or []
+            files = [name for name, isDir in entries if not isDir]
+            return [os.path.join(path, src) for src in self.detectSequences(files, getFirstFile=True)]
 
+        sequences = self.getSequences(path, sequencePattern=sequencePattern)
+        foundSrc = [sequence.pattern for sequence in sequences]
         return foundSrc
 
     @err_catcher(name=__name__)
     def getFilesFromSequence(self, sequence):
+        if isinstance(sequence, MediaSequence):
+            return list(sequence.files)
+
+        if "#" in os.path.basename(sequence):
+            folder, name = os.path.split(sequence)
+            for seq in self.getSequences(folder):
+                if os.path.basename(seq.pattern) == name:
+                    return list(seq.files)
+
         files = glob.glob(sequence.replace("#", "?"))
         files = sorted(files)
         return files
@@ -250,6 +310,9 @@ class MediaManager(object):
 
     @err_catcher(name=__name__)
     def getFrameRangeFromSequence(self, filepaths):
+        if isinstance(filepaths, MediaSequence):
+            return filepaths.getFrameRange()
+
         startPath = filepaths[0]
         try:
             start = int(os.path.splitext(startPath)[0][-self.core.framePadding:])
@@ -312,18 +375,23 @@ class MediaManager(object):
 
     @err_catcher(name=__name__)
     def getOIIO(self):
-        oiio = None
-        try:
-            if platform.system() == "Windows":
-                from oiio_2_4 import OpenImageIO as oiio
+        # imported on first use, because loading OIIO adds noticeably to the startup time
+        if not hasattr(self, "_oiio"):
+            oiio = None
+            with self.core.profiler.measure("modules", "OpenImageIO"):
+                try:
+                    if platform.system() == "Windows":
+                        from oiio_2_4 import OpenImageIO as oiio
 
-            elif platform.system() in ["Linux", "Darwin"]:
-                import OpenImageIO as oiio
-        except:
-            logger.debug("loading oiio failed: %s" % traceback.format_exc())
-            self.checkMSVC()
+                    elif platform.system() in ["Linux", "Darwin"]:
+                        import OpenImageIO as oiio
+                except:
+                    logger.debug("loading oiio failed: %s" % traceback.format_exc())
+                    self.checkMSVC()
 
-        return oiio
+            self._oiio = oiio
+
+        return self._oiio
 
     @err_catcher(name=__name__)
     def getImageIO(self):
@@ -332,9 +400,10 @@ class MediaManager(object):
             os.environ["IMAGEIO_FFMPEG_EXE"] = self.getFFmpeg()
             sys.path.insert(0, r"D:\Dropbox\Workstation\Tools\Prism\Repos\Prism\Prism\PythonLibs\Python3")
             try:
-                import imageio
-                import imageio.plugins.ffmpeg
-                import imageio_ffmpeg
+                with self.core.profiler.measure("modules", "imageio"):
+                    import imageio
+                    import imageio.plugins.ffmpeg
+                    import imageio_ffmpeg
             except:
                 logger.debug("failed to load imageio: %s" % traceback.format_exc())
             else:
@@ -407,14 +476,38 @@ class MediaManager(object):
         return True
 
     @err_catcher(name=__name__)
-    def convertMedia(self, inputpath, startNum, outputpath, settings=None):
+    def getMediaConversionSettings(self):
+        # project settings used by convertMedia. resolved once per batch instead of once per file
+        fps = "25"
+        if self.core.getConfig(
+            "globals", "forcefps", configPath=self.core.prismIni
+        ):
+            fps = self.core.getConfig(
+                "globals", "fps", configPath=self.core.prismIni
+            )
+
+        mediaSettings = {
+            "ffmpeg": self.getFFmpeg(validate=True),
+            "fps": fps,
+            "jpgCompression": self.core.getConfig(
+                "media", "jpgCompression", dft=4, config="project"
+            ),
+            "mp4Compression": self.core.getConfig(
+                "media", "mp4Compression", dft=18, config="project"
+            ),
+        }
+        return mediaSettings
+
+    @err_catcher(name=__name__)
+    def getConvertMediaArgs(self, inputpath, startNum, outputpath, settings=None, mediaSettings=None):
         inputpath = inputpath.replace("\\", "/")
         inputExt = os.path.splitext(inputpath)[1].lower()
         outputExt = os.path.splitext(outputpath)[1].lower()
         videoInput = inputExt in [".mp4", ".mov", ".m4v"]
         startNum = str(startNum) if startNum is not None else None
 
-        ffmpegPath = self.getFFmpeg(validate=True)
+        mediaSettings = mediaSettings or self.getMediaConversionSettings()
+        ffmpegPath = mediaSettings["ffmpeg"]
 
         if not ffmpegPath:
             msg = "Could not find ffmpeg"
@@ -440,18 +533,10 @@ class MediaManager(object):
             )
 
         else:
-            fps = "25"
-            if self.core.getConfig(
-                "globals", "forcefps", configPath=self.core.prismIni
-            ):
-                fps = self.core.getConfig(
-                    "globals", "fps", configPath=self.core.prismIni
-                )
-
             args = OrderedDict(
                 [
                     ("-start_number", startNum),
-                    ("-framerate", fps),
+                    ("-framerate", mediaSettings["fps"]),
                     ("-apply_trc", "iec61966_2_1"),
                     ("-i", inputpath),
                     ("-pix_fmt", "yuva420p"),
@@ -464,16 +549,10 @@ class MediaManager(object):
                 args.popitem(last=True)
 
         if outputExt == ".jpg":
-            quality = self.core.getConfig(
-                "media", "jpgCompression", dft=4, config="project"
-            )
-            args["-qscale:v"] = str(quality)
+            args["-qscale:v"] = str(mediaSettings["jpgCompression"])
 
         if outputExt == ".mp4":
-            quality = self.core.getConfig(
-                "media", "mp4Compression", dft=18, config="project"
-            )
-            args["-crf"] = str(quality)
+            args["-crf"] = str(mediaSettings["mp4Compression"])
 
         if settings:
             args.update(settings)
@@ -496,16 +575,53 @@ class MediaManager(object):
             argList += al
 
         argList += [outputpath, "-y"]
-        logger.debug("Run ffmpeg with this settings: " + str(argList))
-        nProc = subprocess.Popen(
-            argList, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True
+        return argList
+
+    @err_catcher(name=__name__)
+    def convertMedia(self, inputpath, startNum, outputpath, settings=None, mediaSettings=None):
+        # converts the media in the current thread and returns the stdout and stderr of ffmpeg
+        argList = self.getConvertMediaArgs(inputpath, startNum, outputpath, settings=settings, mediaSettings=mediaSettings)
+        if not argList:
+            return
+
+        job = TranscodeJob(argList, outputpath=outputpath)
+        job.run()
+        return job.result
+
+    @err_catcher(name=__name__)
+    def convertMediaAsync(self, inputpath, startNum, outputpath, settings=None, mediaSettings=None, priority=50, frameCount=None, callback=None):
+        # queues the conversion in the transcode pool and returns the TranscodeJob.
+        # pass a callback for job.finished or call job.wait() to get the result
+        argList = self.getConvertMediaArgs(inputpath, startNum, outputpath, settings=settings, mediaSettings=mediaSettings)
+        if not argList:
+            return
+
+        return self.core.transcodePool.submit(
+            argList, outputpath=outputpath, priority=priority, frameCount=frameCount, callback=callback
         )
-        result = nProc.communicate()
 
-        if sys.version[0] == "3":
-            result = [x.decode("utf-8", "ignore") for x in result]
+    @err_catcher(name=__name__)
+    def convertMediaBatch(self, conversions, priority=50):
+        # conversions is a list of dicts with the keys "inputpath", "startNum", "outputpath" and
+        # optionally "settings" and "frameCount". returns a list of TranscodeJobs
+        mediaSettings = self.getMediaConversionSettings()
+        jobs = []
+        for conversion in conversions:
+            job = self.convertMediaAsync(
+                conversion["inputpath"],
+                conversion.get("startNum"),
+                conversion["outputpath"],
+                settings=conversion.get("settings"),
+                mediaSettings=mediaSettings,
+                priority=priority,
+                frameCount=conversion.get("frameCount"),
+            )
+            if not job:
+                break
 
-        return result
+            jobs.append(job)
+
+        return jobs
 
     @err_catcher(name=__name__)
     def invalidateOiioCache(self, force=False):
@@ -576,11 +692,32 @@ class MediaManager(object):
     @err_catcher(name=__name__)
     def getPixmapFromExrPath(self, path, width=None, height=None, channel=None, allowThumb=True, regenerateThumb=False):
         thumbEnabled = self.getUseThumbnails()
-        if allowThumb and thumbEnabled and not regenerateThumb and path:
-            thumbPath = self.getThumbnailPath(path)
-            if os.path.exists(thumbPath):
-                return self.getPixmapFromPath(thumbPath, width=width, height=height)
+        if allowThumb and not regenerateThumb and path:
+            qimg = self.getThumbnailCache().getCachedImage(path, width, height, channel)
+            if qimg is not None:
+                return QPixmap.fromImage(qimg)
+
+            if thumbEnabled:
+                thumbPath = self.getThumbnailPath(path)
+                if os.path.exists(thumbPath):
+                    return self.getPixmapFromPath(thumbPath, width=width, height=height)
+
+        qimg = self.getQImageFromExrPath(path, width=width, height=height, channel=channel)
+        if not qimg:
+            return
+
+        pixmap = QPixmap.fromImage(qimg)
+        if allowThumb:
+            self.getThumbnailCache().storeImage(path, qimg, width, height, channel)
+            if thumbEnabled:
+                thumbPath = self.getThumbnailPath(path)
+                self.savePixmap(pixmap, thumbPath)
 
+        return pixmap
+
+    @err_catcher(name=__name__)
+    def getQImageFromExrPath(self, path, width=None, height=None, channel=None):
+        # doesn't create any QPixmaps, so it can be used in worker threads
         oiio = self.getOIIO()
         if not oiio:
             # msg = "OpenImageIO is not available. Unable to read the file."
@@ -633,8 +770,8 @@ class MediaManager(object):
         if "numpy" in globals():
             rgbImgSrc.set_pixels(imgInput.spec().roi, numpy.array(pixels))
         else:
-            for h in range(height):
-                for w in range(width):
+            for h in range(imgInput.spec().height):
+                for w in range(imgInput.spec().width):
                     color = [pixels[h][w][0], pixels[h][w][1], pixels[h][w][2]]
                     rgbImgSrc.setpixel(w, h, 0, color)
 
@@ -664,29 +801,48 @@ class MediaManager(object):
             oiio.ImageSpec(int(newImgWidth), int(newImgHeight), 3, oiio.UINT16)
         )
         oiio.ImageBufAlgo.resample(imgDst, rgbImgSrc)
-        sRGBimg = oiio.ImageBuf()
-        oiio.ImageBufAlgo.pow(sRGBimg, imgDst, (1.0 / 2.2, 1.0 / 2.2, 1.0 / 2.2))
-        bckImg = oiio.ImageBuf(
-            oiio.ImageSpec(int(newImgWidth), int(newImgHeight), 3, oiio.UINT16)
-        )
-        oiio.ImageBufAlgo.fill(bckImg, (0.5, 0.5, 0.5))
-        oiio.ImageBufAlgo.paste(bckImg, xOffset, yOffset, 0, 0, sRGBimg)
-        qimg = QImage(int(newImgWidth), int(newImgHeight), QImage.Format_RGB32)
-        for i in range(int(newImgWidth)):
-            for k in range(int(newImgHeight)):
-                rgb = qRgb(
-                    bckImg.getpixel(i, k)[0] * 255,
-                    bckImg.getpixel(i, k)[1] * 255,
-                    bckImg.getpixel(i, k)[2] * 255,
-                )
-                qimg.setPixel(i, k, rgb)
+        if "numpy" in globals():
+            qimg = self.getQImageFromImageBuf(imgDst)
+        else:
+            sRGBimg = oiio.ImageBuf()
+            oiio.ImageBufAlgo.pow(sRGBimg, imgDst, (1.0 / 2.2, 1.0 / 2.2, 1.0 / 2.2))
+            bckImg = oiio.ImageBuf(
+                oiio.ImageSpec(int(newImgWidth), int(newImgHeight), 3, oiio.UINT16)
+            )
+            oiio.ImageBufAlgo.fill(bckImg, (0.5, 0.5, 0.5))
+            oiio.ImageBufAlgo.paste(bckImg, xOffset, yOffset, 0, 0, sRGBimg)
+            qimg = QImage(int(newImgWidth), int(newImgHeight), QImage.Format_RGB32)
+            for i in range(int(newImgWidth)):
+                for k in range(int(newImgHeight)):
+                    pixel = bckImg.getpixel(i, k)
+                    rgb = qRgb(
+                        pixel[0] * 255,
+                        pixel[1] * 255,
+                        pixel[2] * 255,
+                    )
+                    qimg.setPixel(i, k, rgb)
 
-        pixmap = QPixmap.fromImage(qimg)
-        if thumbEnabled and allowThumb:
-            thumbPath = self.getThumbnailPath(path)
-            self.savePixmap(pixmap, thumbPath)
+        return qimg
 
-        return pixmap
+    @err_catcher(name=__name__)
+    def getQImageFromImageBuf(self, imgBuf, gamma=2.2, background=0.5):
+        # converts the whole buffer at once instead of reading single pixels
+        oiio = self.getOIIO()
+        spec = imgBuf.spec()
+        pixels = imgBuf.get_pixels(oiio.FLOAT)
+        pixels = numpy.asarray(pixels, dtype=numpy.float32).reshape(
+            spec.height, spec.width, spec.nchannels
+        )[:, :, :3]
+
+        pixels = numpy.power(numpy.clip(pixels, 0.0, None), 1.0 / gamma)
+        pixels = numpy.nan_to_num(pixels, nan=background, posinf=1.0, neginf=0.0)
+        pixels = (numpy.clip(pixels, 0.0, 1.0) * 255.0 + 0.5).astype(numpy.uint8)
+        height, width = pixels.shape[:2]
+        data = pixels.tobytes()
+        qimg = QImage(data, width, height, 3 * width, QImage.Format_RGB888)
+        # detach the QImage from the temporary buffer
+        qimg = qimg.convertToFormat(QImage.Format_RGB32)
+        return qimg
 
     @err_catcher(name=__name__)
     def getPixmapFromPath(self, path, width=None, height=None, colorAdjust=False):
@@ -713,28 +869,30 @@ class MediaManager(object):
     @err_catcher(name=__name__)
     def getPixmapFromVideoPath(self, path, allowThumb=True, regenerateThumb=False, videoReader=None, imgNum=0):
         thumbEnabled = self.getUseThumbnails()
-        if allowThumb and thumbEnabled and not regenerateThumb and imgNum == 0:
-            thumbPath = self.getThumbnailPath(path)
-            if os.path.exists(thumbPath):
-                return self.getPixmapFromPath(thumbPath)
+        if allowThumb and not regenerateThumb and imgNum == 0:
+            qimg = self.getThumbnailCache().getCachedImage(path)
+            if qimg is not None:
+                return QPixmap.fromImage(qimg)
+
+            if thumbEnabled:
+                thumbPath = self.getThumbnailPath(path)
+                if os.path.exists(thumbPath):
+                    return self.getPixmapFromPath(thumbPath)
 
         _, ext = os.path.splitext(path)
         try:
-            vidFile = self.core.media.getVideoReader(path) if videoReader is None else videoReader
-            if self.core.isStr(vidFile):
-                logger.warning(vidFile)
+            qimg = self.getQImageFromVideoPath(path, videoReader=videoReader, imgNum=imgNum, raiseErrors=True)
+            if qimg is None:
                 imgPath = os.path.join(
                     self.core.projects.getFallbackFolder(),
                     "%s.jpg" % ext[1:].lower(),
                 )
                 pmsmall = self.core.media.getPixmapFromPath(imgPath)
             else:
-                image = vidFile.get_data(imgNum)
-                fileRes = vidFile._meta["size"]
-                width = fileRes[0]
-                height = fileRes[1]
-                qimg = QImage(image, width, height, 3*width, QImage.Format_RGB888)
                 pmsmall = QPixmap.fromImage(qimg)
+                if imgNum == 0 and allowThumb:
+                    self.getThumbnailCache().storeImage(path, qimg)
+
                 if thumbEnabled and imgNum == 0:
                     thumbPath = self.getThumbnailPath(path)
                     self.savePixmap(pmsmall, thumbPath)
@@ -749,6 +907,38 @@ class MediaManager(object):
 
         return pmsmall
 
+    @err_catcher(name=__name__)
+    def getQImageFromVideoPath(self, path, videoReader=None, imgNum=0, raiseErrors=False):
+        try:
+            vidFile = self.core.media.getVideoReader(path) if videoReader is None else videoReader
+            if self.core.isStr(vidFile):
+                logger.warning(vidFile)
+                return
+
+            image = vidFile.get_data(imgNum)
+            fileRes = vidFile._meta["size"]
+            width = fileRes[0]
+            height = fileRes[1]
+            # copy, so the QImage doesn't reference the frame buffer of the reader
+            qimg = QImage(image, width, height, 3*width, QImage.Format_RGB888).copy()
+        except Exception:
+            if raiseErrors:
+                raise
+
+            logger.debug(traceback.format_exc())
+            return
+
+        return qimg
+
+    @err_catcher(name=__name__)
+    def getThumbnailCache(self):
+        if not getattr(self, "thumbnailCache", None):
+            from PrismUtils import ThumbnailCache
+
+            self.thumbnailCache = ThumbnailCache.ThumbnailCache(self.core)
+
+        return self.thumbnailCache
+
     @err_catcher(name=__name__)
     def savePixmap(self, pmap, path):
         while True:
@@ -1056,3 +1246,47 @@ class MediaManager(object):
             self._emptyPrvPixmapBig = self.getFallbackPixmap(big=True)
 
         return self._emptyPrvPixmapBig
+
+
+class MediaSequence(object):
+    def __init__(self, pattern, padding=None):
+        self.pattern = pattern
+        self.padding = padding
+        self.files = []
+        self.frames = []
+
+    def __len__(self):
+        return len(self.files)
+
+    def addFile(self, filepath, frame=None):
+        self.files.append(filepath)
+        if frame is not None:
+            self.frames.append(frame)
+
+    def isSequence(self):
+        return self.padding is not None and len(self.frames) > 1
+
+    @property
+    def firstFrame(self):
+        if self.frames:
+            return min(self.frames)
+
+    @property
+    def lastFrame(self):
+        if self.frames:
+            return max(self.frames)
+
+    def getFrameRange(self):
+        if not self.frames:
+            return "?", "?"
+
+        return self.firstFrame, self.lastFrame
+
+    def getMissingFrameRanges(self):
+        ranges = []
+        frames = sorted(set(self.frames))
+        for prevFrame, frame in zip(frames, frames[1:]):
+            if frame - prevFrame > 1:
+                ranges.append([prevFrame + 1, frame - 1])
+
+        return ranges
@@ -37,9 +37,7 @@ import sys
 import logging
 import platform
 import shutil
-import glob
 import errno
-import time
 import copy
 
 from qtpy.QtCore import *
@@ -104,6 +102,7 @@ class MediaProducts(object):
                 self.core.popup(msg)
                 continue
 
+        self.core.paths.notifyPathChanged(folderpath)
         return folderpath
 
     @err_catcher(name=__name__)
@@ -209,6 +208,20 @@ class MediaProducts(object):
         path = os.path.dirname(template)
         return path
 
+    @err_catcher(name=__name__)
+    def prefetchVersionInfos(self, versions):
+        infoPaths = []
+        for version in versions:
+            path = version.get("path")
+            if not path or os.path.splitext(path)[1]:
+                continue
+
+            infoPaths.append(
+                os.path.join(path, "versioninfo" + self.core.configs.getProjectExtension())
+            )
+
+        return self.core.configs.prefetchConfigs(infoPaths)
+
     @err_catcher(name=__name__)
     def getVersionsFromIdentifier(self, identifier, locations=None):
         locationData = self.core.paths.getRenderProductBasePaths()
@@ -409,12 +422,11 @@ class MediaProducts(object):
             if context.get("redirect"):
                 base, ext = os.path.splitext(context["redirect"])
                 if ext:
-                    globPath = context["redirect"].replace("#", "?")
-                    files = glob.glob(globPath)
+                    files = self.core.media.getFilesFromSequence(context["redirect"])
                 else:
                     if context.get("source"):
-                        globPath = os.path.join(context["redirect"], context["source"].replace("#", "?"))
-                        files = glob.glob(globPath)
+                        seqPath = os.path.join(context["redirect"], context["source"])
+                        files = self.core.media.getFilesFromSequence(seqPath)
                     else:
                         for rdroot, rdfolders, rdfiles in os.walk(context["redirect"]):
                             break
@@ -422,11 +434,11 @@ class MediaProducts(object):
                         files = [os.path.join(rdroot, rdf) for rdf in rdfiles]
 
             elif context.get("source"):
-                globPath = os.path.join(folder, context["source"].replace("#", "?"))
-                files = glob.glob(globPath)
+                seqPath = os.path.join(folder, context["source"])
+                files = self.core.media.getFilesFromSequence(seqPath)
             else:
-                for root, folders, files in os.walk(folder):
-                    break
+                entries = self.core.paths.getDirectoryEntries(folder) or []
+                files = [name for name, isDir in entries if not isDir]
 
             for file in files:
                 filepath = os.path.join(folder, file)
@@ -1042,6 +1054,7 @@ class MediaProducts(object):
             originBase = path
 
         files = self.core.getFilesFromFolder(originBase, recursive=True)
+        transfers = []
         for file in files:
             frameStr = os.path.splitext(file)[0][-self.core.framePadding :]
             if sys.version[0] == "2":
@@ -1064,7 +1077,10 @@ class MediaProducts(object):
             if platform.system() == "Windows" and drive == masterDrive and useHL:
                 self.core.createSymlink(masterFile, file)
             else:
-                shutil.copy2(file, masterFile)
+                transfers.append((file, masterFile))
+
+        if transfers:
+            self.core.transferQueue.transfer(transfers, popup=False, copyStat=True, raiseErrors=True)
 
         masterVersions.append(originBase)
         ext = self.core.configs.getProjectExtension()
@@ -1072,6 +1088,7 @@ class MediaProducts(object):
         self.core.setConfig(
             "versionpaths", val=masterVersions, configPath=masterInfoPath
         )
+        self.core.paths.notifyPathChanged(masterBase)
         self.core.media.invalidateOiioCache()
         return masterPath
 
@@ -1208,6 +1225,7 @@ class MediaProducts(object):
                 if allowRename:
                     renamed = self.core.products.renameMaster(vpath)
                     if renamed:
+                        self.core.paths.notifyPathChanged(vpath)
                         return True
 
                 logger.warning(e)
@@ -1222,6 +1240,8 @@ class MediaProducts(object):
                 else:
                     return False
 
+            self.core.paths.notifyPathChanged(vpath)
+
         return True
 
     @err_catcher(name=__name__)
@@ -1267,6 +1287,7 @@ class MediaProducts(object):
                 self.core.popup("The directory %s could not be created" % path)
                 return
             else:
+                self.core.paths.notifyPathChanged(path)
                 self.core.callback(
                     name="onIdentifierCreated",
                     args=[self, path, context],
@@ -1305,6 +1326,7 @@ class MediaProducts(object):
                 self.core.popup("The directory %s could not be created" % path)
                 return
             else:
+                self.core.paths.notifyPathChanged(path)
                 self.core.callback(
                     name="onVersionCreated",
                     args=[self, path, context],
@@ -1338,6 +1360,7 @@ class MediaProducts(object):
                 self.core.popup("The directory %s could not be created" % path)
                 return
             else:
+                self.core.paths.notifyPathChanged(path)
                 self.core.callback(
                     name="onAovCreated",
                     args=[self, path, context],
@@ -1365,113 +1388,85 @@ class MediaProducts(object):
             "location": location,
         }
 
-        baseTxt = "Copying file - please wait..\n\n"
-        updatedText = baseTxt + "%s/%s" % (0, len(files))
-        self.copyMsg = self.core.waitPopup(self.core, updatedText, hidden=True)
-
-        self.ingestedFiles = []
-        self.ingestCanceled = False
-        self.ingestThreads = []
-        with self.copyMsg as copyMsg:
-            for idx, file in enumerate(files):
-                if self.ingestCanceled:
-                    return
-
-                kwargs["extension"] = os.path.splitext(file)[1]
-                if len(files) > 1:
-                    kwargs["framePadding"] = ("%%0%sd" % self.core.framePadding) % (idx + 1)
-
-                if kwargs.get("mediaType") == "playblasts":
-                    pbkwargs = kwargs.copy()
-                    del pbkwargs["aov"]
-                    del pbkwargs["mediaType"]
-                    targetPath = self.generatePlayblastPath(**pbkwargs)
-                else:
-                    targetPath = self.generateMediaProductPath(**kwargs)
-
-                if idx == 0:
-                    if not os.path.exists(os.path.dirname(targetPath)):
-                        try:
-                            os.makedirs(os.path.dirname(targetPath))
-                        except:
-                            msg = "The directory could not be created"
-                            self.core.popup(msg)
-                            return {"result": msg}
-
-                    elif os.listdir(os.path.dirname(targetPath)):
-                        msg = "The targetfolder contains files already.\nContinuing may overwrite existing files."
-                        result = self.core.popupQuestion(msg, buttons=["Continue", "Add new version", "Cancel"], icon=QMessageBox.Warning)
-                        if result == "Cancel":
-                            return {"result": "canceled"}
-                        elif result == "Add new version":
-                            context = kwargs["entity"].copy()
-                            context["identifier"] = identifier
-                            context["mediaType"] = mediaType
-                            version = self.getHighestMediaVersion(context)
-                            self.createVersion(
-                                entity=kwargs["entity"],
-                                identifier=kwargs["task"],
-                                identifierType=kwargs["mediaType"],
-                                version=version
-                            )
-
-                            if kwargs["mediaType"] == "3drenders":
-                                self.createAov(entity=kwargs["entity"], identifier=kwargs["task"], version=version, aov="rgb")
-
-                            result = self.ingestMedia(files, entity, identifier, version, aov, mediaType) or {}
-                            return {"result": result.get("result"), "versionAdded": True}
-
-                    self.copyMsg.show()
-                    if copyMsg.msg:
-                        b_cnl = copyMsg.msg.buttons()[0]
-                        b_cnl.setVisible(True)
-                        b_cnl.clicked.connect(self.onIngestCanceled)
-
-                    QApplication.processEvents()
-
-                targetPath = targetPath.replace("\\", "/")
-                copyThread = self.core.copyWithProgress(file, targetPath, popup=False, start=False)
-                self.ingestThreads.append(copyThread)
-                copyThread.finished.connect(lambda t=copyThread, tp=targetPath: self.onMediaFileIngested(t, tp, len(files)))
-                copyThread.start()
-
-            details = entity.copy()
-            details["identifier"] = identifier
-            details["user"] = kwargs["user"]
-            details["version"] = kwargs["version"]
-            details["comment"] = kwargs.get("comment", "")
-            details["extension"] = kwargs["extension"]
-            details["mediaType"] = kwargs["mediaType"]
-
-            infoPath = self.getMediaVersionInfoPathFromFilepath(targetPath, mediaType=mediaType)
-            self.core.saveVersionInfo(filepath=os.path.dirname(infoPath), details=details)
-            while (len(self.ingestedFiles) != len(files)) and not self.ingestCanceled:
-                time.sleep(0.1)
-                QApplication.processEvents()
-
+        transfers = []
+        for idx, file in enumerate(files):
+            kwargs["extension"] = os.path.splitext(file)[1]
+            if len(files) > 1:
+                kwargs["framePadding"] = ("%%0%sd" % self.core.framePadding) % (idx + 1)
+
+            if kwargs.get("mediaType") == "playblasts":
+                pbkwargs = kwargs.copy()
+                del pbkwargs["aov"]
+                del pbkwargs["mediaType"]
+                targetPath = self.generatePlayblastPath(**pbkwargs)
+            else:
+                targetPath = self.generateMediaProductPath(**kwargs)
+
+            if idx == 0:
+                createdFolder = self.core.transferQueue.getCreatedFolder(os.path.dirname(targetPath))
+                if not os.path.exists(os.path.dirname(targetPath)):
+                    try:
+                        os.makedirs(os.path.dirname(targetPath))
+                    except:
+                        msg = "The directory could not be created"
+                        self.core.popup(msg)
+                        return {"result": msg}
+
+                elif os.listdir(os.path.dirname(targetPath)):
+                    msg = "The targetfolder contains files already.\nContinuing may overwrite existing files."
+                    result = self.core.popupQuestion(msg, buttons=["Continue", "Add new version", "Cancel"], icon=QMessageBox.Warning)
+                    if result == "Cancel":
+                        return {"result": "canceled"}
+                    elif result == "Add new version":
+                        context = kwargs["entity"].copy()
+                        context["identifier"] = identifier
+                        context["mediaType"] = mediaType
+                        version = self.getHighestMediaVersion(context)
+                        versionPath = self.createVersion(
+                            entity=kwargs["entity"],
+                            identifier=kwargs["task"],
+                            identifierType=kwargs["mediaType"],
+                            version=version
+                        )
+
+                        if kwargs["mediaType"] == "3drenders":
+                            self.createAov(entity=kwargs["entity"], identifier=kwargs["task"], version=version, aov="rgb")
+
+                        result = self.ingestMedia(files, entity, identifier, version, aov, mediaType) or {}
+                        if result.get("result") == "canceled":
+                            self.core.transferQueue.removeEmptyFolders(versionPath)
+                            return {"result": "canceled", "versionAdded": False}
+
+                        return {"result": result.get("result"), "versionAdded": True}
+
+            targetPath = targetPath.replace("\\", "/")
+            transfers.append((file, targetPath))
+
+        batch = self.core.transferQueue.transfer(transfers, text="Copying file - please wait..")
+        if batch.isCanceled():
+            # the versioninfo gets written after the transfer, so a canceled ingest leaves no version behind
+            batch.rollback(createdFolder=createdFolder)
+            self.ingestedFiles = []
+            logger.debug("ingest canceled: %s" % os.path.dirname(targetPath))
+            return {"result": "canceled", "versionAdded": False}
+
+        self.ingestedFiles = batch.getTransferredFiles()
+        for ingestedFile in self.ingestedFiles:
+            logger.debug("ingested media: %s" % ingestedFile)
+
+        details = entity.copy()
+        details["identifier"] = identifier
+        details["user"] = kwargs["user"]
+        details["version"] = kwargs["version"]
+        details["comment"] = kwargs.get("comment", "")
+        details["extension"] = kwargs["extension"]
+        details["mediaType"] = kwargs["mediaType"]
+
+        infoPath = self.getMediaVersionInfoPathFromFilepath(targetPath, mediaType=mediaType)
+        self.core.saveVersionInfo(filepath=os.path.dirname(infoPath), details=details)
+        self.core.paths.notifyPathChanged(os.path.dirname(targetPath))
         return {"result": self.ingestedFiles, "versionAdded": False}
 
-    @err_catcher(name=__name__)
-    def onMediaFileIngested(self, thread, targetPath, numFiles):
-        self.ingestedFiles.append(targetPath)
-        logger.debug("ingested media: %s" % targetPath)
-        baseTxt = "Copying file - please wait..\n\n"
-        updatedText = baseTxt + "%s/%s" % (len(self.ingestedFiles), numFiles)
-        self.copyMsg.text = updatedText
-        if self.copyMsg.msg:
-            self.copyMsg.msg.setText(updatedText)
-            QApplication.processEvents()
-
-        if len(self.ingestedFiles) == numFiles:
-            self.copyMsg.close()
-
-    @err_catcher(name=__name__)
-    def onIngestCanceled(self):
-        self.ingestCanceled = True
-        for thread in self.ingestThreads:
-            if thread.isRunning():
-                thread.cancel()
-
     @err_catcher(name=__name__)
     def checkMasterVersions(self, entities, parent=None):
         self.dlg_masterManager = self.core.paths.masterManager(self.core, entities, "media", parent=parent)
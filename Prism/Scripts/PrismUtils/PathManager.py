@@ -34,6 +34,11 @@
 
 import os
 import re
+import glob
+import time
+import bisect
+import fnmatch
+import threading
 from collections import OrderedDict
 
 from qtpy.QtCore import *
@@ -48,6 +53,16 @@ class PathManager(object):
         super(PathManager, self).__init__()
         self.core = core
         self.masterManager = MasterManager
+        self.directoryIndex = OrderedDict()
+        # sorted keys of the index to find cached subfolders without scanning all keys
+        self.directoryIndexKeys = []
+        self.directoryIndexLock = threading.Lock()
+        self.useDirectoryIndex = os.getenv("PRISM_DIRECTORY_INDEX", "1") == "1"
+        self.directoryIndexTtl = float(os.getenv("PRISM_DIRECTORY_INDEX_TTL", "3"))
+        self.directoryIndexSize = int(os.getenv("PRISM_DIRECTORY_INDEX_SIZE", "20000"))
+        # listings which were scanned less than this amount of seconds after the
+        # last modification of the directory can't be validated by mtime reliably
+        self.directoryIndexRacyInterval = 2
 
     @err_catcher(name=__name__)
     def getCompositingOut(
@@ -290,7 +305,7 @@ class PathManager(object):
             if cacheDate and cacheDate != mdate:
                 self.core.configs.clearCache(path=cacheConfig)
 
-        cacheData = self.core.getConfig(configPath=cacheConfig, allowCache=allowCache) or {}
+        cacheData = self.core.getConfig(configPath=cacheConfig, allowCache=allowCache, readOnly=True) or {}
         cacheData = cacheData.copy()
         if addPathData:
             if os.path.splitext(cachePath)[1]:
@@ -632,6 +647,172 @@ class PathManager(object):
         else:
             return os.path.splitext(path)
 
+    @err_catcher(name=__name__)
+    def getDirectoryIndexKey(self, path):
+        return os.path.normcase(os.path.normpath(path))
+
+    @err_catcher(name=__name__)
+    def getDirectoryEntries(self, path):
+        # returns a list of (name, isDir) tuples or None if the directory doesn't exist
+        if not self.useDirectoryIndex:
+            return self.scanDirectory(path)
+
+        key = self.getDirectoryIndexKey(path)
+        now = time.time()
+        with self.directoryIndexLock:
+            cached = self.directoryIndex.pop(key, None)
+            if cached:
+                self.directoryIndex[key] = cached
+
+        if cached and (now - cached["checked"]) < self.directoryIndexTtl:
+            return cached["entries"]
+
+        try:
+            mtime = os.stat(path).st_mtime
+        except Exception:
+            with self.directoryIndexLock:
+                self.removeDirectoryIndexKey(key)
+
+            return
+
+        if (
+            cached
+            and cached["mtime"] == mtime
+            and (cached["scanned"] - mtime) > self.directoryIndexRacyInterval
+        ):
+            cached["checked"] = now
+            return cached["entries"]
+
+        entries = self.scanDirectory(path)
+        if entries is None:
+            return
+
+        data = {"entries": entries, "mtime": mtime, "scanned": now, "checked": now}
+        with self.directoryIndexLock:
+            if key not in self.directoryIndex:
+                bisect.insort(self.directoryIndexKeys, key)
+
+            self.directoryIndex[key] = data
+            while len(self.directoryIndex) > self.directoryIndexSize:
+                self.removeDirectoryIndexKey(next(iter(self.directoryIndex)))
+
+        return entries
+
+    @err_catcher(name=__name__)
+    def scanDirectory(self, path):
+        entries = []
+        try:
+            for entry in os.scandir(path):
+                try:
+                    isDir = entry.is_dir()
+                except OSError:
+                    isDir = False
+
+                entries.append((entry.name, isDir))
+        except Exception:
+            return
+
+        return entries
+
+    @err_catcher(name=__name__)
+    def removeDirectoryIndexKey(self, key):
+        # has to be called while holding the directoryIndexLock
+        if self.directoryIndex.pop(key, None) is None:
+            return
+
+        idx = bisect.bisect_left(self.directoryIndexKeys, key)
+        if idx < len(self.directoryIndexKeys) and self.directoryIndexKeys[idx] == key:
+            del self.directoryIndexKeys[idx]
+
+    @err_catcher(name=__name__)
+    def invalidateDirectoryIndex(self, path=None):
+        # removes the cached listings of the path, its subfolders, its parent folder and all
+        # further parent folders, which don't list their child yet, e.g. after os.makedirs
+        with self.directoryIndexLock:
+            if not path:
+                self.directoryIndex.clear()
+                self.directoryIndexKeys = []
+                return
+
+            key = self.getDirectoryIndexKey(path)
+            self.removeDirectoryIndexKey(key)
+            child = key
+            parent = os.path.dirname(key)
+            while parent != child:
+                cached = self.directoryIndex.get(parent)
+                if cached and child != key:
+                    names = [os.path.normcase(entry[0]) for entry in cached["entries"]]
+                    if os.path.basename(child) in names:
+                        break
+
+                self.removeDirectoryIndexKey(parent)
+                child = parent
+                parent = os.path.dirname(parent)
+
+            prefix = key if key.endswith(os.sep) else key + os.sep
+            start = bisect.bisect_left(self.directoryIndexKeys, prefix)
+            end = start
+            keys = self.directoryIndexKeys
+            while end < len(keys) and keys[end].startswith(prefix):
+                self.directoryIndex.pop(keys[end], None)
+                end += 1
+
+            del self.directoryIndexKeys[start:end]
+
+    @err_catcher(name=__name__)
+    def notifyPathChanged(self, path):
+        # called after Prism created, renamed or removed files or folders
+        self.invalidateDirectoryIndex(path)
+        self.core.catalog.refreshPath(path)
+        self.core.entities.invalidateScenefileVersionIndex(path)
+        self.core.products.invalidateLatestVersionCache(path)
+
+    @err_catcher(name=__name__)
+    def globPaths(self, pattern):
+        # same as glob.glob, but uses the cached directory listings
+        pattern = os.path.normpath(pattern)
+        if not self.useDirectoryIndex or not os.path.isabs(pattern):
+            return glob.glob(pattern)
+
+        drive, tail = os.path.splitdrive(pattern)
+        parts = [part for part in tail.split(os.sep) if part]
+        base = drive + os.sep
+        while parts and not glob.has_magic(parts[0]):
+            base = os.path.join(base, parts.pop(0))
+
+        if not parts:
+            return [pattern] if os.path.lexists(pattern) else []
+
+        paths = [base]
+        for idx, part in enumerate(parts):
+            isLast = idx == (len(parts) - 1)
+            newPaths = []
+            for path in paths:
+                entries = self.getDirectoryEntries(path)
+                if not entries:
+                    continue
+
+                if not isLast:
+                    entries = [entry for entry in entries if entry[1]]
+
+                names = [entry[0] for entry in entries]
+                if glob.has_magic(part):
+                    if not part.startswith("."):
+                        names = [name for name in names if not name.startswith(".")]
+
+                    matches = fnmatch.filter(names, part)
+                else:
+                    normPart = os.path.normcase(part)
+                    matches = [part] if [name for name in names if os.path.normcase(name) == normPart] else []
+
+                newPaths += [os.path.join(path, match) for match in matches]
+
+            paths = newPaths
+            if not paths:
+                break
+
+        return paths
+
     @err_catcher(name=__name__)
     def getEntityTypeFromPath(self, path, projectPath=None):
         globalPath = self.core.convertPath(path, "global")
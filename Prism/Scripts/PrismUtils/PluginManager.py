@@ -34,11 +34,16 @@
 
 import os
 import sys
+import ast
+import time
 import shutil
+import hashlib
 import platform
 import logging
 import traceback
 
+from collections import OrderedDict
+
 from qtpy.QtCore import *
 from qtpy.QtGui import *
 from qtpy.QtWidgets import *
@@ -54,6 +59,12 @@ class PluginManager(object):
         self.core = core
         self.monkeyPatchedFunctions = {}
         self.ignoreAutoLoadPlugins = [name.strip() for name in os.getenv("PRISM_IGNORE_AUTOLOAD_PLUGINS", "").split(",")]
+        self.useManifests = os.getenv("PRISM_PLUGIN_MANIFESTS", "1") == "1"
+        self.manifestVersion = 1
+        self.manifestRacyInterval = 2
+        self.manifestKeys = ["version", "pluginType", "appShortName", "sceneFormats"]
+        self.pluginManifests = {}
+        self.manifestEntries = {}
 
     @err_catcher(name=__name__)
     def initializePlugins(self, appPlugin):
@@ -74,9 +85,11 @@ class PluginManager(object):
             self.core.popup(msg)
             return
 
-        appPlug = self.loadAppPlugin(
-            appPlugs[0]["name"], pluginPath=appPlugs[0]["path"], startup=True
-        )
+        with self.core.profiler.measure("plugins", appPlugs[0]["name"]):
+            appPlug = self.loadAppPlugin(
+                appPlugs[0]["name"], pluginPath=appPlugs[0]["path"], startup=True
+            )
+
         if not appPlug:
             msg = "App plugin %s couldn't be loaded." % appPlugs[0]["name"]
             self.core.popup(msg)
@@ -88,7 +101,9 @@ class PluginManager(object):
             force=False,
             ignore=[appPlugs[0]["name"]],
         )
-        self.core.callback("onPluginsLoaded")
+        with self.core.profiler.measure("startup", "onPluginsLoaded"):
+            self.core.callback("onPluginsLoaded")
+
         if self.core.splashScreen:
             self.core.splashScreen.setStatus("plugins loaded...")
 
@@ -332,6 +347,11 @@ class PluginManager(object):
                     continue
 
                 if recursive:
+                    if self.useManifests:
+                        manifest = self.getPluginManifest(dr)
+                        foundPluginPaths += [plugin["path"] for plugin in manifest["plugins"]]
+                        continue
+
                     for root, dirs, files in os.walk(dr):
                         for f in files:
                             if f.endswith("_init.py"):
@@ -339,20 +359,26 @@ class PluginManager(object):
                                 foundPluginPaths.append(path)
                                 break
                 else:
-                    for root, dirs, files in os.walk(dr):
-                        for pDir in dirs:
-                            if pDir == "PluginEmpty":
-                                continue
+                    if self.useManifests:
+                        pDirs = self.getPluginManifest(dr)["folders"]
+                    else:
+                        pDirs = []
+                        for root, dirs, files in os.walk(dr):
+                            pDirs = dirs
+                            break
+
+                    for pDir in pDirs:
+                        if pDir == "PluginEmpty":
+                            continue
 
-                            if pDir == self.core.appPlugin.pluginName:
-                                continue
+                        if pDir == self.core.appPlugin.pluginName:
+                            continue
 
-                            if pDir.startswith(".") or pDir.startswith("_"):
-                                continue
+                        if pDir.startswith(".") or pDir.startswith("_"):
+                            continue
 
-                            path = os.path.join(dr, pDir)
-                            foundPluginPaths.append(path)
-                        break
+                        path = os.path.join(dr, pDir)
+                        foundPluginPaths.append(path)
 
         for pluginPath in foundPluginPaths:
             if pluginPath.endswith(".py"):
@@ -371,7 +397,8 @@ class PluginManager(object):
                 if self.isPluginLoaded(pluginName):
                     continue
 
-            result.append(self.loadPlugin(pluginPath, force=force))
+            with self.core.profiler.measure("plugins", self.getPluginNameFromPath(pluginPath)):
+                result.append(self.loadPlugin(pluginPath, force=force))
 
         return result
 
@@ -406,6 +433,16 @@ class PluginManager(object):
             if not os.path.exists(dr):
                 continue
 
+            if recursive and self.useManifests:
+                for plugin in self.getPluginManifest(dr)["plugins"]:
+                    if pluginNames and plugin["name"] not in pluginNames:
+                        continue
+
+                    pData = {"name": plugin["name"], "path": plugin["path"]}
+                    result.append(pData)
+
+                continue
+
             for root, dirs, files in os.walk(dr):
                 if "Scripts" in dirs:
                     dirs[:] = ["Scripts"]
@@ -431,6 +468,231 @@ class PluginManager(object):
 
         return result
 
+    @err_catcher(name=__name__)
+    def getPluginManifestFolder(self):
+        return os.path.join(os.path.dirname(self.core.userini), "PluginManifests")
+
+    @err_catcher(name=__name__)
+    def getPluginManifestKey(self, path):
+        if os.path.basename(path) == "Scripts":
+            path = os.path.dirname(path)
+
+        return os.path.normcase(os.path.normpath(path))
+
+    @err_catcher(name=__name__)
+    def getPluginManifestPath(self, searchPath):
+        key = hashlib.sha1(self.getPluginManifestKey(searchPath).encode("utf-8")).hexdigest()
+        return os.path.join(self.getPluginManifestFolder(), key + ".json")
+
+    @err_catcher(name=__name__)
+    def getPathMtime(self, path):
+        try:
+            return os.stat(path).st_mtime
+        except Exception:
+            return
+
+    @err_catcher(name=__name__)
+    def readPluginVariables(self, path):
+        # reads the literal metadata from the variables script of a plugin without importing it
+        pluginName = os.path.basename(path)
+        varPath = os.path.join(path, "Scripts", "Prism_%s_Variables.py" % pluginName)
+        data = {}
+        try:
+            with open(varPath, "r") as f:
+                tree = ast.parse(f.read())
+        except Exception:
+            return data
+
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Assign) or len(node.targets) != 1:
+                continue
+
+            target = node.targets[0]
+            if not isinstance(target, ast.Attribute) or not isinstance(target.value, ast.Name):
+                continue
+
+            if target.value.id != "self" or target.attr not in self.manifestKeys or target.attr in data:
+                continue
+
+            try:
+                data[target.attr] = ast.literal_eval(node.value)
+            except Exception:
+                continue
+
+        return data
+
+    @err_catcher(name=__name__)
+    def scanPluginSearchPath(self, searchPath):
+        # walks a plugin search path the same way as searchPlugins and records the mtimes
+        # of all folders, which would contain a new plugin, when one gets added
+        manifest = {
+            "manifestVersion": self.manifestVersion,
+            "searchPath": searchPath,
+            "dirs": {},
+            "folders": [],
+            "plugins": [],
+        }
+        notAutoLoadedPlugins = self.getNotAutoLoadPlugins()
+        for root, dirs, files in os.walk(searchPath):
+            if root == searchPath:
+                manifest["folders"] = sorted(dirs)
+
+            if "Scripts" in dirs:
+                if root == searchPath:
+                    manifest["dirs"][root] = self.getPathMtime(root)
+
+                dirs[:] = ["Scripts"]
+                continue
+
+            dirs[:] = [d for d in dirs if d[0] not in [".", "_"]]
+            for f in files:
+                if not f.endswith("_init.py"):
+                    continue
+
+                dirs[:] = []
+                path = os.path.dirname(root)
+                entry = {
+                    "name": os.path.basename(path),
+                    "path": path,
+                    "mtime": self.getPathMtime(root),
+                    "autoload": os.path.basename(path) not in notAutoLoadedPlugins,
+                }
+                entry.update(self.readPluginVariables(path))
+                manifest["plugins"].append(entry)
+                break
+            else:
+                manifest["dirs"][root] = self.getPathMtime(root)
+
+        return manifest
+
+    @err_catcher(name=__name__)
+    def isPluginManifestValid(self, manifest):
+        if manifest.get("manifestVersion") != self.manifestVersion:
+            return False
+
+        for path, mtime in manifest["dirs"].items():
+            if self.getPathMtime(path) != mtime:
+                return False
+
+        return True
+
+    @err_catcher(name=__name__)
+    def isPluginManifestRacy(self, manifest):
+        # folders modified within the racy interval could still change without a new mtime
+        limit = time.time() - self.manifestRacyInterval
+        mtimes = list(manifest["dirs"].values()) + [plugin["mtime"] for plugin in manifest["plugins"]]
+        return any(mtime is None or mtime > limit for mtime in mtimes)
+
+    @err_catcher(name=__name__)
+    def getPluginManifest(self, searchPath, refresh=False):
+        # returns the plugins in a search path from the manifest in the user preferences,
+        # which only needs a stat of the search path to be validated
+        key = self.getPluginManifestKey(searchPath)
+        manifest = self.pluginManifests.get(key)
+        manifestPath = self.getPluginManifestPath(searchPath)
+        if not refresh:
+            if manifest and self.isPluginManifestValid(manifest):
+                return manifest
+
+            if not manifest and os.path.exists(manifestPath):
+                manifest = self.core.configs.readJson(path=manifestPath, ignoreErrors=True)
+                if manifest and self.isPluginManifestValid(manifest):
+                    self.setPluginManifest(key, manifest)
+                    return manifest
+
+        manifest = self.scanPluginSearchPath(searchPath)
+        if not self.isPluginManifestRacy(manifest):
+            self.setPluginManifest(key, manifest)
+            self.core.configs.writeJson(manifest, path=manifestPath, quiet=True)
+
+        return manifest
+
+    @err_catcher(name=__name__)
+    def setPluginManifest(self, key, manifest):
+        notAutoLoadedPlugins = self.getNotAutoLoadPlugins()
+        self.pluginManifests[key] = manifest
+        for plugin in manifest["plugins"]:
+            plugin["autoload"] = plugin["name"] not in notAutoLoadedPlugins
+            self.manifestEntries[self.getPluginManifestKey(plugin["path"])] = plugin
+
+    @err_catcher(name=__name__)
+    def getPluginManifestEntry(self, path):
+        entry = self.manifestEntries.get(self.getPluginManifestKey(path))
+        if not entry:
+            return
+
+        scriptPath = os.path.join(entry["path"], "Scripts")
+        mtime = self.getPathMtime(scriptPath)
+        if mtime != entry["mtime"]:
+            for key in self.manifestKeys:
+                entry.pop(key, None)
+
+            entry.update(self.readPluginVariables(entry["path"]))
+            entry["mtime"] = mtime
+
+        return entry
+
+    @err_catcher(name=__name__)
+    def getUnloadedPluginFromManifest(self, pluginName, path, location):
+        # non-autoloaded plugins get their metadata from the manifest instead of importing them
+        plugin = UnloadedPlugin(self.core, pluginName, path=path, location=location)
+        entry = self.getPluginManifestEntry(path) or {}
+        plugin.version = entry.get("version", plugin.version)
+        plugin.pluginType = entry.get("pluginType", plugin.pluginType)
+        plugin.appShortName = entry.get("appShortName", plugin.appShortName)
+        plugin.sceneFormats = entry.get("sceneFormats", [])
+        return plugin
+
+    @err_catcher(name=__name__)
+    def clearPluginManifests(self, searchPaths=None, deleteFiles=False):
+        if deleteFiles:
+            if searchPaths is None:
+                searchPaths = [manifest["searchPath"] for manifest in self.pluginManifests.values()]
+
+            for searchPath in searchPaths:
+                manifestPath = self.getPluginManifestPath(searchPath)
+                if os.path.exists(manifestPath):
+                    try:
+                        os.remove(manifestPath)
+                    except Exception:
+                        logger.debug("failed to remove plugin manifest: %s" % manifestPath)
+
+        self.pluginManifests = {}
+        self.manifestEntries = {}
+
+    @err_catcher(name=__name__)
+    def benchmarkPluginLoading(self, directories=None, iterations=5):
+        # returns the milliseconds per plugin discovery without manifests, with a cold manifest,
+        # with the manifest read from disk and with the manifest in memory
+        if directories is None:
+            directories = self.getPluginDirs()["searchPaths"]
+
+        directories = [dr for dr in directories if os.path.exists(dr)]
+        benchmarks = OrderedDict([
+            ("walk", (False, lambda: None)),
+            ("cold", (True, lambda: self.clearPluginManifests(searchPaths=directories, deleteFiles=True))),
+            ("warm (disk)", (True, self.clearPluginManifests)),
+            ("warm (memory)", (True, lambda: None)),
+        ])
+        useManifests = self.useManifests
+        results = OrderedDict([])
+        try:
+            for name, benchmark in benchmarks.items():
+                self.useManifests, setup = benchmark
+                duration = 0
+                for idx in range(iterations):
+                    setup()
+                    start = time.time()
+                    plugins = self.searchPlugins(directories=directories[:])
+                    duration += time.time() - start
+
+                results[name] = (duration / iterations) * 1000
+                logger.info("%s: %.2f ms for %s plugins" % (name, results[name], len(plugins)))
+        finally:
+            self.useManifests = useManifests
+
+        return results
+
     @err_catcher(name=__name__)
     def activatePlugin(self, path):
         if os.path.basename(path) == "Scripts":
@@ -547,7 +809,7 @@ class PluginManager(object):
                 if activate:
                     return self.activatePlugin(path)
 
-                self.core.unloadedPlugins[pluginName] = UnloadedPlugin(self.core, pluginName, path=pluginPath, location=location)
+                self.core.unloadedPlugins[pluginName] = self.getUnloadedPluginFromManifest(pluginName, pluginPath, location)
                 msg = "skipped loading plugin %s - autoload of this plugin is disabled in the preferences" % pluginName
                 if showWarnings:
                     self.core.popup(msg)
@@ -38,6 +38,7 @@ import shutil
 import platform
 import errno
 import copy
+import time
 
 from qtpy.QtCore import *
 from qtpy.QtGui import *
@@ -52,6 +53,14 @@ logger = logging.getLogger(__name__)
 class Products(object):
     def __init__(self, core):
         self.core = core
+        self.latestVersionCache = {}
+        # seconds in which cached latest versions are returned without checking the folders on disk
+        self.latestVersionCacheInterval = float(os.getenv("PRISM_LATEST_VERSION_CACHE_INTERVAL", "1"))
+        # folders modified less than this many seconds before they were checked get resolved again
+        self.latestVersionCacheRacyInterval = 2
+        self.preferredFileCache = {}
+        # number of versions, whose versioninfo files get read in parallel while looking for the latest version
+        self.latestVersionLookAhead = max(1, int(os.getenv("PRISM_LATEST_VERSION_LOOKAHEAD", "4")))
 
     @err_catcher(name=__name__)
     def getProductNamesFromEntity(self, entity, locations=None):
@@ -171,6 +180,7 @@ class Products(object):
             locPaths = {"_other": entity["project_path"]}
 
         versions = []
+        versionIndex = {}
         for loc in locPaths:
             context = entity.copy()
             if "version" in context:
@@ -187,13 +197,13 @@ class Products(object):
             locVersions = self.getVersionsFromContext(context, locations={loc: locPaths[loc]})
             for locVersion in locVersions:
                 locVersion["paths"] = [locVersion.get("path")]
-                for version in versions:
-                    if version.get("version") == locVersion.get("version") and version.get("wedge") == locVersion.get("wedge"):
-                        version["paths"].append(locVersion.get("path"))
-                        break
+                versionKey = (locVersion.get("version"), locVersion.get("wedge"))
+                version = versionIndex.get(versionKey)
+                if version:
+                    version["paths"].append(locVersion.get("path"))
                 else:
+                    versionIndex[versionKey] = locVersion
                     versions.append(locVersion)
-                    continue
 
         return versions
 
@@ -206,6 +216,22 @@ class Products(object):
         data = self.core.paths.getCachePathData(path)
         return data
 
+    @err_catcher(name=__name__)
+    def prefetchVersionInfos(self, versions):
+        infoPaths = []
+        for version in versions:
+            path = version.get("path")
+            if not path:
+                continue
+
+            path = os.path.normpath(path)
+            if os.path.splitext(path)[1]:
+                path = os.path.dirname(path)
+
+            infoPaths.append(self.core.getVersioninfoPath(path))
+
+        return self.core.configs.prefetchConfigs(infoPaths)
+
     @err_catcher(name=__name__)
     def getVersionsFromPath(self, path):
         entityType = self.core.paths.getEntityTypeFromPath(path)
@@ -231,6 +257,7 @@ class Products(object):
 
         key = "productVersions"
         versions = []
+        versionIndex = {}
         for loc in searchLocations:
             ctx = context.copy()
             if loc != "_other":
@@ -243,6 +270,42 @@ class Products(object):
             for template in templates:
                 versionData += self.core.projects.getMatchingPaths(template)
 
+            self.mergeVersionData(versions, versionIndex, ctx, loc, versionData)
+
+        return versions
+
+    @err_catcher(name=__name__)
+    def mergeVersionData(self, versions, versionIndex, context, location, versionData):
+        # versionIndex maps (version, wedge) to the records in versions, so matches of the same version in multiple locations get merged
+        baseContext = copy.deepcopy(context)
+        for data in versionData:
+            c = baseContext.copy()
+            c.update(data)
+            intVersion = self.getIntVersionFromVersionName(c["version"])
+            if intVersion is None and c["version"] != "master":
+                continue
+
+            c["intVersion"] = intVersion
+            c["locations"] = {location: data.get("path", "")}
+            c["paths"] = [data.get("path")]
+            if c["version"] and "_" in c["version"] and c["version"].count("_") == 1:
+                c["version"], c["wedge"] = c["version"].split("_")
+
+            versionKey = (c.get("version"), c.get("wedge"))
+            version = versionIndex.get(versionKey)
+            if version:
+                version["paths"].append(c.get("path"))
+                version["locations"].update(c["locations"])
+            else:
+                versionIndex[versionKey] = c
+                versions.append(c)
+
+        return versions
+
+    @err_catcher(name=__name__)
+    def benchmarkVersionMerge(self, numVersions=1000, numLocations=3, repeats=3):
+        # compares the merge of getVersionsFromContext against the previous linear scan on synthetic data
+        def mergeLegacy(versions, ctx, loc, versionData):
             for data in versionData:
                 c = copy.deepcopy(ctx)
                 c.update(data)
@@ -262,9 +325,42 @@ class Products(object):
                         break
                 else:
                     versions.append(c)
-                    continue
 
-        return versions
+        context = {
+            "type": "asset",
+            "asset_path": "Characters/Hero",
+            "product": "geo",
+            "locations": {"global": "/project"},
+        }
+        locationData = []
+        for locIdx in range(numLocations):
+            loc = "location%s" % locIdx
+            ctx = context.copy()
+            ctx["project_path"] = "/project_%s" % locIdx
+            versionData = []
+            for idx in range(numVersions):
+                version = "v%04d" % (idx + 1)
+                path = "%s/Assets/Characters/Hero/Export/geo/%s" % (ctx["project_path"], version)
+                versionData.append({"version": version, "path": path})
+
+            locationData.append([loc, ctx, versionData])
+
+        results = {}
+        for name in ["legacy", "indexed"]:
+            start = time.time()
+            for idx in range(repeats):
+                versions = []
+                versionIndex = {}
+                for loc, ctx, versionData in locationData:
+                    if name == "legacy":
+                        mergeLegacy(versions, ctx, loc, versionData)
+                    else:
+                        self.mergeVersionData(versions, versionIndex, ctx, loc, versionData)
+
+            results[name] = (time.time() - start) / repeats
+            logger.info("%s version merge: %.4f s for %s versions in %s locations" % (name, results[name], numVersions, numLocations))
+
+        return results
 
     @err_catcher(name=__name__)
     def getVersionFromFilepath(self, path, num=False):
@@ -384,19 +480,18 @@ class Products(object):
         if not self.getUseMaster():
             includeMaster = False
 
-        sortedVersions = sorted(
-            versions,
-            key=lambda x: x["version"] if x["version"] != "master" else "zzz",
-            reverse=True,
-        )
+        candidates = [
+            version for version in versions
+            if version["version"] is not None and (includeMaster or version["version"] != "master")
+        ]
+        sortedVersions = sorted(candidates, key=self.getVersionSortKey, reverse=True)
 
         highestVersion = None
-        for version in sortedVersions:
-            if not includeMaster and version["version"] == "master":
-                continue
-
-            if version["version"] is None:
-                continue
+        for idx, version in enumerate(sortedVersions):
+            if idx and (idx - 1) % self.latestVersionLookAhead == 0:
+                # usually the highest version is valid. if it isn't, the versioninfo files of the
+                # next versions get read in parallel before they get checked one after another
+                self.prefetchVersionInfos(sortedVersions[idx:idx + self.latestVersionLookAhead])
 
             if not self.getPreferredFileFromVersion(version):
                 continue
@@ -413,36 +508,196 @@ class Products(object):
             highestVersion = version
 
     @err_catcher(name=__name__)
-    def getLatestVersionFromPath(self, path, includeMaster=True):
+    def getVersionSortKey(self, version):
+        # master is always the highest version. other versions are ordered by their number
+        if version["version"] == "master":
+            return (1, 0, "")
+
+        intVersion = version.get("intVersion")
+        if intVersion is None:
+            intVersion = self.getIntVersionFromVersionName(version["version"])
+
+        return (0, intVersion if intVersion is not None else -1, version["version"])
+
+    @err_catcher(name=__name__)
+    def getLatestVersionFromPath(self, path, includeMaster=True, useCache=False):
         if not path:
             return {}
 
         latestVersion = None
         path = os.path.normpath(path)
+        if useCache:
+            key = ("path", path, includeMaster, self.getUseMaster())
+            entry = self.getCachedLatestVersion(key)
+            if entry:
+                return copy.deepcopy(entry["result"])
+
+            scanned = time.time()
+
         versions = self.getVersionsFromSameVersionStack(path)
         latestVersion = self.getLatestVersionFromVersions(
             versions, includeMaster=includeMaster
         )
+        if useCache:
+            context = self.getVersionStackContextFromPath(path)
+            dirs = self.getProductDirsFromContext(context) + self.getCandidateVersionDirs(versions, latestVersion)
+            self.setCachedLatestVersion(key, copy.deepcopy(latestVersion), dirs, scanned)
+
         return latestVersion
 
     @err_catcher(name=__name__)
-    def getLatestVersionpathFromProduct(self, product, entity=None, includeMaster=True, wedge=None, locations=None):
+    def getLatestVersionpathFromProduct(self, product, entity=None, includeMaster=True, wedge=None, locations=None, useCache=False):
+        # useCache returns the last result until one of the product or candidate version folders
+        # changes or Prism notifies about a change in them. used by expressions, which get evaluated often
         if not entity:
             fname = self.core.getCurrentFileName()
             entity = self.core.getScenefileData(fname)
             if entity.get("type") not in ["asset", "shot"]:
                 return
 
+        if useCache:
+            key = (
+                "product",
+                self.getEntityCacheKey(entity),
+                product,
+                wedge,
+                includeMaster,
+                str(locations),
+                self.getUseMaster(),
+            )
+            entry = self.getCachedLatestVersion(key)
+            if entry:
+                return entry["result"]
+
+            scanned = time.time()
+
         versions = self.getVersionsFromProduct(entity, product, locations=locations)
         version = self.getLatestVersionFromVersions(
             versions, includeMaster=includeMaster, wedge=wedge
         )
         if not version:
-            return
+            filepath = None
+        else:
+            filepath = self.getPreferredFileFromVersion(version)
+
+        if useCache:
+            context = entity.copy()
+            context["product"] = product
+            dirs = self.getProductDirsFromContext(context, locations=locations) + self.getCandidateVersionDirs(versions, version)
+            self.setCachedLatestVersion(key, filepath, dirs, scanned)
 
-        filepath = self.getPreferredFileFromVersion(version)
         return filepath
 
+    @err_catcher(name=__name__)
+    def getEntityCacheKey(self, entity):
+        ignore = ["version", "comment", "user", "paths", "path", "locations"]
+        items = []
+        for key, value in entity.items():
+            if key in ignore or isinstance(value, (dict, list)):
+                continue
+
+            items.append((key, str(value)))
+
+        return tuple(sorted(items))
+
+    @err_catcher(name=__name__)
+    def getProductDirsFromContext(self, context, locations=None):
+        if locations == "project_path":
+            locPaths = {"_other": context["project_path"]}
+        else:
+            locPaths = self.core.paths.getExportProductBasePaths()
+
+        dirs = []
+        for loc in locPaths:
+            ctx = context.copy()
+            for key in ["version", "comment", "user", "paths", "path"]:
+                if key in ctx:
+                    del ctx[key]
+
+            ctx["project_path"] = locPaths[loc]
+            dirs += self.core.projects.getResolvedProjectStructurePaths("products", context=ctx) or []
+
+        return dirs
+
+    @err_catcher(name=__name__)
+    def getCandidateVersionDirs(self, versions, latestVersion):
+        # the folders of all versions, which are at least as high as the latest version.
+        # files getting added to them can change the result without changing the product folder
+        if latestVersion and latestVersion.get("version") == "master":
+            candidates = [version for version in versions if version.get("version") == "master"]
+        elif latestVersion:
+            minVersion = latestVersion.get("intVersion") or 0
+            candidates = [
+                version for version in versions
+                if version.get("version") == "master" or (version.get("intVersion") or 0) >= minVersion
+            ]
+        else:
+            candidates = versions
+
+        dirs = []
+        for version in candidates:
+            dirs += [path for path in version.get("paths", [version.get("path")]) if path]
+
+        return dirs
+
+    def getDirMtime(self, path):
+        try:
+            return os.stat(path).st_mtime
+        except Exception:
+            return
+
+    @err_catcher(name=__name__)
+    def getCachedLatestVersion(self, key):
+        entry = self.latestVersionCache.get(key)
+        if not entry:
+            return
+
+        now = time.time()
+        if (now - entry["validated"]) < self.latestVersionCacheInterval:
+            return entry
+
+        for path, mtime in entry["dirs"].items():
+            curMtime = self.getDirMtime(path)
+            if curMtime != mtime or (
+                curMtime is not None and (entry["scanned"] - curMtime) < self.latestVersionCacheRacyInterval
+            ):
+                del self.latestVersionCache[key]
+                return
+
+        entry["validated"] = now
+        return entry
+
+    @err_catcher(name=__name__)
+    def setCachedLatestVersion(self, key, result, dirs, scanned):
+        dirMtimes = {}
+        for path in dirs:
+            path = os.path.normpath(path)
+            dirMtimes[path] = self.getDirMtime(path)
+
+        self.latestVersionCache[key] = {
+            "result": result,
+            "dirs": dirMtimes,
+            "scanned": scanned,
+            "validated": scanned,
+        }
+
+    @err_catcher(name=__name__)
+    def invalidateLatestVersionCache(self, path=None):
+        if not path:
+            self.latestVersionCache = {}
+            return
+
+        path = os.path.normpath(path)
+        for key, entry in list(self.latestVersionCache.items()):
+            for cachedPath in entry["dirs"]:
+                if (
+                    cachedPath == path
+                    or cachedPath.startswith(path + os.sep)
+                    or path.startswith(cachedPath + os.sep)
+                ):
+                    self.latestVersionCache.pop(key, None)
+                    break
+
     @err_catcher(name=__name__)
     def getVersionInfoFromVersion(self, version):
         if "path" not in version:
@@ -454,6 +709,36 @@ class Products(object):
 
     @err_catcher(name=__name__)
     def getPreferredFileFromVersion(self, version, location=None):
+        # results are cached until the version folder or its versioninfo file changes
+        if not version:
+            return ""
+
+        if not version.get("path"):
+            return self.resolvePreferredFileFromVersion(version, location=location)
+
+        path = os.path.normpath(version["path"])
+        key = (path, version.get("product"), version.get("wedge"), version.get("type"), location)
+        infoPath = self.core.getVersioninfoPath(path)
+        signature = (self.getDirMtime(path), self.getDirMtime(infoPath))
+        cached = self.preferredFileCache.get(key)
+        if (
+            cached
+            and cached["signature"] == signature
+            and (cached["resolved"] - (signature[0] or 0)) > self.latestVersionCacheRacyInterval
+        ):
+            return cached["result"]
+
+        resolved = time.time()
+        result = self.resolvePreferredFileFromVersion(version, location=location)
+        if signature[0] is not None:
+            self.preferredFileCache[key] = {"signature": signature, "resolved": resolved, "result": result}
+            if len(self.preferredFileCache) > 10000:
+                self.preferredFileCache = {key: self.preferredFileCache[key]}
+
+        return result
+
+    @err_catcher(name=__name__)
+    def resolvePreferredFileFromVersion(self, version, location=None):
         if not version:
             return ""
 
@@ -741,6 +1026,7 @@ class Products(object):
             return
 
         useHL = os.getenv("PRISM_USE_HARDLINK_MASTER", None)
+        transfers = []
         for seqFile in seqFiles:
             if len(seqFiles) > 1:
                 extData = self.core.paths.splitext(seqFile)
@@ -759,7 +1045,10 @@ class Products(object):
             ):
                 self.core.createSymlink(masterPathPadded, seqFile)
             else:
-                shutil.copy2(seqFile, masterPathPadded)
+                transfers.append((seqFile, masterPathPadded))
+
+        if transfers:
+            self.core.transferQueue.transfer(transfers, popup=False, copyStat=True, raiseErrors=True)
 
         folderPath = self.getVersionInfoPathFromProductFilepath(path)
         infoPath = self.core.getVersioninfoPath(folderPath)
@@ -806,9 +1095,13 @@ class Products(object):
             if os.path.isdir(filepath):
                 self.core.copyfolder(filepath, fileTargetPath)
             else:
-                self.core.copyfile(filepath, fileTargetPath)
+                result = self.core.copyfile(filepath, fileTargetPath)
+                if not result:
+                    logger.warning("failed to copy file to master version: %s" % fileTargetPath)
+                    return
 
         self.core.configs.clearCache(path=masterInfoPath)
+        self.core.paths.notifyPathChanged(os.path.dirname(masterPath))
         self.core.callback(name="masterVersionUpdated", args=[masterPath])
         return masterPath
 
@@ -871,6 +1164,7 @@ class Products(object):
                 if allowRename:
                     renamed = self.renameMaster(masterFolder)
                     if renamed:
+                        self.core.paths.notifyPathChanged(masterFolder)
                         return True
 
                 logger.warning(e)
@@ -885,6 +1179,8 @@ class Products(object):
                 else:
                     return False
 
+            self.core.paths.notifyPathChanged(masterFolder)
+
         return True
 
     @err_catcher(name=__name__)
@@ -923,6 +1219,7 @@ class Products(object):
                 self.core.popup("The directory %s could not be created" % path)
                 return
             else:
+                self.core.paths.notifyPathChanged(path)
                 self.core.callback(
                     name="onProductCreated",
                     args=[self, path, context],
@@ -979,41 +1276,37 @@ class Products(object):
 
         kwargs["version"] = version
         prefFile = self.getPreferredFileFromFiles(files, relative=True)
-        createdFiles = []
         targetPath = self.generateProductPath(**kwargs)
         versionPath = os.path.dirname(targetPath)
+        createdFolder = self.core.transferQueue.getCreatedFolder(versionPath)
+        if not os.path.exists(versionPath):
+            try:
+                os.makedirs(versionPath)
+            except:
+                self.core.popup("The directory could not be created")
+                return
+
+        transfers = []
         for file in files:
             fileTargetPath = os.path.join(versionPath, os.path.basename(file))
-            if not os.path.exists(versionPath):
-                try:
-                    os.makedirs(versionPath)
-                except:
-                    self.core.popup("The directory could not be created")
-                    return
-
             fileTargetPath = fileTargetPath.replace("\\", "/")
-            self.copyThread = self.core.copyWithProgress(file, fileTargetPath, popup=False, start=False)
-
-            isFolder = os.path.isdir(file)
-            if isFolder:
-                msg = "Copying folder - please wait..\n\n\n"
-            else:
-                msg = "Copying file - please wait..\n\n\n"
-
-            self.copyMsg = self.core.waitPopup(self.core, msg)
+            transfers.append((file, fileTargetPath))
 
-            self.copyThread.updated.connect(lambda x: self.core.updateProgressPopup(x, self.copyMsg))
-            self.copyThread.finished.connect(self.copyMsg.close)
-            if self.copyMsg.msg:
-                b_cnl = self.copyMsg.msg.buttons()[0]
-                b_cnl.setVisible(True)
-                b_cnl.clicked.connect(self.copyThread.cancel)
+        if len(files) == 1 and os.path.isdir(files[0]):
+            msg = "Copying folder - please wait.."
+        else:
+            msg = "Copying file - please wait.."
 
-            self.copyThread.start()
-            self.copyMsg.exec_()
+        batch = self.core.transferQueue.transfer(transfers, text=msg)
+        if batch.isCanceled():
+            # a canceled ingest must not leave a version with only some of its files
+            batch.rollback(createdFolder=createdFolder)
+            logger.debug("ingest canceled: %s" % versionPath)
+            return {"result": "canceled", "createdFiles": [], "versionPath": None}
 
-            createdFiles.append(fileTargetPath)
-            logger.debug("ingested product: %s" % fileTargetPath)
+        createdFiles = batch.getTransferredFiles()
+        for createdFile in createdFiles:
+            logger.debug("ingested product: %s" % createdFile)
 
         details = entity.copy()
         details["product"] = product
@@ -1026,6 +1319,7 @@ class Products(object):
 
         infoPath = self.getVersionInfoPathFromProductFilepath(targetPath)
         self.core.saveVersionInfo(filepath=infoPath, details=details)
+        self.core.paths.notifyPathChanged(versionPath)
 
         return {"createdFiles": createdFiles, "versionPath": versionPath}
 
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+from PrismUtils.Decorators import err_catcher
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectCatalog(object):
+    def __init__(self, core):
+        self.core = core
+        self.connection = None
+        self.connectionPath = None
+        self.lock = threading.RLock()
+
+    @err_catcher(name=__name__)
+    def isEnabled(self):
+        env = os.getenv("PRISM_USE_PROJECT_CATALOG")
+        if env is not None:
+            return env.lower() in ["1", "true"] and bool(getattr(self.core, "projectPath", None))
+
+        if not getattr(self.core, "projectPath", None):
+            return False
+
+        enabled = self.core.getConfig("globals", "useProjectCatalog", config="project")
+        return bool(enabled)
+
+    @err_catcher(name=__name__)
+    def setEnabled(self, state):
+        self.core.setConfig("globals", "useProjectCatalog", val=state, config="project")
+
+    @err_catcher(name=__name__)
+    def getCatalogPath(self):
+        path = os.path.join(self.core.projects.getPipelineFolder(), "Catalog", "catalog.db")
+        return path
+
+    @err_catcher(name=__name__)
+    def getConnection(self):
+        path = self.getCatalogPath()
+        if self.connection and self.connectionPath == path:
+            return self.connection
+
+        self.close()
+        if not os.path.exists(os.path.dirname(path)):
+            try:
+                os.makedirs(os.path.dirname(path))
+            except Exception as e:
+                logger.warning("failed to create catalog folder: %s" % e)
+                return
+
+        try:
+            # WAL mode is not supported on network shares, so the default journal is used
+            connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS scopes (scope TEXT PRIMARY KEY, kind TEXT, prefix TEXT, updated REAL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries (scope TEXT, path TEXT, data TEXT, PRIMARY KEY (scope, path))"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_path ON entries (path)")
+            connection.commit()
+        except Exception as e:
+            logger.warning("failed to open project catalog %s: %s" % (path, e))
+            return
+
+        logger.debug("opened project catalog: %s" % path)
+        self.connection = connection
+        self.connectionPath = path
+        return self.connection
+
+    @err_catcher(name=__name__)
+    def close(self):
+        with self.lock:
+            if self.connection:
+                try:
+                    self.connection.close()
+                except Exception:
+                    pass
+
+            self.connection = None
+            self.connectionPath = None
+
+    @err_catcher(name=__name__)
+    def getPathKey(self, path):
+        return os.path.normcase(os.path.normpath(path))
+
+    @err_catcher(name=__name__)
+    def getPathDepth(self, path):
+        return len([piece for piece in os.path.normpath(path).split(os.sep) if piece])
+
+    @err_catcher(name=__name__)
+    def getEntries(self, scope):
+        with self.lock:
+            connection = self.getConnection()
+            if not connection:
+                return
+
+            try:
+                if not connection.execute("SELECT 1 FROM scopes WHERE scope=?", (scope,)).fetchone():
+                    return
+
+                rows = connection.execute(
+                    "SELECT data FROM entries WHERE scope=?", (scope,)
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning("failed to read from project catalog: %s" % e)
+                return
+
+        return [json.loads(row[0]) for row in rows]
+
+    @err_catcher(name=__name__)
+    def setEntries(self, scope, kind, prefix, entries):
+        with self.lock:
+            connection = self.getConnection()
+            if not connection:
+                return
+
+            try:
+                with connection:
+                    connection.execute("DELETE FROM entries WHERE scope=?", (scope,))
+                    connection.execute(
+                        "INSERT OR REPLACE INTO scopes VALUES (?, ?, ?, ?)",
+                        (scope, kind, self.getPathKey(prefix), time.time()),
+                    )
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                        [(scope, entry["path"], json.dumps(entry)) for entry in entries],
+                    )
+            except sqlite3.Error as e:
+                logger.warning("failed to write to project catalog: %s" % e)
+                return
+
+        return True
+
+    @err_catcher(name=__name__)
+    def getMatchingPaths(self, template):
+        return self.getEntries(template)
+
+    @err_catcher(name=__name__)
+    def setMatchingPaths(self, template, pathData):
+        prefix = template.split("@")[0]
+        return self.setEntries(template, "template", prefix, pathData)
+
+    @err_catcher(name=__name__)
+    def getAssetPaths(self, basePath):
+        entries = self.getEntries("assets:" + os.path.normpath(basePath))
+        if entries is None:
+            return
+
+        assets = [entry["path"] for entry in entries if entry["type"] == "asset"]
+        folders = [entry["path"] for entry in entries if entry["type"] == "folder"]
+        return assets, folders
+
+    @err_catcher(name=__name__)
+    def setAssetPaths(self, basePath, assets, folders):
+        basePath = os.path.normpath(basePath)
+        entries = [{"path": path, "type": "asset"} for path in assets]
+        entries += [{"path": path, "type": "folder"} for path in folders]
+        return self.setEntries("assets:" + basePath, "assets", basePath + os.sep, entries)
+
+    @err_catcher(name=__name__)
+    def refreshPath(self, path):
+        # updates the entries of a path, which was created, modified or removed by Prism
+        if not self.isEnabled():
+            return
+
+        path = os.path.normpath(path)
+        candidates = [path]
+        while os.path.dirname(candidates[-1]) != candidates[-1]:
+            candidates.append(os.path.dirname(candidates[-1]))
+
+        with self.lock:
+            connection = self.getConnection()
+            if not connection:
+                return
+
+            try:
+                if not os.path.exists(path):
+                    with connection:
+                        connection.execute(
+                            "DELETE FROM entries WHERE path=? OR substr(path, 1, ?) = ?",
+                            (path, len(path) + 1, path + os.sep),
+                        )
+
+                scopes = connection.execute(
+                    "SELECT scope, kind, prefix FROM scopes WHERE substr(?, 1, length(prefix)) = prefix",
+                    (self.getPathKey(path),),
+                ).fetchall()
+
+                upserts = []
+                removals = []
+                for scope, kind, prefix in scopes:
+                    if kind == "template":
+                        depth = self.getPathDepth(scope)
+                        for candidate in candidates:
+                            if self.getPathDepth(candidate) != depth:
+                                continue
+
+                            if not os.path.exists(candidate):
+                                continue
+
+                            data = self.core.projects.getPathDataFromTemplate(candidate, scope)
+                            if data:
+                                upserts.append((scope, candidate, json.dumps(data)))
+
+                    elif kind == "assets":
+                        assetUpserts, assetRemovals = self.getAssetUpdates(
+                            connection, scope, prefix, candidates
+                        )
+                        upserts += assetUpserts
+                        removals += assetRemovals
+
+                with connection:
+                    connection.executemany(
+                        "DELETE FROM entries WHERE scope=? AND path=?", removals
+                    )
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", upserts
+                    )
+            except sqlite3.Error as e:
+                logger.warning("failed to update project catalog: %s" % e)
+
+    @err_catcher(name=__name__)
+    def getAssetUpdates(self, connection, scope, prefix, candidates):
+        # folders are only listed if they don't contain other assets or folders
+        upserts = []
+        removals = []
+        paths = [
+            candidate for candidate in reversed(candidates)
+            if self.getPathKey(candidate).startswith(prefix) and os.path.exists(candidate)
+        ]
+        for idx, candidate in enumerate(paths):
+            pathType = self.core.entities.getTypeFromPath(candidate)
+            if pathType != "asset" and idx < (len(paths) - 1):
+                removals.append((scope, candidate))
+                continue
+
+            if pathType == "folder":
+                hasChildren = connection.execute(
+                    "SELECT 1 FROM entries WHERE scope=? AND substr(path, 1, ?) = ? LIMIT 1",
+                    (scope, len(candidate) + 1, candidate + os.sep),
+                ).fetchone()
+                if hasChildren:
+                    break
+
+            entry = {"path": candidate, "type": pathType}
+            upserts.append((scope, candidate, json.dumps(entry)))
+            break
+
+        return upserts, removals
+
+    @err_catcher(name=__name__)
+    def clear(self):
+        with self.lock:
+            connection = self.getConnection()
+            if not connection:
+                return
+
+            with connection:
+                connection.execute("DELETE FROM entries")
+                connection.execute("DELETE FROM scopes")
+
+    @err_catcher(name=__name__)
+    def reconcile(self):
+        # rebuilds all known entries from the filesystem
+        if not self.isEnabled():
+            return
+
+        with self.lock:
+            connection = self.getConnection()
+            if not connection:
+                return
+
+            scopes = connection.execute("SELECT scope, kind FROM scopes").fetchall()
+
+        logger.debug("reconciling project catalog: %s scopes" % len(scopes))
+        self.core.paths.invalidateDirectoryIndex()
+        self.clear()
+        for scope, kind in scopes:
+            if kind == "template":
+                self.core.projects.getMatchingPaths(scope)
+            elif kind == "assets":
+                self.core.entities.getAssetPaths(path=scope[len("assets:"):], returnFolders=True)
+
+        self.core.entities.getShots()
+        self.core.entities.getAssetPaths()
+        return True
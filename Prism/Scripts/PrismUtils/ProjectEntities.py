@@ -33,10 +33,13 @@
 
 
 import os
+import re
 import sys
 import logging
 import shutil
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from qtpy.QtCore import *
 from qtpy.QtGui import *
@@ -44,8 +47,6 @@ from qtpy.QtWidgets import *
 
 from PrismUtils.Decorators import err_catcher
 
-from PrismUtils import PrismWidgets
-
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +57,17 @@ class ProjectEntities(object):
         self.entityFolders = {"asset": [], "shot": []}
         self.entityActions = {}
         self.entityDlg = EntityDlg
+        # matched shot folders per location, which get revalidated after this amount of seconds
+        self.shotIndex = {}
+        self.shotIndexTtl = float(os.getenv("PRISM_SHOT_INDEX_TTL", "5"))
+        self.mergedShots = None
+        # max number of directories, which get listed in parallel while discovering assets
+        self.assetWalkerThreads = int(os.getenv("PRISM_ASSET_WALKER_THREADS", "8"))
+        self.assetWalkerPool = None
+        self.scenefileVersionIndex = {}
+        self.scenefileVersionRegexes = {}
+        # directories modified less than this many seconds before they were scanned get scanned again
+        self.scenefileIndexRacyInterval = 2
         self.refreshOmittedEntities()
 
     @err_catcher(name=__name__)
@@ -155,84 +167,202 @@ class ProjectEntities(object):
         return seqs
 
     @err_catcher(name=__name__)
-    def getShots(self, searchFilter="", locations=None, getSequences=True):
+    def getShotLocations(self, locations=None):
         location_paths = self.core.paths.getExportProductBasePaths()
         location_paths.update(self.core.paths.getRenderProductBasePaths())
         seqDirs = []
         for location in location_paths:
             if locations is not None and location not in locations:
                 continue
+
             seqDir = {"location": location, "path": location_paths[location]}
             seqDirs.append(seqDir)
 
-        shotDicts = []
-        for seqDir in seqDirs:
-            context = {"project_path": seqDir["path"]}
+        return seqDirs
+
+    @err_catcher(name=__name__)
+    def getShotIndex(self, location, basePath, sequence=None):
+        # returns the index of shot folders of a location. when a sequence is specified only the
+        # folder of that sequence gets scanned, if the index isn't up to date
+        template = self.core.projects.getResolvedProjectStructurePath(
+            "shots", context={"project_path": basePath}
+        )
+        index = self.shotIndex.get(location)
+        if not index or index["template"] != template:
+            index = {
+                "template": template,
+                "basePath": basePath,
+                "checked": None,
+                "checkedSequences": {},
+                "paths": {},
+                "version": 0,
+            }
+            self.shotIndex[location] = index
+
+        now = time.time()
+        if index["checked"] is not None and (now - index["checked"]) < self.shotIndexTtl:
+            return index
+
+        if sequence is None:
+            self.scanShotIndex(index)
+        else:
+            checked = index["checkedSequences"].get(sequence)
+            if checked is None or (now - checked) >= self.shotIndexTtl:
+                self.scanShotIndex(index, sequence=sequence)
+
+        return index
+
+    @err_catcher(name=__name__)
+    def scanShotIndex(self, index, sequence=None):
+        # updates the index with the current shot folders and only touches entries which changed
+        if sequence is None:
+            template = index["template"]
+        else:
             template = self.core.projects.getResolvedProjectStructurePath(
-                "shots", context=context
+                "shots", context={"project_path": index["basePath"], "sequence": sequence}
             )
-            shotData = self.core.projects.getMatchingPaths(template)
-            for data in shotData:
-                if "." in os.path.basename(data["path"]) and os.path.isfile(data["path"]):
-                    continue
 
-                if data["sequence"].startswith("_"):
-                    continue
+        found = {}
+        for data in self.core.projects.getMatchingPaths(template):
+            data = data.copy()
+            if sequence is not None:
+                data["sequence"] = sequence
 
-                if data["shot"].startswith("_"):
-                    continue
+            if not self.isValidShotData(data):
+                continue
 
-                if self.isShotOmitted(data):
-                    continue
+            data["type"] = "shot"
+            found[data["path"]] = data
 
-                if (
-                    searchFilter.lower() not in data["sequence"].lower()
-                    and searchFilter.lower() not in data["shot"].lower()
-                ):
-                    metaData = self.getMetaData(data)
-                    if not metaData or searchFilter.lower() not in metaData.get("Description", {}).get("value", "").lower():
-                        continue
+        changed = False
+        for path, data in list(index["paths"].items()):
+            if sequence is not None and data["sequence"] != sequence:
+                continue
 
-                data["location"] = seqDir["location"]
-                data["type"] = "shot"
-                shotDicts.append(data)
+            if path not in found:
+                del index["paths"][path]
+                changed = True
 
-        sequences = []
-        shots = []
-        for shotDict in sorted(shotDicts, key=lambda x: x["path"]):
-            for shot in shots:
-                if (
-                    shotDict["sequence"] == shot["sequence"]
-                    and shotDict["shot"] == shot["shot"]
-                ):
-                    data = {"location": shotDict["location"], "path": shotDict["path"]}
-                    shot["paths"].append(data)
-                    break
+        for path, data in found.items():
+            if path not in index["paths"]:
+                index["paths"][path] = data
+                changed = True
+
+        if changed:
+            index["version"] += 1
+
+        now = time.time()
+        if sequence is None:
+            index["checked"] = now
+            index["checkedSequences"] = {}
+        else:
+            index["checkedSequences"][sequence] = now
+
+    @err_catcher(name=__name__)
+    def isValidShotData(self, data):
+        if "." in os.path.basename(data["path"]) and os.path.isfile(data["path"]):
+            return False
+
+        if not data.get("sequence") or data["sequence"].startswith("_"):
+            return False
+
+        if data["shot"].startswith("_"):
+            return False
+
+        return True
+
+    @err_catcher(name=__name__)
+    def refreshShotIndex(self, sequences=None):
+        # rescans the folders of the specified sequences in all existing indices
+        for index in self.shotIndex.values():
+            if sequences is None:
+                index["checked"] = None
+                index["checkedSequences"] = {}
+                continue
+
+            for sequence in sequences:
+                if sequence:
+                    self.scanShotIndex(index, sequence=sequence)
+
+    @err_catcher(name=__name__)
+    def mergeShots(self, shotData):
+        # shotData is a list of [location, data]. shots from different locations get merged into
+        # one entity with a list of paths
+        shots = OrderedDict()
+        for location, data in sorted(shotData, key=lambda x: x[1]["path"]):
+            key = (data["sequence"], data["shot"])
+            pathData = {"location": location, "path": data["path"]}
+            if key in shots:
+                shots[key]["paths"].append(pathData)
             else:
-                shotDict["paths"] = [
-                    {"location": shotDict["location"], "path": shotDict["path"]}
-                ]
-                shots.append(shotDict)
+                shot = data.copy()
+                shot["location"] = location
+                shot["paths"] = [pathData]
+                shots[key] = shot
+
+        return sorted(shots.values(), key=lambda x: self.core.naturalKeys(x["shot"]))
+
+    @err_catcher(name=__name__)
+    def getMergedShots(self, locations=None):
+        seqDirs = self.getShotLocations(locations)
+        indices = []
+        for seqDir in seqDirs:
+            index = self.getShotIndex(seqDir["location"], seqDir["path"])
+            indices.append([seqDir["location"], index])
+
+        key = tuple([(location, id(index), index["version"]) for location, index in indices])
+        if not self.mergedShots or self.mergedShots["key"] != key:
+            shotData = []
+            for location, index in indices:
+                shotData += [[location, data] for data in index["paths"].values()]
+
+            self.mergedShots = {"key": key, "shots": self.mergeShots(shotData)}
 
-            if shotDict["sequence"] not in sequences:
-                sequences.append(shotDict["sequence"])
+        return self.mergedShots["shots"]
 
-        shots = sorted(shots, key=lambda x: self.core.naturalKeys(x["shot"]))
+    @err_catcher(name=__name__)
+    def filterShots(self, shots, searchFilter=""):
+        # returns copies of the shots, which aren't omitted and match the filter. metadata gets
+        # loaded only for shots, which don't match by name
+        searchFilter = searchFilter.lower()
+        result = []
+        for shot in shots:
+            if self.isShotOmitted(shot):
+                continue
+
+            if (
+                searchFilter not in shot["sequence"].lower()
+                and searchFilter not in shot["shot"].lower()
+            ):
+                metaData = self.getMetaData(shot)
+                if not metaData or searchFilter not in metaData.get("Description", {}).get("value", "").lower():
+                    continue
+
+            shotCopy = shot.copy()
+            shotCopy["paths"] = [pathData.copy() for pathData in shot["paths"]]
+            result.append(shotCopy)
+
+        return result
+
+    @err_catcher(name=__name__)
+    def getShots(self, searchFilter="", locations=None, getSequences=True):
+        shots = self.filterShots(self.getMergedShots(locations), searchFilter)
         if getSequences:
-            sequences = sorted(sequences)
+            sequences = sorted(set([shot["sequence"] for shot in shots]))
             return sequences, shots
         else:
             return shots
 
     @err_catcher(name=__name__)
-    def getShotsFromSequence(self, sequence):
-        seqShots = []
-        sequences, shots = self.core.entities.getShots()
-        for shot in shots:
-            if shot["sequence"] == sequence:
-                seqShots.append(shot)
+    def getShotsFromSequence(self, sequence, locations=None):
+        shotData = []
+        for seqDir in self.getShotLocations(locations):
+            index = self.getShotIndex(seqDir["location"], seqDir["path"], sequence=sequence)
+            for data in index["paths"].values():
+                if data["sequence"] == sequence:
+                    shotData.append([seqDir["location"], data])
 
-        return seqShots
+        return self.filterShots(self.mergeShots(shotData))
 
     @err_catcher(name=__name__)
     def getSteps(self, entity):
@@ -360,7 +490,8 @@ class ProjectEntities(object):
         if ext in self.getBlacklistedExtensions():
             return False
 
-        sData = self.core.getScenefileData(filename)
+        # only the extension is needed here, so the versioninfo file doesn't have to be read
+        sData = {"extension": ext}
 
         try:
             int(sData["extension"][-5:])  # ignore maya temp files
@@ -446,22 +577,7 @@ class ProjectEntities(object):
 
     @err_catcher(name=__name__)
     def getDependencies(self, path):
-        info = self.core.getVersioninfoPath(path)
-        deps = []
-        source = self.core.getConfig("source scene", configPath=info)
-        if source:
-            deps.append(source)
-
-        depPaths = (
-            self.core.getConfig("dependencies", configPath=info) or []
-        )
-        deps += depPaths
-        extFiles = (
-            self.core.getConfig("externalFiles", configPath=info) or []
-        )
-        deps += extFiles
-
-        return deps
+        return self.core.dependencyGraph.getDependencies(path)
 
     @err_catcher(name=__name__)
     def getCurrentDependencies(self):
@@ -529,6 +645,7 @@ class ProjectEntities(object):
         existed = os.path.exists(fullAssetPath)
         if not os.path.exists(fullAssetPath):
             os.makedirs(fullAssetPath)
+            self.core.paths.notifyPathChanged(fullAssetPath)
 
         if not existed:
             self.core.callback(
@@ -590,6 +707,7 @@ class ProjectEntities(object):
                 except Exception as e:
                     return {"error": "Failed to create folder:\n\n%s\n\nError: %s" % (assetFolder, str(e))}
 
+        self.core.paths.notifyPathChanged(fullAssetPath)
         if not existed:
             self.core.callback(
                 name="onAssetCreated",
@@ -652,6 +770,10 @@ class ProjectEntities(object):
             if not os.path.exists(shotFolder):
                 os.makedirs(shotFolder)
 
+            self.core.paths.notifyPathChanged(shotFolder)
+
+        self.core.paths.notifyPathChanged(sBase)
+        self.refreshShotIndex(sequences=[entity.get("sequence")])
         if frameRange:
             self.setShotRange(entity, frameRange[0], frameRange[1])
 
@@ -678,6 +800,8 @@ class ProjectEntities(object):
             except:
                 self.core.popup("The department %s could not be created.\n\n%s" % (department, stepPath))
                 return False
+
+            self.core.paths.notifyPathChanged(stepPath)
         else:
             existed = True
             logger.debug("step already exists: %s" % stepPath)
@@ -770,6 +894,7 @@ class ProjectEntities(object):
                 self.core.popup("The directory %s could not be created" % catPath)
                 return
             else:
+                self.core.paths.notifyPathChanged(catPath)
                 self.core.callback(
                     name="onTaskCreated",
                     args=[self, category, catPath],
@@ -1084,6 +1209,10 @@ class ProjectEntities(object):
                     )
                     if os.path.exists(lShotPath):
                         shutil.rmtree(lShotPath)
+
+                    self.core.paths.notifyPathChanged(lShotPath)
+
+                self.core.paths.notifyPathChanged(shotPath)
                 break
             except Exception as e:
                 msg = (
@@ -1095,6 +1224,14 @@ class ProjectEntities(object):
                     self.core.popup("Deleting shot canceled.")
                     break
 
+        sequences = []
+        for index in self.shotIndex.values():
+            for path, data in index["paths"].items():
+                if os.path.normpath(path) == os.path.normpath(shotPath):
+                    sequences.append(data["sequence"])
+
+        self.refreshShotIndex(sequences=set(sequences))
+
     @err_catcher(name=__name__)
     def renameSequence(self, curSeqName, newSeqName, locations=None):
         seqFolder = os.path.normpath(self.core.getEntityPath(entity={"type": "sequence", "sequence": curSeqName}))
@@ -1138,6 +1275,11 @@ class ProjectEntities(object):
                                 os.rename(k, k.replace(curSeqName, newSeqName))
                     os.chdir(cwd)
 
+                for folder in seqFolders:
+                    self.core.paths.notifyPathChanged(folder)
+                    self.core.paths.notifyPathChanged(seqFolders[folder])
+
+                self.refreshShotIndex(sequences=[curSeqName, newSeqName])
                 break
 
             except Exception as e:
@@ -1221,6 +1363,12 @@ class ProjectEntities(object):
 
                     os.chdir(cwd)
 
+                for folder in shotFolders:
+                    self.core.paths.notifyPathChanged(folder)
+                    self.core.paths.notifyPathChanged(shotFolders[folder])
+
+                self.refreshShotIndex(sequences=set([curShotData["sequence"], newShotData["sequence"]]))
+
                 oldPrvPath = self.getEntityPreviewPath(curShotData)
                 newPrvPath = self.getEntityPreviewPath(newShotData)
                 if os.path.exists(oldPrvPath):
@@ -1297,11 +1445,19 @@ class ProjectEntities(object):
         if content is None:
             content = os.listdir(path)
 
-        subfolders = self.getAssetSubFolders()
+        return self.getTypeFromContent(content)
 
-        if self.core.getConfig(
-            "globals", "useStrictAssetDetection", dft=False, config="project"
-        ):
+    @err_catcher(name=__name__)
+    def getTypeFromContent(self, content, subfolders=None, strict=None):
+        if subfolders is None:
+            subfolders = self.getAssetSubFolders()
+
+        if strict is None:
+            strict = self.core.getConfig(
+                "globals", "useStrictAssetDetection", dft=False, config="project"
+            )
+
+        if strict:
             isAsset = True
             for folder in subfolders:
                 if folder not in content:
@@ -1339,36 +1495,103 @@ class ProjectEntities(object):
         return assets
 
     @err_catcher(name=__name__)
-    def getAssetPaths(self, path=None, returnFolders=False, depth=0):
+    def getAssetPaths(self, path=None, returnFolders=False, depth=0, useCatalog=True, callback=None):
         aBasePath = path or self.core.assetPath
         assets = []
         assetFolders = []
 
-        for root, folders, files in os.walk(aBasePath):
-            for folder in folders:
-                folderPath = os.path.join(root, folder)
-                if self.getTypeFromPath(folderPath) == "asset":
-                    assets.append(folderPath)
+        useCatalog = useCatalog and depth == 0 and self.core.catalog.isEnabled()
+        if useCatalog:
+            catalogData = self.core.catalog.getAssetPaths(aBasePath)
+            if catalogData is not None:
+                if returnFolders:
+                    return catalogData
                 else:
-                    if depth == 1:
-                        assetFolders.append(folderPath)
-                    else:
-                        nextDepth = 0 if depth == 0 else (depth - 1)
-                        childAssets, childFolders = self.getAssetPaths(
-                            path=folderPath, returnFolders=True, depth=nextDepth
-                        )
-                        if childAssets or childFolders:
-                            assets += childAssets
-                            assetFolders += childFolders
-                        else:
-                            assetFolders.append(folderPath)
-            break
+                    return catalogData[0]
+
+        assets, assetFolders = self.walkAssetTree(aBasePath, depth=depth, callback=callback)
+
+        if useCatalog:
+            self.core.catalog.setAssetPaths(aBasePath, assets, assetFolders)
 
         if returnFolders:
             return assets, assetFolders
         else:
             return assets
 
+    @err_catcher(name=__name__)
+    def getAssetWalkerPool(self):
+        if not self.assetWalkerPool:
+            self.assetWalkerPool = ThreadPoolExecutor(max_workers=max(1, self.assetWalkerThreads))
+
+        return self.assetWalkerPool
+
+    @err_catcher(name=__name__)
+    def listAssetFolder(self, path):
+        entries = self.core.paths.getDirectoryEntries(path) or []
+        names = [entry[0] for entry in entries]
+        folders = [os.path.join(path, entry[0]) for entry in entries if entry[1]]
+        return path, names, folders
+
+    @err_catcher(name=__name__)
+    def walkAssetTree(self, basePath, depth=0, callback=None):
+        # lists the asset folders in parallel. every directory gets listed once and the listing is
+        # used to classify the folder as asset or folder and to find its subfolders.
+        # callback gets called with the path and type of every folder as soon as it's classified.
+        # depth 0 walks the whole tree, depth 1 returns only the direct children of basePath
+        subfolders = self.getAssetSubFolders()
+        strict = self.core.getConfig(
+            "globals", "useStrictAssetDetection", dft=False, config="project"
+        )
+        pool = self.getAssetWalkerPool()
+        basePath = os.path.normpath(basePath)
+        listings = {}
+        types = {}
+        depths = {basePath: depth}
+        # every future is mapped to the depth of the folder, which contains the listed folder
+        pending = {pool.submit(self.listAssetFolder, basePath): None}
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                parentDepth = pending.pop(future)
+                path, names, folders = future.result()
+                listings[path] = folders
+                if path != basePath:
+                    types[path] = self.getTypeFromContent(names, subfolders=subfolders, strict=strict)
+                    if callback:
+                        callback(path, types[path])
+
+                    if types[path] == "asset":
+                        continue
+
+                if parentDepth == 1:
+                    continue
+
+                childDepth = 0 if depths[path] == 0 else (depths[path] - 1)
+                for folder in folders:
+                    depths[folder] = childDepth
+                    pending[pool.submit(self.listAssetFolder, folder)] = depths[path]
+
+        def collect(path):
+            assets = []
+            folders = []
+            for folder in listings.get(path, []):
+                if types.get(folder) == "asset":
+                    assets.append(folder)
+                elif depths[path] == 1:
+                    folders.append(folder)
+                else:
+                    childAssets, childFolders = collect(folder)
+                    if childAssets or childFolders:
+                        assets += childAssets
+                        folders += childFolders
+                    else:
+                        folders.append(folder)
+
+            return assets, folders
+
+        return collect(basePath)
+
     @err_catcher(name=__name__)
     def getEmptyAssetFolders(self):
         assets, folders = self.getAssetPaths(returnFolders=True)
@@ -1570,6 +1793,129 @@ class ProjectEntities(object):
         sceneInfo[key] = value
         self.core.setConfig(data=sceneInfo, configPath=infoPath)
 
+    @err_catcher(name=__name__)
+    def getScenefileDirs(self, entity, department, task):
+        if entity.get("type") == "asset" and (
+            self.core.compareVersions(self.core.projectVersion, "v1.2.1.6") == "lower"
+        ):
+            path = self.core.getEntityPath(entity=entity, step=department)
+        else:
+            path = self.core.getEntityPath(entity=entity, step=department, category=task)
+
+        if not path:
+            return []
+
+        sceneDirs = [path]
+        if self.core.useLocalFiles:
+            path = self.core.convertPath(path, target="global")
+            lpath = self.core.convertPath(path, target="local")
+            sceneDirs = [path, lpath]
+
+        return sceneDirs
+
+    @err_catcher(name=__name__)
+    def getScenefileVersionRegex(self, entityType):
+        # compiles a regex, which extracts the version from a scenefile name.
+        # it's derived from the filename part of the scenefile template of the project structure
+        key = "assetScenefiles" if entityType == "asset" else "shotScenefiles"
+        template = self.core.projects.getTemplatePath(key) or ""
+        versionFormat = self.core.versionFormatVan
+        cacheKey = (template, versionFormat)
+        if cacheKey in self.scenefileVersionRegexes:
+            return self.scenefileVersionRegexes[cacheKey]
+
+        prefix, suffix = (versionFormat.split("#", 1) + [""])[:2]
+        reVersion = "%s(?P<version>\\d+)%s" % (re.escape(prefix), re.escape(suffix))
+        filename = os.path.basename(template.replace("\\", "/"))
+        if template.startswith("[expression,") or "@version@" not in filename:
+            regex = re.compile("(?:^|[^a-zA-Z0-9])%s(?=[^0-9]|$)" % reVersion, re.IGNORECASE)
+        else:
+            extKey = "@extension@"
+            if filename.endswith(extKey):
+                filename = filename[:-len(extKey)]
+
+            rePath = re.escape(filename)
+            for tkey in set(self.core.projects.getTemplateKeys(filename)):
+                reKey = "@%s@" % tkey
+                if tkey == "version":
+                    rePath = rePath.replace(re.escape(reKey), reVersion, 1)
+                    rePath = rePath.replace(re.escape(reKey), "\\d+")
+                else:
+                    rePath = rePath.replace(re.escape(reKey), ".*")
+
+            regex = re.compile("^%s$" % rePath, re.IGNORECASE)
+
+        self.scenefileVersionRegexes[cacheKey] = regex
+        return regex
+
+    @err_catcher(name=__name__)
+    def getVersionFromScenefileName(self, filename, entityType):
+        regex = self.getScenefileVersionRegex(entityType)
+        base = os.path.splitext(filename)[0]
+        match = regex.search(base) or regex.search(filename)
+        if not match:
+            return
+
+        return int(match.group("version"))
+
+    @err_catcher(name=__name__)
+    def getScenefileVersionIndex(self, path, entityType):
+        # returns the versions of all scenefiles in a task folder. versions get parsed from the
+        # filenames only and the result is cached until the modification time of the folder changes
+        try:
+            mtime = os.stat(path).st_mtime
+        except Exception:
+            self.scenefileVersionIndex.pop((path, entityType), None)
+            return
+
+        key = (path, entityType)
+        index = self.scenefileVersionIndex.get(key)
+        if (
+            index
+            and index["mtime"] == mtime
+            and (index["scanned"] - mtime) > self.scenefileIndexRacyInterval
+        ):
+            return index
+
+        scanned = time.time()
+        versions = {}
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+
+                    if not self.isValidScenefilename(entry.name):
+                        continue
+
+                    version = self.getVersionFromScenefileName(entry.name, entityType)
+                    if version is not None:
+                        versions[entry.name] = version
+        except OSError as e:
+            # the folder is treated as empty and not cached, so it gets scanned again next time
+            logger.debug("failed to scan scenefile folder: %s - %s" % (path, e))
+            self.scenefileVersionIndex.pop(key, None)
+            return {"mtime": mtime, "scanned": scanned, "versions": {}, "highest": {}}
+
+        index = {"mtime": mtime, "scanned": scanned, "versions": versions, "highest": {}}
+        self.scenefileVersionIndex[key] = index
+        return index
+
+    @err_catcher(name=__name__)
+    def invalidateScenefileVersionIndex(self, path=None):
+        if not path:
+            self.scenefileVersionIndex = {}
+            return
+
+        path = os.path.normpath(path)
+        for key in list(self.scenefileVersionIndex):
+            cachedPath = os.path.normpath(key[0])
+            if cachedPath == path or cachedPath.startswith(path + os.sep):
+                self.scenefileVersionIndex.pop(key, None)
+
     @err_catcher(name=__name__)
     def getHighestVersion(
         self,
@@ -1581,26 +1927,27 @@ class ProjectEntities(object):
         localVersions=True,
         getExistingVersion=False,
     ):
-        scenefiles = self.getScenefiles(entity=entity, step=department, category=task)
         highversion = [None, ""]
-        for scenefile in scenefiles:
-            if fileTypes != "*" and os.path.splitext(scenefile)[1] not in fileTypes:
+        for sDir in self.getScenefileDirs(entity, department, task):
+            index = self.getScenefileVersionIndex(sDir, entity.get("type"))
+            if not index:
                 continue
 
-            if not self.isValidScenefilename(scenefile):
-                continue
+            fileKey = "*" if fileTypes == "*" else tuple(fileTypes)
+            if fileKey not in index["highest"]:
+                highest = [None, ""]
+                for filename, version in index["versions"].items():
+                    if fileKey != "*" and os.path.splitext(filename)[1] not in fileTypes:
+                        continue
 
-            fname = self.core.getScenefileData(scenefile)
-            if fname.get("type") != entity.get("type"):
-                continue
+                    if highest[0] is None or version > highest[0]:
+                        highest = [version, os.path.join(sDir, filename)]
 
-            try:
-                version = int(fname["version"][-self.core.versionPadding:])
-            except:
-                continue
+                index["highest"][fileKey] = highest
 
-            if highversion[0] is None or version > highversion[0]:
-                highversion = [version, scenefile]
+            highest = index["highest"][fileKey]
+            if highest[0] is not None and (highversion[0] is None or highest[0] > highversion[0]):
+                highversion = highest
 
         if getExistingVersion:
             return highversion
@@ -1922,6 +2269,7 @@ class ProjectEntities(object):
     def createPresetScene(self):
         presetDir = os.path.join(self.core.projects.getPipelineFolder(), "PresetScenes")
 
+        from PrismUtils import PrismWidgets
         newItem = PrismWidgets.CreateItem(
             core=self.core,
             startText=self.core.appPlugin.pluginName.replace(" ", ""),
@@ -38,8 +38,6 @@ import logging
 import shutil
 import platform
 import time
-import glob
-import re
 from collections import OrderedDict
 from distutils.dir_util import copy_tree
 
@@ -48,6 +46,7 @@ from qtpy.QtGui import *
 from qtpy.QtWidgets import *
 
 from PrismUtils.Decorators import err_catcher
+from PrismUtils.StructureTemplates import StructureTemplate, CompiledStructure
 
 
 logger = logging.getLogger(__name__)
@@ -62,6 +61,11 @@ class Projects(object):
         self.environmentVariables = []
         self.previewWidth = 1280
         self.previewHeight = 720
+        self.structureTemplates = {}
+        self.maxStructureTemplates = 5000
+        self.compiledStructures = {}
+        self.passedStructures = OrderedDict([])
+        self.expressionCode = {}
 
     @err_catcher(name=__name__)
     def setProject(self, startup=None, openUi=""):
@@ -1323,6 +1327,7 @@ class Projects(object):
     @err_catcher(name=__name__)
     def addProjectStructureItem(self, key, value):
         self.extraStructureItems[key] = value
+        self.invalidateCompiledStructures()
         return True
 
     @err_catcher(name=__name__)
@@ -1440,13 +1445,21 @@ class Projects(object):
         context = context or {}
         core = self.core
 
-        if expression.startswith("[expression,"):
-            expression = expression[len("[expression,"):]
-            if expression.endswith("]"):
-                expression = expression[:-1]
+        if expression not in self.expressionCode:
+            code = expression
+            if code.startswith("[expression,"):
+                code = code[len("[expression,"):]
+                if code.endswith("]"):
+                    code = code[:-1]
+
+            try:
+                self.expressionCode[expression] = compile(code, "<template expression>", "exec")
+            except Exception as e:
+                logger.warning(e)
+                return
 
         try:
-            exec(expression, locals(), None)
+            exec(self.expressionCode[expression], locals(), None)
         except Exception as e:
             logger.warning(e)
             return
@@ -1481,8 +1494,77 @@ class Projects(object):
 
         item["value"] = value
         self.core.setConfig("folder_structure", val=structure, config="project")
+        self.invalidateCompiledStructures()
         return True
 
+    @err_catcher(name=__name__)
+    def getStructureTemplate(self, template):
+        structureTemplate = self.structureTemplates.get(template)
+        if structureTemplate:
+            return structureTemplate
+
+        structureTemplate = StructureTemplate(template)
+        if len(self.structureTemplates) >= self.maxStructureTemplates:
+            self.structureTemplates = {}
+
+        self.structureTemplates[template] = structureTemplate
+        return structureTemplate
+
+    @err_catcher(name=__name__)
+    def getStructureSignature(self, configPath):
+        # changes whenever the project config gets modified
+        entry = None
+        if configPath:
+            self.core.getConfig("folder_structure", configPath=configPath, readOnly=True)
+            entry = self.core.configs.cachedConfigs.get(os.path.normpath(configPath))
+
+        if entry:
+            stat = (entry["modtime"], entry.get("size"))
+        else:
+            stat = None
+
+        return (stat, self.core.prism1Compatibility)
+
+    @err_catcher(name=__name__)
+    def getCompiledProjectStructure(self, projectPath=None):
+        # the project structure gets compiled once and reused until the project config changes
+        if projectPath:
+            configPath = self.core.configs.getProjectConfigPath(projectPath)
+        else:
+            configPath = self.core.prismIni
+
+        signature = self.getStructureSignature(configPath)
+        compiled = self.compiledStructures.get(configPath)
+        if compiled and compiled.signature == signature:
+            return compiled
+
+        structure = self.getProjectStructure(projectPath)
+        compiled = CompiledStructure(structure, signature=signature)
+        self.compiledStructures[configPath] = compiled
+        return compiled
+
+    @err_catcher(name=__name__)
+    def getCompiledStructure(self, structure):
+        for compiled in self.compiledStructures.values():
+            if compiled.structure is structure:
+                return compiled
+
+        compiled = self.passedStructures.get(id(structure))
+        if compiled and compiled.structure is structure:
+            return compiled
+
+        compiled = CompiledStructure(structure)
+        self.passedStructures[id(structure)] = compiled
+        while len(self.passedStructures) > 20:
+            self.passedStructures.popitem(last=False)
+
+        return compiled
+
+    @err_catcher(name=__name__)
+    def invalidateCompiledStructures(self):
+        self.compiledStructures = {}
+        self.passedStructures = OrderedDict([])
+
     @err_catcher(name=__name__)
     def getResolvedProjectStructurePath(self, key, context=None, structure=None, fallback=None):
         resolvedPaths = self.getResolvedProjectStructurePaths(key, context, structure, fallback)
@@ -1506,7 +1588,7 @@ class Projects(object):
             prjPath = context["project_path"]
 
         if structure is None:
-            structure = self.getProjectStructure(prjPath)
+            structure = self.getCompiledProjectStructure(prjPath).structure
 
         item = structure.get(key)
         if not item:
@@ -1555,7 +1637,7 @@ class Projects(object):
                 context["project_name"] = self.core.getConfig("globals", "project_name", configPath=cfgPath) or ""
 
         if structure is None:
-            structure = self.getProjectStructure(prjPath)
+            structure = self.getCompiledProjectStructure(prjPath).structure
 
         if path.startswith("[expression,"):
             paths = self.getTemplatesFromExpression(path, context=context) or ""
@@ -1565,12 +1647,8 @@ class Projects(object):
         newPaths = []
         for path in paths:
             resolvedPaths = [""]
-            pieces = path.split("@")
-            for idx, piece in enumerate(pieces):
-                if not piece:
-                    continue
-
-                if idx % 2:
+            for isKey, piece in self.getStructureTemplate(path).tokens:
+                if isKey:
                     resolvedPieces = self.resolveStructurePiece(piece, structure, context, fillContextKeys=fillContextKeys, fallback=fallback)
                     if resolvedPieces is None:
                         logger.debug(piece)
@@ -1620,10 +1698,7 @@ class Projects(object):
 
                 return [val]
 
-        for structureKey in structure:
-            if ("@%s@" % key) != structure[structureKey]["key"]:
-                continue
-
+        for structureKey in self.getCompiledStructure(structure).getStructureKeys(key):
             if (
                 key == "entity_path"
                 and ("asset" in context or context.get("entityType") == "asset")
@@ -1661,38 +1736,82 @@ class Projects(object):
     def getTemplateKeys(self, template):
         return template.split("@")[1::2]
 
+    @err_catcher(name=__name__)
+    def getTemplateRegex(self, template):
+        return self.getStructureTemplate(template).getRegexData()
+
+    @err_catcher(name=__name__)
+    def benchmarkTemplateResolution(self, context=None, iterations=200):
+        # returns the resolved paths and extracted paths per second for the compiled project structure
+        # and the resolve throughput when the structure has to be compiled for every call
+        context = context or {
+            "asset_path": "Characters/Hero",
+            "asset": "Hero",
+            "sequence": "sq010",
+            "shot": "sh010",
+            "department": "Anm",
+            "task": "Animation",
+            "version": self.core.versionFormat % self.core.lowestVersion,
+            "product": "charCache",
+            "identifier": "main",
+            "aov": "beauty",
+            "mediaType": "3drenders",
+            "comment": "",
+            "user": "usr",
+            "frame": "1001",
+            "extension": ".exr",
+        }
+        structure = self.getCompiledProjectStructure().structure
+        keys = [key for key in structure if not structure[key]["value"].startswith("[expression,")]
+        paths = []
+        for key in keys:
+            path = self.getResolvedProjectStructurePath(key, context=context.copy())
+            if path:
+                paths.append((path, structure[key]["value"]))
+
+        def resolveAll(compile=False):
+            for key in keys:
+                if compile:
+                    self.invalidateCompiledStructures()
+                    self.structureTemplates = {}
+
+                self.getResolvedProjectStructurePath(key, context=context.copy())
+
+        def extractAll():
+            for path, template in paths:
+                self.extractKeysFromPath(path, template, context=context.copy())
+
+        benchmarks = OrderedDict([
+            ("resolve", (resolveAll, len(keys))),
+            ("resolve+compile", (lambda: resolveAll(compile=True), len(keys))),
+            ("extract", (extractAll, len(paths))),
+        ])
+        results = OrderedDict([])
+        for name, benchmark in benchmarks.items():
+            func, count = benchmark
+            start = time.time()
+            for idx in range(iterations):
+                func()
+
+            duration = time.time() - start
+            results[name] = (count * iterations) / duration if duration else 0
+            logger.info("%s: %.0f calls per second" % (name, results[name]))
+
+        self.invalidateCompiledStructures()
+        return results
+
     @err_catcher(name=__name__)
     def extractKeysFromPath(self, path, template, context=None):
         template = self.resolveStructurePath(template, context=context, addProjectPath=False, fillContextKeys=False)[0]
         template = os.path.normpath(template)
         path = os.path.normpath(path)
-        keys = self.getTemplateKeys(template)
-        extKey = "@extension@"
-        if template.endswith(extKey):
-            template = template[:-len(extKey)]
+        templateData = self.getTemplateRegex(template)
+        if templateData["hasExtension"]:
             path, extension = self.core.paths.splitext(path)
         else:
             extension = ""
 
-        rePath = template
-        rePath = re.escape(rePath)
-
-        usedKeys = []
-        for key in keys:
-            if key in usedKeys:
-                reKey = "__temp__%s_%s" % (key, keys.index(key))
-            else:
-                if "(" in key and ")" in key:
-                    cleanKey = key[key.find("(")+1:key.find(")")]
-                    reKey = cleanKey
-                else:
-                    reKey = key
-
-            reval = "(?P<%s>.*)" % reKey
-            rePath = rePath.replace(re.escape("@%s@" % key), reval, 1)
-            usedKeys.append(key)
-
-        rmatch = re.match(rePath, path, re.IGNORECASE)
+        rmatch = templateData["regex"].match(path)
         if not rmatch:
             return {}
 
@@ -1708,58 +1827,49 @@ class Projects(object):
         return data
 
     @err_catcher(name=__name__)
-    def getMatchingPaths(self, template):
+    def getMatchingPaths(self, template, useCatalog=True):
         template = os.path.normpath(template)
-        keys = self.getTemplateKeys(template)
-        globPath = template
-        for key in keys:
-            globPath = globPath.replace("@%s@" % key, "*")
-
-        matches = glob.glob(globPath)
-
-        extKey = "@extension@"
-        if template.endswith(extKey):
-            template = template[:-len(extKey)]
-            hasext = True
-        else:
-            hasext = False
-
-        rePath = re.escape(template)
-        usedKeys = []
-        for key in keys:
-            if key in usedKeys:
-                reKey = "__temp__%s_%s" % (key, keys.index(key))
-            else:
-                if "(" in key and ")" in key:
-                    cleanKey = key[key.find("(")+1:key.find(")")]
-                    reKey = cleanKey
-                else:
-                    reKey = key
-
-            reval = "(?P<%s>.*)" % reKey
+        useCatalog = useCatalog and self.core.catalog.isEnabled()
+        if useCatalog:
+            pathData = self.core.catalog.getMatchingPaths(template)
+            if pathData is not None:
+                return pathData
 
-            rePath = rePath.replace(re.escape("@%s@" % key), reval, 1)
-            usedKeys.append(key)
+        templateData = self.getTemplateRegex(template)
+        matches = self.core.paths.globPaths(templateData["globPath"])
 
         pathData = []
         for match in matches:
-            origMatch = match
-            if hasext:
-                match, extension = self.core.paths.splitext(match)
-
-            rmatch = re.match(rePath, match, re.IGNORECASE)
-            if not rmatch:
+            data = self.getPathDataFromTemplate(match, template)
+            if data is None:
                 continue
 
-            data = rmatch.groupdict()
-            data["path"] = origMatch
-            if hasext:
-                data["extension"] = extension
-
             pathData.append(data)
 
+        if useCatalog:
+            self.core.catalog.setMatchingPaths(template, pathData)
+
         return pathData
 
+    @err_catcher(name=__name__)
+    def getPathDataFromTemplate(self, path, template):
+        templateData = self.getTemplateRegex(template)
+        hasext = templateData["hasExtension"]
+        match = path
+        if hasext:
+            match, extension = self.core.paths.splitext(match)
+
+        rmatch = templateData["regex"].match(match)
+        if not rmatch:
+            return
+
+        data = rmatch.groupdict()
+        data["path"] = path
+        if hasext:
+            data["extension"] = extension
+
+        return data
+
     @err_catcher(name=__name__)
     def getProjectImage(self, projectPath=None, projectConfig=None, validate=True, structure=None):
         if not projectPath and projectConfig:
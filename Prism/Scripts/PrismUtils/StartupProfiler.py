@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import sys
+import time
+import logging
+import threading
+
+from collections import OrderedDict
+
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler(object):
+    def __init__(self, core, enabled=None):
+        self.core = core
+        if enabled is None:
+            enabled = self.isRequested()
+
+        self.active = enabled
+        self.startTime = time.perf_counter()
+        self.endTime = None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def isRequested(self):
+        env = os.getenv("PRISM_STARTUP_PROFILE", "")
+        if env.lower() in ["1", "true"]:
+            return True
+
+        args = list(self.core.prismArgs) + list(sys.argv)
+        return "profileStartup" in args or "--profile-startup" in args
+
+    def measure(self, category, name):
+        return ProfilerMeasure(self, category, name)
+
+    def record(self, category, name, duration):
+        if not self.active:
+            return
+
+        with self.lock:
+            if category not in self.entries:
+                self.entries[category] = OrderedDict()
+
+            entry = self.entries[category].setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += duration
+
+    def stop(self):
+        # stops recording, so that config reads after the startup don't add any overhead
+        self.endTime = time.perf_counter()
+        self.active = False
+
+    def getTotalDuration(self):
+        return (self.endTime or time.perf_counter()) - self.startTime
+
+    def getReport(self, maxEntries=20):
+        lines = ["Prism startup profile - total: %.1f ms" % (self.getTotalDuration() * 1000)]
+        with self.lock:
+            for category, entries in self.entries.items():
+                total = sum([entry[1] for entry in entries.values()])
+                count = sum([entry[0] for entry in entries.values()])
+                lines.append("")
+                lines.append("%s: %.1f ms (%s calls)" % (category, total * 1000, count))
+                items = sorted(entries.items(), key=lambda x: x[1][1], reverse=True)
+                for name, entry in items[:maxEntries]:
+                    line = "    %8.1f ms  %s" % (entry[1] * 1000, name)
+                    if entry[0] > 1:
+                        line += " (%sx)" % entry[0]
+
+                    lines.append(line)
+
+                if len(items) > maxEntries:
+                    lines.append("    ... %s more" % (len(items) - maxEntries))
+
+        return "\n".join(lines)
+
+    def printReport(self):
+        report = self.getReport()
+        print(report)
+        return report
+
+
+class ProfilerMeasure(object):
+    def __init__(self, profiler, category, name):
+        self.profiler = profiler
+        self.category = category
+        self.name = name
+
+    def __enter__(self):
+        if self.profiler.active:
+            self.startTime = time.perf_counter()
+
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if self.profiler.active:
+            self.profiler.record(self.category, self.name, time.perf_counter() - self.startTime)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import re
+from collections import OrderedDict
+
+
+class StructureTemplate(object):
+    # a template string of the project structure, which is split into its tokens once.
+    # the extraction regex gets compiled the first time it's needed
+    def __init__(self, template):
+        self.template = template
+        self.isExpression = template.startswith("[expression,")
+        self.tokens = []
+        self.keys = template.split("@")[1::2]
+        self.regexData = None
+        if not self.isExpression:
+            for idx, piece in enumerate(template.split("@")):
+                if not piece:
+                    continue
+
+                self.tokens.append((bool(idx % 2), piece))
+
+    def getRegexData(self):
+        if self.regexData is not None:
+            return self.regexData
+
+        keys = self.keys
+        extKey = "@extension@"
+        if self.template.endswith(extKey):
+            reTemplate = self.template[:-len(extKey)]
+            hasext = True
+        else:
+            reTemplate = self.template
+            hasext = False
+
+        rePath = re.escape(reTemplate)
+        usedKeys = []
+        for key in keys:
+            if key in usedKeys:
+                reKey = "__temp__%s_%s" % (key, keys.index(key))
+            else:
+                if "(" in key and ")" in key:
+                    cleanKey = key[key.find("(")+1:key.find(")")]
+                    reKey = cleanKey
+                else:
+                    reKey = key
+
+            reval = "(?P<%s>.*)" % reKey
+            rePath = rePath.replace(re.escape("@%s@" % key), reval, 1)
+            usedKeys.append(key)
+
+        globPath = self.template
+        for key in keys:
+            globPath = globPath.replace("@%s@" % key, "*")
+
+        self.regexData = {
+            "regex": re.compile(rePath, re.IGNORECASE),
+            "keys": keys,
+            "hasExtension": hasext,
+            "globPath": globPath,
+        }
+        return self.regexData
+
+
+class CompiledStructure(object):
+    # a project structure with a lookup from "@key@" to the structure items, which provide that key
+    def __init__(self, structure, signature=None):
+        self.structure = structure
+        self.signature = signature
+        self.keyLookup = OrderedDict([])
+        for structureKey in structure:
+            key = structure[structureKey].get("key")
+            if key:
+                self.keyLookup.setdefault(key, []).append(structureKey)
+
+    def getStructureKeys(self, key):
+        return self.keyLookup.get("@%s@" % key, [])
@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import hashlib
+import logging
+import threading
+
+from collections import OrderedDict
+
+from qtpy.QtCore import *
+from qtpy.QtGui import *
+from qtpy.QtWidgets import *
+
+from PrismUtils.Decorators import err_catcher
+
+
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailCache(object):
+    def __init__(self, core):
+        super(ThumbnailCache, self).__init__()
+        self.core = core
+        self.cacheDir = os.getenv("PRISM_THUMBNAIL_CACHE") or os.path.join(
+            os.path.dirname(self.core.userini), "ThumbnailCache"
+        )
+        # size budget of the on-disk cache in MB
+        self.cacheBudget = int(float(os.getenv("PRISM_THUMBNAIL_CACHE_SIZE", "1024")) * 1024 * 1024)
+        self.cacheUsage = None
+        self.memoryCache = OrderedDict()
+        self.memoryCacheSize = 300
+        self.pending = {}
+        self.lock = threading.RLock()
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(int(os.getenv("PRISM_THUMBNAIL_THREADS", "4")))
+
+    @err_catcher(name=__name__)
+    def isEnabled(self):
+        return self.cacheBudget > 0
+
+    def getCacheKey(self, path, width=None, height=None, channel=None):
+        # the key changes when the file gets modified, so entries never need to be invalidated
+        try:
+            stat = os.stat(path)
+        except Exception:
+            return
+
+        if os.path.splitext(path)[1].lower() in self.core.media.videoFormats:
+            # video thumbnails are always cached in full resolution
+            width = height = channel = None
+
+        data = "|".join([
+            os.path.normcase(os.path.normpath(path)),
+            repr(stat.st_mtime),
+            str(stat.st_size),
+            str(int(width) if width else None),
+            str(int(height) if height else None),
+            str(channel),
+        ])
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    def getCacheFilepath(self, key):
+        return os.path.join(self.cacheDir, key[:2], key + ".jpg")
+
+    def getCachedImage(self, path, width=None, height=None, channel=None, key=None):
+        if not self.isEnabled():
+            return
+
+        key = key or self.getCacheKey(path, width, height, channel)
+        if not key:
+            return
+
+        with self.lock:
+            qimg = self.memoryCache.pop(key, None)
+            if qimg is not None:
+                self.memoryCache[key] = qimg
+                return qimg
+
+        cachePath = self.getCacheFilepath(key)
+        if not os.path.exists(cachePath):
+            return
+
+        qimg = QImage(cachePath)
+        if qimg.isNull():
+            return
+
+        try:
+            os.utime(cachePath, None)
+        except Exception:
+            pass
+
+        self.addToMemoryCache(key, qimg)
+        return qimg
+
+    def addToMemoryCache(self, key, qimg):
+        with self.lock:
+            self.memoryCache[key] = qimg
+            while len(self.memoryCache) > self.memoryCacheSize:
+                self.memoryCache.popitem(last=False)
+
+    def storeImage(self, path, qimg, width=None, height=None, channel=None, key=None):
+        if not self.isEnabled() or not qimg or qimg.isNull():
+            return
+
+        key = key or self.getCacheKey(path, width, height, channel)
+        if not key:
+            return
+
+        cachePath = self.getCacheFilepath(key)
+        tmpPath = "%s.%s.tmp" % (cachePath, threading.current_thread().ident)
+        try:
+            if not os.path.exists(os.path.dirname(cachePath)):
+                os.makedirs(os.path.dirname(cachePath))
+
+            if not qimg.save(tmpPath, "JPG", 95):
+                return
+
+            os.replace(tmpPath, cachePath)
+        except Exception as e:
+            logger.debug("failed to store thumbnail: %s - %s" % (path, e))
+            return
+
+        self.addToMemoryCache(key, qimg)
+        with self.lock:
+            if self.cacheUsage is None:
+                self.cacheUsage = self.getCacheUsage()
+            else:
+                self.cacheUsage += os.path.getsize(cachePath)
+
+            if self.cacheUsage > self.cacheBudget:
+                self.evict()
+
+        return cachePath
+
+    def getCacheFiles(self):
+        files = []
+        if not os.path.exists(self.cacheDir):
+            return files
+
+        for folder in os.scandir(self.cacheDir):
+            if not folder.is_dir():
+                continue
+
+            for entry in os.scandir(folder.path):
+                if not entry.name.endswith(".jpg"):
+                    continue
+
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+
+                files.append([stat.st_mtime, stat.st_size, entry.path])
+
+        return files
+
+    def getCacheUsage(self):
+        return sum([data[1] for data in self.getCacheFiles()])
+
+    def evict(self):
+        # removes the least recently used thumbnails until the cache is below 90% of its budget
+        files = sorted(self.getCacheFiles())
+        usage = sum([data[1] for data in files])
+        target = self.cacheBudget * 0.9
+        for mtime, size, path in files:
+            if usage <= target:
+                break
+
+            try:
+                os.remove(path)
+            except Exception:
+                continue
+
+            usage -= size
+
+        self.cacheUsage = usage
+
+    @err_catcher(name=__name__)
+    def clearCache(self):
+        with self.lock:
+            self.memoryCache = OrderedDict()
+            for mtime, size, path in self.getCacheFiles():
+                try:
+                    os.remove(path)
+                except Exception:
+                    pass
+
+            self.cacheUsage = None
+
+    def generateImage(self, path, width=None, height=None, channel=None):
+        ext = os.path.splitext(path)[1].lower()
+        if ext in [".exr", ".dpx", ".hdr"]:
+            qimg = self.core.media.getQImageFromExrPath(path, width=width, height=height, channel=channel)
+        elif ext in self.core.media.videoFormats:
+            return self.core.media.getQImageFromVideoPath(path)
+        else:
+            qimg = QImage(path)
+
+        if not qimg or qimg.isNull():
+            return
+
+        if width and height and (qimg.width() > width or qimg.height() > height):
+            qimg = qimg.scaled(int(width), int(height), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+        return qimg
+
+    def getThumbnail(self, path, width=None, height=None, channel=None):
+        key = self.getCacheKey(path, width, height, channel)
+        qimg = self.getCachedImage(path, width, height, channel, key=key)
+        if qimg is None:
+            qimg = self.generateImage(path, width, height, channel)
+            if qimg is not None:
+                self.storeImage(path, qimg, width, height, channel, key=key)
+
+        return qimg
+
+    @err_catcher(name=__name__)
+    def requestThumbnail(self, path, width=None, height=None, channel=None, getPath=None):
+        # returns the thumbnail if it is in the memory cache. otherwise it gets loaded or generated
+        # in the thread pool, so that the preview finds it in the cache later.
+        # channel can be a function, which gets called with the path in the worker thread.
+        # if getPath is set, path can be any object, which getPath resolves to the filepath in the worker thread
+        if getPath:
+            key = None
+            pendingKey = (repr(path), width, height)
+        elif callable(channel):
+            key = None
+            pendingKey = (os.path.normpath(path), width, height)
+        else:
+            key = self.getCacheKey(path, width, height, channel)
+            if not key:
+                return
+
+            pendingKey = key
+
+        with self.lock:
+            if key in self.memoryCache:
+                return self.memoryCache[key]
+
+            if pendingKey in self.pending:
+                return
+
+            job = ThumbnailJob(self, pendingKey, key, path, width, height, channel, getPath=getPath)
+            self.pending[pendingKey] = job
+
+        self.pool.start(job)
+
+    @err_catcher(name=__name__)
+    def prefetch(self, paths, width=None, height=None, channel=None, getPath=None):
+        if not self.isEnabled():
+            return
+
+        for path in paths:
+            if getPath:
+                self.requestThumbnail(path, width, height, channel, getPath=getPath)
+            elif path and self.core.media.getUseThumbnailForFile(path):
+                self.requestThumbnail(path, width, height, channel)
+
+    @err_catcher(name=__name__)
+    def cancelPrefetch(self):
+        with self.lock:
+            self.pool.clear()
+            self.pending = {}
+
+    def onJobFinished(self, job, qimg):
+        with self.lock:
+            self.pending.pop(job.pendingKey, None)
+
+
+class ThumbnailJob(QRunnable):
+    def __init__(self, cache, pendingKey, key, path, width, height, channel, getPath=None):
+        super(ThumbnailJob, self).__init__()
+        self.cache = cache
+        self.pendingKey = pendingKey
+        self.key = key
+        self.path = path
+        self.width = width
+        self.height = height
+        self.channel = channel
+        self.getPath = getPath
+
+    def run(self):
+        qimg = None
+        try:
+            if self.getPath:
+                self.path = self.getPath(self.path)
+                if not self.path or not self.cache.core.media.getUseThumbnailForFile(self.path):
+                    self.cache.onJobFinished(self, None)
+                    return
+
+            if callable(self.channel):
+                self.channel = self.channel(self.path)
+                self.key = self.cache.getCacheKey(self.path, self.width, self.height, self.channel)
+
+            if self.key:
+                qimg = self.cache.getCachedImage(self.path, self.width, self.height, self.channel, key=self.key)
+                if qimg is None:
+                    qimg = self.cache.generateImage(self.path, self.width, self.height, self.channel)
+                    self.cache.storeImage(self.path, qimg, self.width, self.height, self.channel, key=self.key)
+        except Exception as e:
+            logger.debug("failed to generate thumbnail: %s - %s" % (self.path, e))
+
+        self.cache.onJobFinished(self, qimg)
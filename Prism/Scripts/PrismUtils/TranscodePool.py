@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import re
+import time
+import heapq
+import logging
+import platform
+import threading
+import subprocess
+
+from qtpy.QtCore import *
+from qtpy.QtGui import *
+from qtpy.QtWidgets import *
+
+from PrismUtils.Decorators import err_catcher
+
+
+logger = logging.getLogger(__name__)
+
+
+class TranscodePool(object):
+    def __init__(self, core):
+        self.core = core
+        # number of ffmpeg processes, which can run at the same time
+        self.maxProcesses = max(1, int(os.getenv("PRISM_TRANSCODE_PROCESSES", str(os.cpu_count() or 2))))
+        self.queue = []
+        self.jobNum = 0
+        self.workers = []
+        self.runningJobs = []
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+
+    @err_catcher(name=__name__)
+    def submit(self, argList, outputpath=None, priority=50, frameCount=None, name=None, callback=None):
+        # queues an ffmpeg command. jobs with a higher priority get started first.
+        # callback gets connected to job.finished before the job is queued, so it can't miss the signal
+        job = TranscodeJob(argList, outputpath=outputpath, priority=priority, frameCount=frameCount, name=name)
+        if callback:
+            job.finished.connect(callback)
+
+        with self.condition:
+            self.jobNum += 1
+            heapq.heappush(self.queue, (-priority, self.jobNum, job))
+            idleWorkers = len(self.workers) - len(self.runningJobs)
+            if idleWorkers < len(self.queue) and len(self.workers) < self.maxProcesses:
+                worker = threading.Thread(target=self.workerLoop, name="PrismTranscode")
+                worker.daemon = True
+                self.workers.append(worker)
+                worker.start()
+
+            self.condition.notify()
+
+        return job
+
+    def workerLoop(self):
+        while True:
+            with self.condition:
+                while not self.queue:
+                    if not self.condition.wait(timeout=30):
+                        if not self.queue:
+                            self.workers.remove(threading.current_thread())
+                            return
+
+                job = heapq.heappop(self.queue)[2]
+                if job.isCanceled():
+                    continue
+
+                self.runningJobs.append(job)
+
+            try:
+                job.run()
+            finally:
+                with self.condition:
+                    self.runningJobs.remove(job)
+
+    @err_catcher(name=__name__)
+    def getJobs(self):
+        with self.lock:
+            return list(self.runningJobs) + [item[2] for item in sorted(self.queue)]
+
+    @err_catcher(name=__name__)
+    def cancelAll(self):
+        for job in self.getJobs():
+            job.cancel()
+
+    @err_catcher(name=__name__)
+    def waitForJobs(self, jobs, timeout=None):
+        start = time.time()
+        for job in jobs:
+            remaining = None
+            if timeout is not None:
+                remaining = max(0, timeout - (time.time() - start))
+
+            if not job.wait(remaining):
+                return False
+
+        return True
+
+
+class TranscodeJob(QObject):
+    progressChanged = Signal(object)
+    finished = Signal(object)
+
+    def __init__(self, argList, outputpath=None, priority=50, frameCount=None, name=None):
+        super(TranscodeJob, self).__init__()
+        self.argList = list(argList)
+        self.outputpath = outputpath
+        self.priority = priority
+        self.frameCount = frameCount
+        self.name = name or outputpath
+        self.duration = None
+        self.state = "queued"
+        self.progress = 0.0
+        self.result = ["", ""]
+        self.process = None
+        self.lock = threading.Lock()
+        self.doneEvent = threading.Event()
+
+    def isCanceled(self):
+        return self.state == "canceled"
+
+    def isDone(self):
+        return self.doneEvent.is_set()
+
+    def succeeded(self):
+        return self.state == "finished"
+
+    def wait(self, timeout=None):
+        return self.doneEvent.wait(timeout)
+
+    def cancel(self):
+        with self.lock:
+            if self.isDone():
+                return
+
+            wasQueued = self.state == "queued"
+            self.state = "canceled"
+            process = self.process
+
+        if process:
+            try:
+                process.terminate()
+            except Exception:
+                pass
+        elif wasQueued:
+            self.finish()
+
+    def getCommand(self):
+        # ffmpeg writes key=value progress blocks to stdout and only errors to stderr
+        return [self.argList[0], "-progress", "pipe:1", "-nostats"] + self.argList[1:]
+
+    def run(self):
+        with self.lock:
+            if self.isCanceled():
+                return
+
+            self.state = "running"
+            logger.debug("Run ffmpeg with this settings: " + str(self.argList))
+            # ffmpeg is started without a shell on all platforms, so that terminate() stops
+            # ffmpeg itself and not only the shell, when the job gets canceled
+            kwargs = {}
+            if platform.system() == "Windows":
+                kwargs["creationflags"] = getattr(subprocess, "CREATE_NO_WINDOW", 0x08000000)
+
+            try:
+                self.process = subprocess.Popen(
+                    self.getCommand(),
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    **kwargs
+                )
+            except Exception as e:
+                self.result = ["", str(e)]
+                self.state = "failed"
+                self.process = None
+
+        if not self.process:
+            self.finish()
+            return
+
+        stderr = []
+        errThread = threading.Thread(target=self.readErrors, args=(stderr,))
+        errThread.daemon = True
+        errThread.start()
+
+        output = []
+        block = {}
+        for line in iter(self.process.stdout.readline, b""):
+            line = line.decode("utf-8", "ignore").strip()
+            if "=" not in line:
+                output.append(line)
+                continue
+
+            key, value = line.split("=", 1)
+            block[key] = value
+            if key == "progress":
+                self.updateProgress(block)
+                block = {}
+
+        self.process.wait()
+        errThread.join()
+        self.result = ["\n".join(output), "".join(stderr)]
+        with self.lock:
+            if self.state != "canceled":
+                self.state = "finished" if self.process.returncode == 0 else "failed"
+
+        self.finish()
+
+    def readErrors(self, stderr):
+        for line in iter(self.process.stderr.readline, b""):
+            line = line.decode("utf-8", "ignore")
+            stderr.append(line)
+            if self.duration is None and "Duration:" in line:
+                match = re.search(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)", line)
+                if match:
+                    hours, minutes, seconds = match.groups()
+                    self.duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    def updateProgress(self, block):
+        progress = None
+        if block.get("progress") == "end":
+            progress = 1.0
+        elif self.frameCount and block.get("frame", "").isdigit():
+            progress = int(block["frame"]) / float(self.frameCount)
+        elif self.duration and block.get("out_time_us", "").lstrip("-").isdigit():
+            progress = int(block["out_time_us"]) / 1000000.0 / self.duration
+
+        if progress is None:
+            return
+
+        self.progress = min(1.0, max(0.0, progress))
+        self.progressChanged.emit(self)
+
+    def finish(self):
+        self.doneEvent.set()
+        self.finished.emit(self)
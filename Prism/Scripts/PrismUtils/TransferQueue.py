@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import time
+import shutil
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from qtpy.QtCore import *
+from qtpy.QtGui import *
+from qtpy.QtWidgets import *
+
+from PrismUtils.Decorators import err_catcher
+
+
+logger = logging.getLogger(__name__)
+
+
+class TransferQueue(object):
+    def __init__(self, core):
+        self.core = core
+        self.maxWorkers = max(1, int(os.getenv("PRISM_TRANSFER_WORKERS", "4")))
+        self.executor = None
+        self.lock = threading.Lock()
+
+    @err_catcher(name=__name__)
+    def getExecutor(self):
+        # the threads are shared by all batches, so concurrent ingests can't oversubscribe the storage
+        with self.lock:
+            if not self.executor:
+                self.executor = ThreadPoolExecutor(max_workers=self.maxWorkers)
+
+        return self.executor
+
+    @err_catcher(name=__name__)
+    def submit(self, transfers, copyStat=False):
+        # transfers is a list of (source, target) tuples. returns the running TransferBatch
+        batch = TransferBatch(self.core, transfers, copyStat=copyStat)
+        batch.start(self.getExecutor())
+        return batch
+
+    @err_catcher(name=__name__)
+    def transfer(self, transfers, text="Copying files - please wait..", popup=True, copyStat=False, raiseErrors=False):
+        # submits the transfers and waits until all of them are done. shows a progress popup
+        # with a cancel button when called from the UI thread
+        batch = TransferBatch(self.core, transfers, copyStat=copyStat)
+        qapp = QApplication.instance()
+        isGuiThread = qapp and qapp.thread() == QThread.currentThread()
+        if popup and self.core.uiAvailable and isGuiThread:
+            msg = self.core.waitPopup(self.core, text + "\n\n\n", allowCancel=True)
+            msg.canceled.connect(batch.cancel)
+            batch.progressChanged.connect(
+                lambda progress: self.core.updateProgressPopup(self.formatProgress(progress), msg)
+            )
+            loop = QEventLoop()
+            batch.finished.connect(loop.quit)
+            with msg:
+                batch.start(self.getExecutor())
+                if not batch.isDone():
+                    loop.exec_()
+        else:
+            batch.start(self.getExecutor())
+            batch.wait()
+
+        if raiseErrors and batch.errors:
+            raise batch.errors[0][2]
+
+        for src, dst, error in batch.errors:
+            msg = "Failed to copy file to:\n%s\n\nError message:%s" % (dst, str(error))
+            if popup:
+                self.core.popup(msg)
+                break
+            else:
+                logger.warning(msg)
+
+        return batch
+
+    @err_catcher(name=__name__)
+    def getCreatedFolder(self, folder):
+        # returns the topmost folder, which doesn't exist yet and gets created, when folder gets created
+        folder = os.path.normpath(folder)
+        if os.path.exists(folder):
+            return
+
+        while not os.path.exists(os.path.dirname(folder)) and os.path.dirname(folder) != folder:
+            folder = os.path.dirname(folder)
+
+        return folder
+
+    @err_catcher(name=__name__)
+    def removeEmptyFolders(self, folder):
+        # removes the folder and its subfolders, as long as they don't contain any files
+        if not folder or not os.path.isdir(folder):
+            return
+
+        for root, dirs, files in os.walk(folder, topdown=False):
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass
+
+        self.core.paths.notifyPathChanged(folder)
+
+    @err_catcher(name=__name__)
+    def formatProgress(self, progress):
+        text = "%s/%s files - %s/%s" % (
+            progress["transferred"],
+            progress["count"],
+            self.formatSize(progress["copied"]),
+            self.formatSize(progress["total"]),
+        )
+        if progress["rate"]:
+            text += " - %s/s" % self.formatSize(progress["rate"])
+
+        if progress["eta"] is not None:
+            text += " - %s remaining" % self.formatDuration(progress["eta"])
+
+        return text
+
+    def formatSize(self, size):
+        for unit in ["B", "KB", "MB", "GB"]:
+            if size < 1024:
+                return "%.1f %s" % (size, unit)
+
+            size /= 1024.0
+
+        return "%.1f TB" % size
+
+    def formatDuration(self, seconds):
+        seconds = int(seconds)
+        if seconds >= 3600:
+            return "%sh %02dm" % (seconds // 3600, (seconds % 3600) // 60)
+        elif seconds >= 60:
+            return "%sm %02ds" % (seconds // 60, seconds % 60)
+        else:
+            return "%ss" % seconds
+
+
+class TransferCanceled(Exception):
+    pass
+
+
+class TransferBatch(QObject):
+    progressChanged = Signal(object)
+    transferFinished = Signal(object)
+    finished = Signal()
+
+    def __init__(self, core, transfers, copyStat=False):
+        super(TransferBatch, self).__init__()
+        self.core = core
+        self.transfers = [(src, dst) for src, dst in transfers]
+        self.copyStat = copyStat
+        self.canceled = False
+        self.errors = []
+        self.results = {}
+        self.replacedTargets = set()
+        self.futures = []
+        self.lock = threading.Lock()
+        self.copied = 0
+        self.total = sum([self.getSize(src) for src, dst in self.transfers])
+        self.startTime = None
+        self.lastProgress = 0
+        self.pending = len(self.transfers)
+        self.doneEvent = threading.Event()
+
+    def getSize(self, path):
+        if os.path.isdir(path):
+            size = 0
+            for root, dirs, files in os.walk(path):
+                for file in files:
+                    try:
+                        size += os.path.getsize(os.path.join(root, file))
+                    except OSError:
+                        pass
+
+            return size
+
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def start(self, executor):
+        self.startTime = time.time()
+        if not self.transfers:
+            self.doneEvent.set()
+            self.finished.emit()
+            return
+
+        for idx, transfer in enumerate(self.transfers):
+            self.futures.append(executor.submit(self.runTransfer, idx, transfer[0], transfer[1]))
+
+    def cancel(self):
+        # queued transfers return immediately and running transfers remove their temporary files
+        self.canceled = True
+
+    def isDone(self):
+        return self.doneEvent.is_set()
+
+    def wait(self, timeout=None):
+        return self.doneEvent.wait(timeout)
+
+    def getTransferredFiles(self):
+        # the targets of all successful transfers in the order they were submitted
+        return [self.results[idx] for idx in sorted(self.results)]
+
+    def rollback(self, createdFolder=None):
+        # removes the files of a finished batch, e.g. after it was canceled. createdFolder is the
+        # folder, which was created for the batch. it gets removed, if nothing else was added to it
+        for dst in self.getTransferredFiles():
+            if dst in self.replacedTargets:
+                # the previous file is gone already, so the new one is kept
+                logger.debug("keeping replaced file: %s" % dst)
+                continue
+
+            try:
+                if os.path.isdir(dst):
+                    shutil.rmtree(dst)
+                else:
+                    os.remove(dst)
+            except OSError as e:
+                logger.warning("failed to remove transferred file: %s - %s" % (dst, e))
+
+        self.results = {}
+        for folder in set([os.path.dirname(dst) for src, dst in self.transfers]):
+            self.core.paths.invalidateDirectoryIndex(folder)
+
+        if createdFolder:
+            self.core.transferQueue.removeEmptyFolders(createdFolder)
+
+    def getProgress(self):
+        with self.lock:
+            copied = self.copied
+            transferred = len(self.results)
+
+        duration = time.time() - (self.startTime or time.time())
+        rate = copied / duration if duration > 0 else 0
+        if rate and self.total:
+            eta = max(self.total - copied, 0) / rate
+        else:
+            eta = None
+
+        progress = {
+            "copied": copied,
+            "total": self.total,
+            "transferred": transferred,
+            "count": len(self.transfers),
+            "rate": rate,
+            "eta": eta,
+        }
+        return progress
+
+    def addCopiedBytes(self, count):
+        with self.lock:
+            self.copied += count
+            now = time.time()
+            if (now - self.lastProgress) < self.core.copyEngine.progressInterval:
+                return
+
+            self.lastProgress = now
+
+        self.progressChanged.emit(self.getProgress())
+
+    def isCanceled(self):
+        return self.canceled
+
+    def copyFile(self, src, dst):
+        # copies to a temporary file next to the target, so that canceled or failed transfers
+        # never leave partial files behind
+        tmpPath = "%s.%s.prismtmp" % (dst, threading.current_thread().ident)
+        progress = {"copied": 0}
+
+        def onProgress(copied, total):
+            self.addCopiedBytes(copied - progress["copied"])
+            progress["copied"] = copied
+
+        try:
+            result = self.core.copyEngine.copyFile(
+                src, tmpPath, progressCallback=onProgress, isCanceled=self.isCanceled
+            )
+            if not result:
+                raise TransferCanceled()
+
+            if self.copyStat:
+                shutil.copystat(src, tmpPath)
+            else:
+                shutil.copymode(src, tmpPath)
+
+            os.replace(tmpPath, dst)
+        except BaseException:
+            try:
+                os.remove(tmpPath)
+            except Exception:
+                pass
+
+            raise
+
+        return dst
+
+    def copyFolder(self, src, dst):
+        try:
+            shutil.copytree(src, dst, copy_function=self.copyFile)
+        except BaseException:
+            if os.path.exists(dst):
+                shutil.rmtree(dst, ignore_errors=True)
+
+            raise
+
+        return dst
+
+    def runTransfer(self, idx, src, dst):
+        try:
+            if self.canceled:
+                return
+
+            if not os.path.exists(os.path.dirname(dst)):
+                try:
+                    os.makedirs(os.path.dirname(dst))
+                except OSError:
+                    if not os.path.isdir(os.path.dirname(dst)):
+                        raise
+
+            existed = os.path.exists(dst)
+            if os.path.isdir(src):
+                self.copyFolder(src, dst)
+            else:
+                self.copyFile(src, dst)
+
+            with self.lock:
+                self.results[idx] = dst
+                if existed:
+                    self.replacedTargets.add(dst)
+
+            logger.debug("transferred %s to %s" % (src, dst))
+            self.transferFinished.emit({"source": src, "target": dst})
+        except TransferCanceled:
+            pass
+        except Exception as e:
+            logger.debug("failed to transfer %s to %s: %s" % (src, dst, e))
+            with self.lock:
+                self.errors.append((src, dst, e))
+        finally:
+            self.onTransferDone()
+
+    def onTransferDone(self):
+        with self.lock:
+            self.pending -= 1
+            done = self.pending <= 0
+
+        if done:
+            for folder in set([os.path.dirname(dst) for src, dst in self.transfers]):
+                self.core.paths.invalidateDirectoryIndex(folder)
+
+            self.doneEvent.set()
+            self.progressChanged.emit(self.getProgress())
+            self.finished.emit()
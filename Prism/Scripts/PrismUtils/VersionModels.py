@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+#
+####################################################
+#
+# PRISM - Pipeline for animation and VFX projects
+#
+# www.prism-pipeline.com
+#
+# contact: contact@prism-pipeline.com
+#
+####################################################
+#
+#
+# Copyright (C) 2016-2023 Richard Frangenberg
+# Copyright (C) 2023 Prism Software GmbH
+#
+# Licensed under GNU LGPL-3.0-or-later
+#
+# This file is part of Prism.
+#
+# Prism is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Prism is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Prism.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import logging
+import threading
+import traceback
+
+from qtpy.QtCore import *
+from qtpy.QtGui import *
+from qtpy.QtWidgets import *
+
+from PrismUtils.Decorators import err_catcher
+
+
+logger = logging.getLogger(__name__)
+
+LocationRole = Qt.UserRole + 1
+
+
+class VersionDataLoader(QObject):
+    dataLoaded = Signal(object)
+
+    def __init__(self, core):
+        super(VersionDataLoader, self).__init__()
+        self.core = core
+        self.pending = {}
+        self.lock = threading.RLock()
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(int(os.getenv("PRISM_VERSION_DATA_THREADS", "4")))
+
+    @err_catcher(name=__name__)
+    def request(self, key, func, *args):
+        # calls func in the thread pool and emits dataLoaded with the key and the result
+        with self.lock:
+            if key in self.pending:
+                return
+
+            job = VersionDataJob(self, key, func, args)
+            self.pending[key] = job
+
+        self.pool.start(job)
+
+    @err_catcher(name=__name__)
+    def isPending(self, key):
+        return key in self.pending
+
+    @err_catcher(name=__name__)
+    def cancel(self):
+        with self.lock:
+            self.pool.clear()
+            self.pending = {}
+
+    def onJobFinished(self, job, data):
+        with self.lock:
+            if self.pending.get(job.key) is not job:
+                return
+
+            self.pending.pop(job.key)
+
+        self.dataLoaded.emit({"key": job.key, "data": data})
+
+
+class VersionDataJob(QRunnable):
+    def __init__(self, loader, key, func, args):
+        super(VersionDataJob, self).__init__()
+        self.loader = loader
+        self.key = key
+        self.func = func
+        self.args = args
+
+    def run(self):
+        data = None
+        try:
+            data = self.func(*self.args)
+        except Exception:
+            logger.debug("failed to load version data: %s" % traceback.format_exc())
+
+        self.loader.onJobFinished(self, data)
+
+
+class VersionTableModel(QAbstractTableModel):
+    rowLoaded = Signal(object)
+
+    def __init__(self, core, loadFunc, parent=None):
+        super(VersionTableModel, self).__init__(parent)
+        self.core = core
+        # loadFunc gets called with the version of a row in a worker thread and returns the data of
+        # the expensive columns or {"valid": False}, if the version should be hidden
+        self.loadFunc = loadFunc
+        self.labels = []
+        self.columns = []
+        self.eagerKeys = ["version", "versionName"]
+        self.syncKeys = ["path"]
+        self.userRoleKeys = {"versionName": "data", "locations": "locationData"}
+        self.leftAlignedKeys = ["path"]
+        self.formatters = {}
+        self.allRows = []
+        self.rows = []
+        self.rowPositions = {}
+        self.generation = 0
+        self.sortColumn = 0
+        self.sortOrder = Qt.DescendingOrder
+        self.sortPending = False
+        self.requestedRows = []
+        self.loader = VersionDataLoader(core)
+        self.loader.dataLoaded.connect(self.onDataLoaded)
+        self.requestTimer = QTimer(self)
+        self.requestTimer.setSingleShot(True)
+        self.requestTimer.setInterval(0)
+        self.requestTimer.timeout.connect(self.flushRequests)
+        self.cleanupTimer = QTimer(self)
+        self.cleanupTimer.setSingleShot(True)
+        self.cleanupTimer.setInterval(0)
+        self.cleanupTimer.timeout.connect(self.removeInvalidRows)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and section < len(self.labels):
+            return self.labels[section]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return
+
+        row = self.rows[index.row()]
+        key = self.columns[index.column()]
+        if role == Qt.DisplayRole:
+            if key in self.syncKeys:
+                self.loadRow(row)
+            elif not row["loaded"] and key not in self.eagerKeys:
+                self.requestRow(row)
+
+            return self.getDisplayValue(row, key)
+        elif role == Qt.UserRole:
+            if key not in self.userRoleKeys:
+                return
+
+            self.loadRow(row)
+            return row.get(self.userRoleKeys[key])
+        elif role == LocationRole:
+            return row.get("locations") or []
+        elif role == Qt.ToolTipRole:
+            if key == "locations" and row.get("locations"):
+                return "Version exists in %s" % ", ".join(row["locations"])
+        elif role == Qt.TextAlignmentRole:
+            if key not in self.leftAlignedKeys:
+                return int(Qt.AlignCenter)
+
+    def getDisplayValue(self, row, key):
+        value = row.get(key)
+        if key in self.formatters and value is not None:
+            return self.formatters[key](value)
+
+        if isinstance(value, list):
+            return ", ".join(value)
+
+        return value
+
+    @err_catcher(name=__name__)
+    def setColumns(self, labels, keys):
+        self.beginResetModel()
+        self.labels = list(labels)
+        self.columns = list(keys)
+        self.sortColumn = min(self.sortColumn, max(0, len(self.columns) - 1))
+        self.endResetModel()
+
+    @err_catcher(name=__name__)
+    def setRows(self, rows):
+        # rows are dicts with the version and the values of the eager columns. all other
+        # columns get loaded, when a view requests them for the first time
+        self.beginResetModel()
+        self.generation += 1
+        self.loader.cancel()
+        self.requestedRows = []
+        self.sortPending = False
+        self.allRows = []
+        for idx, row in enumerate(rows):
+            row["id"] = idx
+            row.setdefault("loaded", False)
+            row.setdefault("valid", True)
+            self.allRows.append(row)
+
+        self.rows = self.getValidRows()
+        self.sortRows()
+        self.endResetModel()
+
+    @err_catcher(name=__name__)
+    def getRow(self, position, load=True):
+        if position < 0 or position >= len(self.rows):
+            return
+
+        row = self.rows[position]
+        if load:
+            self.loadRow(row)
+
+        return row
+
+    @err_catcher(name=__name__)
+    def getRows(self):
+        return self.rows
+
+    @err_catcher(name=__name__)
+    def isLoaded(self):
+        return all(row["loaded"] for row in self.allRows)
+
+    def requestRow(self, row):
+        if row in self.requestedRows or self.loader.isPending((self.generation, row["id"])):
+            return
+
+        self.requestedRows.append(row)
+        self.requestTimer.start()
+
+    @err_catcher(name=__name__)
+    def requestAllRows(self):
+        for row in self.allRows:
+            if not row["loaded"]:
+                self.requestRow(row)
+
+    @err_catcher(name=__name__)
+    def flushRequests(self):
+        rows = self.requestedRows
+        self.requestedRows = []
+        for row in rows:
+            if not row["loaded"]:
+                self.loader.request((self.generation, row["id"]), self.loadFunc, row["version"])
+
+    @err_catcher(name=__name__)
+    def loadRow(self, row):
+        # loads a row synchronously, when its data is needed right away, e.g. for the selection
+        if row["loaded"]:
+            return row
+
+        self.applyRowData(row, self.loadFunc(row["version"]))
+        return row
+
+    @err_catcher(name=__name__)
+    def onDataLoaded(self, result):
+        generation, rowId = result["key"]
+        if generation != self.generation or rowId >= len(self.allRows):
+            return
+
+        row = self.allRows[rowId]
+        if row["loaded"]:
+            return
+
+        self.applyRowData(row, result["data"])
+        if self.sortPending and self.isLoaded():
+            self.sortPending = False
+            self.sort(self.sortColumn, self.sortOrder)
+
+    @err_catcher(name=__name__)
+    def applyRowData(self, row, data):
+        row.update(data or {})
+        row["loaded"] = True
+        self.rowLoaded.emit(row)
+        if not row["valid"]:
+            self.cleanupTimer.start()
+
+        position = self.rowPositions.get(row["id"])
+        if position is not None:
+            self.dataChanged.emit(self.index(position, 0), self.index(position, len(self.columns) - 1))
+
+    @err_catcher(name=__name__)
+    def removeInvalidRows(self):
+        for position in reversed(range(len(self.rows))):
+            if self.rows[position]["valid"]:
+                continue
+
+            self.beginRemoveRows(QModelIndex(), position, position)
+            del self.rows[position]
+            self.endRemoveRows()
+
+        self.updateRowPositions()
+
+    @err_catcher(name=__name__)
+    def getValidRows(self):
+        return [row for row in self.allRows if row["valid"]]
+
+    def getSortValue(self, row, key):
+        value = row.get(key + "SortKey", row.get(key))
+        if value is None:
+            return (True, "")
+
+        if isinstance(value, list):
+            value = ", ".join(value)
+
+        return (self.core.isStr(value), value)
+
+    @err_catcher(name=__name__)
+    def sortRows(self):
+        if not self.columns:
+            self.updateRowPositions()
+            return
+
+        key = self.columns[self.sortColumn]
+        self.rows.sort(key=lambda row: self.getSortValue(row, key), reverse=self.sortOrder == Qt.DescendingOrder)
+        self.updateRowPositions()
+
+    def updateRowPositions(self):
+        self.rowPositions = dict([(row["id"], position) for position, row in enumerate(self.rows)])
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column < 0 or column >= len(self.columns):
+            return
+
+        self.sortColumn = column
+        self.sortOrder = order
+        if self.columns[column] not in self.eagerKeys and not self.isLoaded():
+            # sorting by a lazy column needs the data of all rows. the rows get sorted again,
+            # when everything is loaded
+            self.sortPending = True
+            self.requestAllRows()
+
+        self.layoutAboutToBeChanged.emit()
+        persistentIndexes = self.persistentIndexList()
+        persistentRows = [(self.rows[idx.row()]["id"], idx.column()) for idx in persistentIndexes]
+        self.sortRows()
+        newIndexes = [self.index(self.rowPositions[rowId], column) for rowId, column in persistentRows]
+        self.changePersistentIndexList(persistentIndexes, newIndexes)
+        self.layoutChanged.emit()
+
+
+class LocationDelegate(QStyledItemDelegate):
+    # draws an icon for every location, in which a version exists
+    def __init__(self, getIcon, parent=None):
+        super(LocationDelegate, self).__init__(parent)
+        self.getIcon = getIcon
+
+    def paint(self, painter, option, index):
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        locations = index.data(LocationRole) or []
+        icons = [self.getIcon(location) for location in locations]
+        useIcons = bool(icons) and all(icons)
+        if useIcons:
+            opt.text = ""
+
+        style = opt.widget.style() if opt.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ItemViewItem, opt, painter, opt.widget)
+        if not useIcons:
+            return
+
+        size = 18
+        spacing = 4
+        left = opt.rect.center().x() - (len(icons) * (size + spacing)) / 2
+        top = opt.rect.center().y() - size / 2
+        painter.setRenderHint(QPainter.Antialiasing)
+        for idx, icon in enumerate(icons):
+            rect = QRect(int(left + idx * (size + spacing) + spacing / 2), int(top), size, size)
+            icon.paint(painter, rect)
@@ -65,6 +65,8 @@ class DependencyViewer(QDialog, DependencyViewer_ui.Ui_dlg_DependencyViewer):
         self.tw_dependencies.header().setSectionResizeMode(1, QHeaderView.Fixed)
 
         self.dependencies = {}
+        self.unloadedItems = {}
+        self.ignore = []
         self.connectEvents()
         self.setRoot(depRoot)
 
@@ -92,11 +94,15 @@ class DependencyViewer(QDialog, DependencyViewer_ui.Ui_dlg_DependencyViewer):
             rootName = self.core.getConfig("filename", configPath=self.depRoot)
 
         self.l_root.setText(rootName)
+        self.clearItem(self.tw_dependencies.invisibleRootItem())
+        self.dependencies = {}
+        self.unloadedItems = {}
         self.updateDependencies("0", self.depRoot)
 
     @err_catcher(name=__name__)
     def connectEvents(self):
         self.e_search.textChanged.connect(self.filterDeps)
+        self.tw_dependencies.itemExpanded.connect(self.onItemExpanded)
         self.tw_dependencies.mouseClickEvent = self.tw_dependencies.mouseReleaseEvent
         self.tw_dependencies.mouseReleaseEvent = lambda x: self.mouseClickEvent(
             x, "deps"
@@ -149,47 +155,24 @@ class DependencyViewer(QDialog, DependencyViewer_ui.Ui_dlg_DependencyViewer):
 
     @err_catcher(name=__name__)
     def updateDependencies(self, depID, versionInfo, ignore=None):
-        ignore = ignore or []
-        source = self.core.getConfig("source scene", configPath=versionInfo)
-        if not source:
-            source = self.core.getConfig("sourceScene", configPath=versionInfo)
-
-        deps = (
-            self.core.getConfig("dependencies", configPath=versionInfo)
-            or []
-        )
-        extFiles = (
-            self.core.getConfig("externalFiles", configPath=versionInfo)
-            or []
-        )
-
-        if source is not None:
-            deps.append(source)
+        # adds the direct dependencies of a versioninfo. the dependencies of the children get
+        # loaded when they get expanded
+        if ignore is None:
+            ignore = self.ignore = []
 
         if depID == "0":
             depItem = self.tw_dependencies.invisibleRootItem()
         else:
             depItem = self.dependencies[depID][1]
 
-        for i in deps:
-            if sys.version[0] == "2":
-                existText = unicode("█", "utf-8")
-            else:
-                existText = "█"
-
-            depPath = i
-            if depPath in ignore:
-                continue
-
-            ignore.append(depPath)
-
-            if not os.path.exists(i):
-                depDir = os.path.dirname(i)
-                if os.path.exists(depDir) and len(os.listdir(depDir)) > 0:
-                    depPath = depDir
+        if sys.version[0] == "2":
+            existText = unicode("█", "utf-8")
+        else:
+            existText = "█"
 
-            if os.path.exists(depPath):
-                cdate = datetime.datetime.fromtimestamp(os.path.getmtime(depPath))
+        for entry in self.core.dependencyGraph.getChildren(versionInfo, ignore=ignore):
+            if entry["exists"]:
+                cdate = datetime.datetime.fromtimestamp(entry["date"])
                 cdate = cdate.replace(microsecond=0)
                 date = cdate.strftime("%d.%m.%y,  %X")
                 existColor = QColor(0, 255, 0)
@@ -197,66 +180,48 @@ class DependencyViewer(QDialog, DependencyViewer_ui.Ui_dlg_DependencyViewer):
                 date = ""
                 existColor = QColor(255, 0, 0)
 
-            if i == source:
-                dType = "Source Scene"
-            else:
-                dType = "Export"
-
+            i = entry["path"]
             item = QTreeWidgetItem(
-                [os.path.basename(i), existText, dType, date, i.replace("\\", "/")]
+                [os.path.basename(i), existText, entry["type"], date, i.replace("\\", "/")]
             )
 
             item.setForeground(1, existColor)
-
             depItem.addChild(item)
-            curID = str(len(self.dependencies) + 1)
 
+            curID = str(len(self.dependencies) + 1)
             self.dependencies[curID] = [i, item, depID]
+            item.setData(0, Qt.UserRole, curID)
+
+            if entry["type"] == "File":
+                continue
 
             iFont = item.font(0)
             iFont.setBold(True)
             item.setFont(0, iFont)
-            depInfo = os.path.join(
-                os.path.dirname(i), "versioninfo" + self.core.configs.getProjectExtension()
-            )
-            self.core.configs.findDeprecatedConfig(depInfo)
-            if not os.path.exists(depInfo):
-                depInfo = os.path.join(
-                    os.path.dirname(os.path.dirname(i)),
-                    "versioninfo" + self.core.configs.getProjectExtension(),
-                )
-                self.core.configs.findDeprecatedConfig(depInfo)
-
-            if os.path.exists(depInfo):
-                self.updateDependencies(curID, depInfo, ignore=ignore)
-
-        for i in extFiles:
-            if i in deps:
-                continue
-
-            if sys.version[0] == "2":
-                existText = unicode("█", "utf-8")
-            else:
-                existText = "█"
+            if entry["infoPath"]:
+                self.unloadedItems[curID] = entry["infoPath"]
+                item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
 
-            if os.path.exists(i):
-                cdate = datetime.datetime.fromtimestamp(os.path.getmtime(i))
-                cdate = cdate.replace(microsecond=0)
-                date = cdate.strftime("%d.%m.%y,  %X")
-                existColor = QColor(0, 255, 0)
-            else:
-                date = ""
-                existColor = QColor(255, 0, 0)
+    @err_catcher(name=__name__)
+    def onItemExpanded(self, item):
+        self.loadItem(item.data(0, Qt.UserRole))
 
-            item = QTreeWidgetItem(
-                [os.path.basename(i), existText, "File", date, i.replace("\\", "/")]
-            )
+    @err_catcher(name=__name__)
+    def loadItem(self, depID):
+        infoPath = self.unloadedItems.pop(depID, None)
+        if not infoPath:
+            return
 
-            item.setForeground(1, existColor)
-            depItem.addChild(item)
+        self.updateDependencies(depID, infoPath, ignore=self.ignore)
+        item = self.dependencies[depID][1]
+        if not item.childCount():
+            item.setChildIndicatorPolicy(QTreeWidgetItem.DontShowIndicatorWhenChildless)
 
-            curID = str(len(self.dependencies) + 1)
-            self.dependencies[curID] = [i, item, depID]
+    @err_catcher(name=__name__)
+    def loadAll(self):
+        while self.unloadedItems:
+            for depID in list(self.unloadedItems):
+                self.loadItem(depID)
 
     @err_catcher(name=__name__)
     def filterDeps(self, filterStr):
@@ -264,8 +229,11 @@ class DependencyViewer(QDialog, DependencyViewer_ui.Ui_dlg_DependencyViewer):
 
         if filterStr == "":
             self.dependencies = {}
+            self.unloadedItems = {}
             self.updateDependencies("0", self.depRoot)
         else:
+            # searching needs the whole tree
+            self.loadAll()
             for i in self.dependencies:
                 if filterStr.lower() in self.dependencies[i][0].lower():
                     depID = i
@@ -34,6 +34,7 @@
 
 import os
 import sys
+import time
 import logging
 from collections import OrderedDict
 
@@ -423,11 +424,35 @@ class EntityPage(QWidget):
 
         self.filteredAssets = []
         if self.e_search.isVisible() and self.e_search.text():
+            filterStr = self.e_search.text()
+            self.streamedAssetItems = {}
+            streamedAssets = []
+            walked = []
+            lastUpdate = [time.time()]
+
+            def onFolderFound(path, folderType):
+                # shows the matching assets while the rest of the asset tree is still being searched
+                walked.append(path)
+                if folderType != "asset" or not self.core.entities.filterAssets([path], filterStr):
+                    return
+
+                streamedAssets.append(path)
+                self.addStreamedAssetItem(path)
+                if (time.time() - lastUpdate[0]) > 0.1:
+                    lastUpdate[0] = time.time()
+                    QApplication.processEvents(QEventLoop.ExcludeUserInputEvents)
+
             assets, folders = self.core.entities.getAssetPaths(
-                returnFolders=True, depth=0
+                returnFolders=True, depth=0, callback=onFolderFound
             )
-            filterStr = self.e_search.text()
-            self.filteredAssets += self.core.entities.filterAssets(assets, filterStr)
+            if walked:
+                self.filteredAssets += streamedAssets
+                self.tw_tree.clear()
+            else:
+                # the paths came from the catalog, so no folders were walked
+                self.filteredAssets += self.core.entities.filterAssets(assets, filterStr)
+
+            self.streamedAssetItems = {}
             assetFolders = []
             for fasset in self.filteredAssets:
                 fasset = os.path.dirname(fasset)
@@ -449,6 +474,28 @@ class EntityPage(QWidget):
             self.tw_tree.blockSignals(False)
             self.itemChanged.emit(self.tw_tree.currentItem())
 
+    @err_catcher(name=__name__)
+    def addStreamedAssetItem(self, path):
+        # temporary items for search results, which get replaced by the sorted tree after the search
+        relPath = self.core.entities.getAssetRelPathFromPath(path).replace("\\", "/")
+        parent = None
+        curPath = ""
+        for name in relPath.split("/"):
+            curPath = name if not curPath else curPath + "/" + name
+            item = self.streamedAssetItems.get(curPath)
+            if not item:
+                item = QTreeWidgetItem([name, name])
+                item.setIcon(0, self.assetIcon if curPath == relPath else self.folderIcon)
+                if parent:
+                    parent.addChild(item)
+                    parent.setExpanded(True)
+                else:
+                    self.tw_tree.addTopLevelItem(item)
+
+                self.streamedAssetItems[curPath] = item
+
+            parent = item
+
     @err_catcher(name=__name__)
     def refreshAssets(self, path=None, parent=None, refreshChildren=True):
         if not path:
@@ -52,6 +52,7 @@ from qtpy.QtWidgets import *
 
 from PrismUtils import PrismWidgets, ProjectWidgets
 from PrismUtils.Decorators import err_catcher
+from PrismUtils.VersionModels import VersionDataLoader
 from UserInterfaces import MediaBrowser_ui
 
 
@@ -76,6 +77,16 @@ class MediaBrowser(QWidget, MediaBrowser_ui.Ui_w_mediaBrowser):
 
         self.initialized = False
         self.closeParm = "closeafterload"
+        self.thumbnailPrefetchTimer = QTimer(self)
+        self.thumbnailPrefetchTimer.setSingleShot(True)
+        self.thumbnailPrefetchTimer.setInterval(200)
+        self.versionDataLoader = VersionDataLoader(self.core)
+        self.versionItems = []
+        self.loadedVersionItems = set()
+        self.versionDataGeneration = 0
+        self.versionDataTimer = QTimer(self)
+        self.versionDataTimer.setSingleShot(True)
+        self.versionDataTimer.setInterval(50)
         self.loadLayout()
         self.connectEvents()
         self.core.callback(name="onMediaBrowserOpen", args=[self])
@@ -216,6 +227,11 @@ class MediaBrowser(QWidget, MediaBrowser_ui.Ui_w_mediaBrowser):
         self.lw_version.mmEvent = self.lw_version.mouseMoveEvent
         self.lw_version.mouseMoveEvent = lambda x: self.w_preview.mediaPlayer.mouseDrag(x, self.lw_version)
         self.lw_version.itemDoubleClicked.connect(self.onVersionDoubleClicked)
+        self.lw_version.verticalScrollBar().valueChanged.connect(self.thumbnailPrefetchTimer.start)
+        self.thumbnailPrefetchTimer.timeout.connect(self.prefetchVisibleThumbnails)
+        self.lw_version.verticalScrollBar().valueChanged.connect(self.versionDataTimer.start)
+        self.versionDataTimer.timeout.connect(self.loadVisibleVersionData)
+        self.versionDataLoader.dataLoaded.connect(self.onVersionDataLoaded)
         self.tw_identifier.customContextMenuRequested.connect(
             lambda x: self.rclList(x, self.tw_identifier)
         )
@@ -311,6 +327,7 @@ class MediaBrowser(QWidget, MediaBrowser_ui.Ui_w_mediaBrowser):
         if not items:
             return
 
+        self.loadVersionItem(items[0])
         return items[0].data(Qt.UserRole)
 
     @err_catcher(name=__name__)
@@ -319,6 +336,9 @@ class MediaBrowser(QWidget, MediaBrowser_ui.Ui_w_mediaBrowser):
         if not items:
             return []
 
+        for item in items:
+            self.loadVersionItem(item)
+
         versions = [item.data(Qt.UserRole) for item in items]
         return versions
 
@@ -454,6 +474,10 @@ class MediaBrowser(QWidget, MediaBrowser_ui.Ui_w_mediaBrowser):
             self.lw_version.blockSignals(True)
         
         self.lw_version.clear()
+        self.versionDataLoader.cancel()
+        self.versionDataGeneration += 1
+        self.versionItems = []
+        self.loadedVersionItems = set()
         selectFirst = True
         identifier = self.getCurrentIdentifier()
         if len(self.tw_identifier.selectedItems()) == 1 and identifier:
@@ -461,39 +485,16 @@ class MediaBrowser(QWidget, MediaBrowser_ui.Ui_w_mediaBrowser):
             versions = self.core.mediaProducts.getVersionsFromIdentifier(
                 identifier=identifier, locations=[location]
             )
-            locs = self.core.paths.getRenderProductBasePaths()
             for version in sorted(versions, key=self.sortVersions, reverse=True):
-                if version["version"] == "master":
-                    versionName = self.core.mediaProducts.getMasterVersionLabel(version["path"])
-                else:
-                    versionName = version["version"]
-
-                vdata = self.core.paths.getRenderProductData(version["path"], isFilepath=False, addPathData=False, mediaType="3drenders", validateModTime=False)
-                if "project_path" in vdata:
-                    del vdata["project_path"]
-
-                comment = vdata.get("comment")
-                if comment:
-                    versionName += " - " + comment
-
                 versionData = version.copy()
-                if versionData["version"] == "master":
-                    vdata["version"] = "master"
-
-                locs = versionData["locations"]
-                versionData.update(vdata)
-                versionData["locations"] = locs
-                if len(locs) > 1 or len(versionData.get("locations", {})) > 1 or ("global" not in versionData.get("locations", {})):
-                    locStr = ", ".join([loc for loc in versionData.get("locations", {}) if ((loc and loc != "global") or len(versionData.get("locations", {})) > 1)])
-                    if locStr:
-                        versionName += " (%s)" % locStr
-
+                versionName = version["version"] + self.getVersionLocationLabel(versionData)
                 item = QListWidgetItem(versionName)
                 item.setData(Qt.UserRole, versionData)
-                if len(locs) > 1:
+                if len(versionData["locations"]) > 1:
                     item.setToolTip(", ".join(versionData.get("locations", {})))
 
                 self.lw_version.addItem(item)
+                self.versionItems.append((item, version))
 
                 if restoreSelection and curVersion:
                     if curVersion == version["version"]:
@@ -507,6 +508,151 @@ class MediaBrowser(QWidget, MediaBrowser_ui.Ui_w_mediaBrowser):
             self.lw_version.blockSignals(False)
             self.versionClicked()
 
+        self.versionDataTimer.start()
+        self.thumbnailPrefetchTimer.start()
+
+    @err_catcher(name=__name__)
+    def getVersionLocationLabel(self, versionData):
+        locs = versionData.get("locations", {})
+        if len(locs) > 1 or ("global" not in locs):
+            locStr = ", ".join([loc for loc in locs if ((loc and loc != "global") or len(locs) > 1)])
+            if locStr:
+                return " (%s)" % locStr
+
+        return ""
+
+    def getVersionItemData(self, version):
+        # runs in a worker thread of the version data loader
+        if version["version"] == "master":
+            versionName = self.core.mediaProducts.getMasterVersionLabel(version["path"])
+        else:
+            versionName = version["version"]
+
+        vdata = self.core.paths.getRenderProductData(version["path"], isFilepath=False, addPathData=False, mediaType="3drenders", validateModTime=False)
+        if "project_path" in vdata:
+            del vdata["project_path"]
+
+        comment = vdata.get("comment")
+        if comment:
+            versionName += " - " + comment
+
+        versionData = version.copy()
+        if versionData["version"] == "master":
+            vdata["version"] = "master"
+
+        locs = versionData["locations"]
+        versionData.update(vdata)
+        versionData["locations"] = locs
+        versionName += self.getVersionLocationLabel(versionData)
+        return {"name": versionName, "data": versionData}
+
+    @err_catcher(name=__name__)
+    def loadVisibleVersionData(self):
+        # the render product data gets loaded in the background for the visible versions only
+        viewRect = self.lw_version.viewport().rect()
+        for idx, itemData in enumerate(self.versionItems):
+            if idx in self.loadedVersionItems:
+                continue
+
+            item, version = itemData
+            if not self.lw_version.visualItemRect(item).intersects(viewRect):
+                continue
+
+            self.versionDataLoader.request((self.versionDataGeneration, idx), self.getVersionItemData, version)
+
+    @err_catcher(name=__name__)
+    def loadVersionItem(self, item):
+        # loads the data of a version synchronously, when it's needed right away
+        idx = self.lw_version.row(item)
+        if idx < 0 or idx >= len(self.versionItems) or idx in self.loadedVersionItems:
+            return
+
+        self.applyVersionItemData(idx, self.getVersionItemData(self.versionItems[idx][1]))
+
+    @err_catcher(name=__name__)
+    def onVersionDataLoaded(self, result):
+        generation, idx = result["key"]
+        if generation != self.versionDataGeneration or idx in self.loadedVersionItems:
+            return
+
+        self.applyVersionItemData(idx, result["data"])
+
+    @err_catcher(name=__name__)
+    def applyVersionItemData(self, idx, data):
+        self.loadedVersionItems.add(idx)
+        if not data:
+            return
+
+        item = self.versionItems[idx][0]
+        item.setText(data["name"])
+        item.setData(Qt.UserRole, data["data"])
+
+    @err_catcher(name=__name__)
+    def getPreviewFileFromVersion(self, version):
+        aovs = self.core.mediaProducts.getAOVsFromVersion(version)
+        context = version
+        if aovs:
+            aovNames = [aov["aov"] for aov in aovs]
+            for name in ["beauty", "rgba"]:
+                if name in aovNames:
+                    context = aovs[aovNames.index(name)]
+                    break
+            else:
+                context = aovs[0]
+
+        mediaFiles = self.core.mediaProducts.getFilesFromContext(context)
+        validFiles = self.core.media.filterValidMediaFiles(mediaFiles)
+        if not validFiles:
+            return
+
+        seqFiles = list(self.core.media.detectSequences(validFiles).values())
+        if seqFiles:
+            validFiles = seqFiles[0]
+
+        validFiles = sorted(validFiles, key=lambda x: x if "cryptomatte" not in os.path.basename(x) else "zzz" + x)
+        return validFiles[0]
+
+    @err_catcher(name=__name__)
+    def getPreviewChannel(self, path):
+        if os.getenv("PRISM_SHOW_EXR_LAYERS") == "0":
+            return
+
+        layers = self.core.media.getLayersFromFile(path)
+        if layers:
+            return layers[0]
+
+    @err_catcher(name=__name__)
+    def prefetchVisibleThumbnails(self):
+        # generates the preview thumbnails of the visible versions in the background
+        mediaPlayer = self.w_preview.mediaPlayer
+        if mediaPlayer.state == "disabled" or not self.isVisible():
+            return
+
+        thumbnailCache = self.core.media.getThumbnailCache()
+        if not thumbnailCache.isEnabled():
+            return
+
+        thumbnailCache.cancelPrefetch()
+        viewRect = self.lw_version.viewport().rect()
+        versions = []
+        for idx in range(self.lw_version.count()):
+            item = self.lw_version.item(idx)
+            if not self.lw_version.visualItemRect(item).intersects(viewRect):
+                continue
+
+            version = item.data(Qt.UserRole)
+            if version:
+                versions.append(version)
+
+        # the preview files get resolved in the worker threads, because that requires file system access
+        thumbnailCache.prefetch(
+            versions,
+            width=mediaPlayer.getThumbnailWidth(),
+            height=mediaPlayer.getThumbnailHeight(),
+            channel=self.getPreviewChannel,
+            getPath=self.getPreviewFileFromVersion,
+        )
+
     @err_catcher(name=__name__)
     def getSelectedContexts(self):
         contexts = []
@@ -514,6 +660,8 @@ class MediaBrowser(QWidget, MediaBrowser_ui.Ui_w_mediaBrowser):
             contexts = self.tw_identifier.selectedItems()
         elif len(self.lw_version.selectedItems()) > 1:
             contexts = self.lw_version.selectedItems()
+            for item in contexts:
+                self.loadVersionItem(item)
         else:
             data = self.getCurrentFilelayer()
             if not data:
@@ -523,6 +671,7 @@ class MediaBrowser(QWidget, MediaBrowser_ui.Ui_w_mediaBrowser):
                     if not data:
                         items = self.lw_version.selectedItems()
                         if items:
+                            self.loadVersionItem(items[0])
                             data = items[0].data(Qt.UserRole)
 
             if data:
@@ -633,6 +782,7 @@ class MediaBrowser(QWidget, MediaBrowser_ui.Ui_w_mediaBrowser):
 
     @err_catcher(name=__name__)
     def showVersionInfoForItem(self, item):
+        self.loadVersionItem(item)
         context = item.data(Qt.UserRole)
         self.showVersionInfo(context)
 
@@ -1818,6 +1968,7 @@ class MediaPlayer(QWidget):
         self.videoReaders = {}
         self.currentMediaPreview = None
         self.mediaThreads = []
+        self.conversionJobs = []
         self.timeline = None
         self.tlPaused = False
         self.seq = []
@@ -3090,18 +3241,43 @@ class MediaPlayer(QWidget):
             conversionSettings["-start_number"] = None
             conversionSettings["-start_number_out"] = None
 
-        result = self.core.media.convertMedia(
-            inputpath, startNum, outputpath, settings=conversionSettings
+        frameCount = None
+        if self.prvIsSequence and self.pstart != "?" and self.pend != "?":
+            frameCount = int(self.pend) - int(self.pstart) + 1
+
+        # the conversion runs in the transcode pool, so the UI stays responsive and
+        # multiple conversions can run at the same time. finished gets emitted from a worker
+        # thread, so onConversionFinished runs in the event loop after this function returned
+        job = self.core.media.convertMediaAsync(
+            inputpath,
+            startNum,
+            outputpath,
+            settings=conversionSettings,
+            frameCount=frameCount,
+            callback=self.onConversionFinished,
         )
+        if not job:
+            return
 
         if (
             extension not in self.core.media.videoFormats
             and self.prvIsSequence
         ):
-            outputpath = outputpath % int(startNum)
+            job.outputpath = outputpath % int(startNum)
+
+        self.conversionJobs.append(job)
+
+    @err_catcher(name=__name__)
+    def onConversionFinished(self, job):
+        if job in self.conversionJobs:
+            self.conversionJobs.remove(job)
+
+        if job.isCanceled():
+            return
 
         self.origin.updateVersions(restoreSelection=True)
 
+        outputpath = job.outputpath
         if os.path.exists(outputpath) and os.stat(outputpath).st_size > 0:
             self.core.copyToClipboard(outputpath, file=True)
             msg = "The images were converted successfully. (path is in clipboard)"
@@ -3109,7 +3285,7 @@ class MediaPlayer(QWidget):
         else:
             msg = "The images could not be converted."
             logger.debug("expected outputpath: %s" % outputpath)
-            self.core.ffmpegError("Image conversion", msg, result)
+            self.core.ffmpegError("Image conversion", msg, job.result)
 
     @err_catcher(name=__name__)
     def compGetImportSource(self):
@@ -33,7 +33,6 @@
 
 
 import os
-import sys
 import shutil
 import logging
 
@@ -43,6 +42,7 @@ from qtpy.QtWidgets import *
 
 from PrismUtils import PrismWidgets, ProjectWidgets
 from PrismUtils.Decorators import err_catcher
+from PrismUtils.VersionModels import VersionTableModel, LocationDelegate
 from UserInterfaces import ProductBrowser_ui
 
 
@@ -69,8 +69,18 @@ class ProductBrowser(QDialog, ProductBrowser_ui.Ui_dlg_ProductBrowser):
         self.autoClose = True
         self.handleImport = True
         self.versionLabels = ["Version", "Comment", "Type", "User", "Date", "Path"]
+        self.versionKeys = {
+            "Version": "versionName",
+            "Comment": "comment",
+            "Type": "type",
+            "Location": "locations",
+            "User": "user",
+            "Size": "size",
+            "Date": "date",
+            "Path": "path",
+        }
+        self.showFileSizes = False
         self.initialized = False
-        self.prevDelIdx = None
 
         self.loadLayout()
         self.connectEvents()
@@ -168,6 +178,16 @@ class ProductBrowser(QDialog, ProductBrowser_ui.Ui_dlg_ProductBrowser):
             if "productsSplitter1" in brsData:
                 self.splitter1.setSizes(brsData["productsSplitter1"])
 
+        self.versionModel = VersionTableModel(self.core, self.getVersionRowData, parent=self)
+        self.versionModel.formatters["size"] = lambda size: "%.2f mb" % size
+        self.versionModel.rowLoaded.connect(self.onVersionRowLoaded)
+        self.tw_versions.setModel(self.versionModel)
+        # only the visible rows are used to resize the columns, so that rows get loaded lazily
+        self.tw_versions.horizontalHeader().setResizeContentsPrecision(0)
+        self.dateDelegate = DateDelegate()
+        self.dateDelegate.core = self.core
+        self.locationDelegate = LocationDelegate(self.getLocationIcon, self.tw_versions)
+
         self.tw_versions.setAcceptDrops(True)
         self.tw_versions.dragEnterEvent = self.productDragEnterEvent
         self.tw_versions.dragMoveEvent = self.productDragMoveEvent
@@ -190,18 +210,17 @@ class ProductBrowser(QDialog, ProductBrowser_ui.Ui_dlg_ProductBrowser):
             self.tw_versions.horizontalHeader().sortIndicatorOrder(),
         ]
 
-        self.tw_versions.setColumnCount(len(self.versionLabels))
-        self.tw_versions.setHorizontalHeaderLabels(self.versionLabels)
-        delegate = DateDelegate()
-        delegate.core = self.core
-        idx = self.versionLabels.index("Date")
-        if self.prevDelIdx is not None and idx != self.prevDelIdx:
-            self.tw_versions.setItemDelegateForColumn(self.prevDelIdx, self.prevDel)
-
-        self.prevDel = self.tw_versions.itemDelegateForColumn(idx)
-        self.tw_versions.setItemDelegateForColumn(self.versionLabels.index("Date"), delegate)
-        self.prevDelIdx = idx
-        for idx in range(len(self.versionLabels)):
+        keys = [self.versionKeys.get(label, label.lower()) for label in self.versionLabels]
+        self.versionModel.setColumns(self.versionLabels, keys)
+        for idx, label in enumerate(self.versionLabels):
+            if label == "Date":
+                delegate = self.dateDelegate
+            elif label == "Location":
+                delegate = self.locationDelegate
+            else:
+                delegate = self.tw_versions.itemDelegate()
+
+            self.tw_versions.setItemDelegateForColumn(idx, delegate)
             self.tw_versions.setColumnHidden(idx, idx == len(self.versionLabels) - 1)
 
         if "Version" in self.versionLabels:
@@ -242,11 +261,11 @@ class ProductBrowser(QDialog, ProductBrowser_ui.Ui_dlg_ProductBrowser):
     def productDragEnterEvent(self, e):
         if e.mimeData().hasUrls() and e.mimeData().urls():
             dragPath = os.path.normpath(e.mimeData().urls()[0].toLocalFile())
-            items = self.tw_versions.selectedItems()
-            if items:
-                row = items[0].row()
+            rows = self.tw_versions.selectionModel().selectedRows()
+            if rows:
+                row = rows[0].row()
                 pathC = self.tw_versions.model().columnCount() - 1
-                path = self.tw_versions.item(row, pathC).text()
+                path = self.tw_versions.model().index(row, pathC).data() or ""
             else:
                 path = ""
 
@@ -587,7 +606,7 @@ class ProductBrowser(QDialog, ProductBrowser_ui.Ui_dlg_ProductBrowser):
                 useMaster = self.core.products.getUseMaster()
                 if useMaster:
                     column = self.versionLabels.index("Version")
-                    version = self.tw_versions.item(row, column).text()
+                    version = self.tw_versions.model().index(row, column).data()
                     if version.startswith("master"):
                         masterAct = QAction("Delete master", viewUi)
                         masterAct.triggered.connect(
@@ -604,11 +623,9 @@ class ProductBrowser(QDialog, ProductBrowser_ui.Ui_dlg_ProductBrowser):
                         rcmenu.addAction(masterAct)
 
                 if "Location" in self.versionLabels:
-                    column = self.versionLabels.index("Location")
-                    locItem = self.tw_versions.item(row, column)
-                    if locItem:
-                        location = locItem.text()
-                        if "local" in location and "global" not in location:
+                    locations = self.versionModel.getRow(row).get("locations")
+                    if locations:
+                        if "local" in locations and "global" not in locations:
                             glbAct = QAction("Move to global", viewUi)
                             versionDir = os.path.dirname(os.path.dirname(path))
                             glbAct.triggered.connect(lambda: self.moveToGlobal(versionDir))
@@ -914,7 +931,7 @@ class ProductBrowser(QDialog, ProductBrowser_ui.Ui_dlg_ProductBrowser):
 
     @err_catcher(name=__name__)
     def setPreferredFile(self, row):
-        version = self.tw_versions.item(row, 0).data(Qt.UserRole)
+        version = self.tw_versions.model().index(row, 0).data(Qt.UserRole)
         self.core.products.setPreferredFileForVersionDlg(version, callback=lambda: self.updateVersions(restoreSelection=True))
 
     @err_catcher(name=__name__)
@@ -1204,75 +1221,39 @@ class ProductBrowser(QDialog, ProductBrowser_ui.Ui_dlg_ProductBrowser):
         if not wasBlocked:
             self.tw_versions.blockSignals(True)
 
-        self.tw_versions.clearContents()
-        self.tw_versions.setRowCount(0)
-
         twSorting = [
             self.tw_versions.horizontalHeader().sortIndicatorSection(),
             self.tw_versions.horizontalHeader().sortIndicatorOrder(),
         ]
-        self.tw_versions.setSortingEnabled(False)
         identifierData = self.getCurrentProduct()
-
+        rows = []
         if identifierData:
             location = self.w_entities.getCurrentLocation()
             versions = self.core.products.getVersionsFromContext(identifierData, locations=[location])
+            self.showFileSizes = self.core.getConfig("globals", "showFileSizes", config="user")
             for version in versions:
-                if version["version"] == "master":
-                    location = list(version.get("locations", [None]))[0]
-                    filepath = self.core.products.getPreferredFileFromVersion(
-                        version, location=location if location else None
-                    )
-                    if not filepath:
-                        continue
-
-                    versionNameData = self.core.products.getDataFromVersionContext(
-                        version
-                    ).copy()
-                    versionNameData.update(version)
-                    comment = versionNameData.get("comment", "")
-                    user = versionNameData.get("user", "")
-                    versionName = self.core.products.getMasterVersionLabel(filepath)
-                    self.addVersionToTable(
-                        filepath, versionName, comment, user, data=versionNameData
-                    )
-                else:
-                    filepath = self.core.products.getPreferredFileFromVersion(version)
-                    if not filepath:
-                        continue
-
-                    versionNameData = self.core.products.getDataFromVersionContext(
-                        version
-                    ).copy()
-                    versionNameData.update(version)
-                    versionName = versionNameData.get("version")
-                    if not versionName:
-                        versionName = version.get("version")
-
-                    if versionNameData.get("wedge"):
-                        versionName += " (%s)" % versionNameData["wedge"]
+                rows.append(self.getVersionRow(version))
 
-                    comment = versionNameData.get("comment")
-                    user = versionNameData.get("user")
-
-                    self.addVersionToTable(
-                        filepath, versionName, comment, user, data=versionNameData
-                    )
+        self.versionModel.setRows(rows)
+        self.tw_versions.sortByColumn(twSorting[0], twSorting[1])
+        if self.core.callbacks.hasCallbacks("productVersionAdded"):
+            # productVersionAdded gets called for every version, so all rows get loaded in the background
+            self.versionModel.requestAllRows()
 
         self.tw_versions.resizeColumnsToContents()
-        self.tw_versions.sortByColumn(twSorting[0], twSorting[1])
-        self.tw_versions.setSortingEnabled(True)
 
         if self.tw_versions.model().rowCount() > 0:
             selectFirst = True
             if restoreSelection and curVersion:
                 for versionNum in range(self.tw_versions.model().rowCount()):
                     if self.tw_versions.model().index(versionNum, 0).data() == curVersion["version"]:
-                        self.tw_versions.selectRow(versionNum)
-                        selectFirst = False
-            
+                        if self.selectVersionRow(versionNum):
+                            selectFirst = False
+
             if selectFirst:
-                self.tw_versions.selectRow(0)
+                for versionNum in range(self.tw_versions.model().rowCount()):
+                    if self.selectVersionRow(versionNum):
+                        break
 
         if not wasBlocked:
             self.tw_versions.blockSignals(False)
@@ -1285,123 +1266,134 @@ class ProductBrowser(QDialog, ProductBrowser_ui.Ui_dlg_ProductBrowser):
                 self.versionsUpdated.emit()
 
     @err_catcher(name=__name__)
-    def addVersionToTable(self, filepath, versionName, comment, user, data=None):
-        dateStamp = data.get("date", "") if data else ""
-        if filepath:
-            _, depExt = self.core.paths.splitext(filepath)
-            dateStamp = dateStamp or self.core.getFileModificationDate(filepath, asString=False)
-        else:
-            depExt = ""
+    def selectVersionRow(self, position):
+        # the row gets loaded first, because versions without a preferred file get removed
+        # from the table and must not be selected
+        row = self.versionModel.getRow(position)
+        if not row or not row["valid"]:
+            return False
+
+        self.tw_versions.selectRow(position)
+        return True
 
-        row = self.tw_versions.rowCount()
-        self.tw_versions.insertRow(row)
+    @err_catcher(name=__name__)
+    def getVersionRow(self, version):
+        # the version columns are available right away. all other columns get loaded in the
+        # background, when their rows become visible
+        row = {
+            "version": version,
+            "versionName": version["version"],
+            "versionNameSortKey": self.core.products.getVersionSortKey(version),
+        }
+        return row
+
+    def getVersionRowData(self, version):
+        # runs in a worker thread of the version model
+        if version["version"] == "master":
+            location = list(version.get("locations", [None]))[0]
+            filepath = self.core.products.getPreferredFileFromVersion(
+                version, location=location if location else None
+            )
+        else:
+            filepath = self.core.products.getPreferredFileFromVersion(version)
 
-        versionName = versionName or ""
-        if versionName.startswith("master") and sys.version[0] != "2":
-            item = MasterItem(versionName)
+        if not filepath:
+            return {"valid": False}
+
+        data = self.core.products.getDataFromVersionContext(version).copy()
+        data.update(version)
+        if version["version"] == "master":
+            versionName = self.core.products.getMasterVersionLabel(filepath)
+            comment = data.get("comment", "")
+            user = data.get("user", "")
         else:
-            item = VersionItem(versionName)
+            versionName = data.get("version") or version.get("version")
+            if data.get("wedge"):
+                versionName += " (%s)" % data["wedge"]
 
-        item.setTextAlignment(Qt.AlignCenter)
-        item.setData(Qt.UserRole, data)
-        self.tw_versions.setItem(row, self.versionLabels.index("Version"), item)
+            comment = data.get("comment")
+            user = data.get("user")
 
         if comment == "nocomment":
             comment = ""
 
-        item = QTableWidgetItem(comment)
-        item.setTextAlignment(Qt.AlignCenter)
-        self.tw_versions.setItem(row, self.versionLabels.index("Comment"), item)
-
-        item = QTableWidgetItem(depExt)
-        item.setTextAlignment(Qt.AlignCenter)
-        self.tw_versions.setItem(row, self.versionLabels.index("Type"), item)
-        if (data.get("locations", {}) and len(self.w_entities.getLocations()) > 1) or (self.projectBrowser and len(self.projectBrowser.locations) > 1):
-            self.locationLabels = {}
-            locations = []
-            if self.projectBrowser and len(self.projectBrowser.locations) > 1:
-                locations = []
-                w_location = QWidget()
-                lo_location = QHBoxLayout(w_location)
-                lo_location.addStretch()
-                for location in self.projectBrowser.locations:
-                    if not filepath:
-                        continue
-
-                    if location.get("name") == "global":
-                        globalPath = self.core.convertPath(filepath, "global")
-                        if not os.path.exists(globalPath):
-                            continue
-
-                    elif location.get("name") == "local" and self.core.useLocalFiles:
-                        localPath = self.core.convertPath(filepath, "local")
-                        if not os.path.exists(localPath):
-                            continue
-
-                    elif location.get("name") not in data.get("locations", {}):
-                        continue
-
-                    l_loc = QLabel()
-                    l_loc.setToolTip("Version exists in %s" % location["name"])
-                    self.locationLabels[location["name"]] = l_loc
-                    if "icon" not in location:
-                        location["icon"] = self.projectBrowser.getLocationIcon(location["name"])
-
-                    if location["icon"]:
-                        l_loc.setPixmap(location["icon"].pixmap(18, 18))
-                        locations.append(location["name"])
-                    else:
-                        l_loc.setText(location["name"])
-                    
-                    lo_location.addWidget(l_loc)
-
-                for location in data.get("locations", {}):
-                    if location not in [loc["name"] for loc in self.projectBrowser.locations]:
-                        l_loc = QLabel()
-                        l_loc.setToolTip("Version exists in %s" % location)
-                        self.locationLabels[location] = l_loc
-                        l_loc.setText(location)
-                        lo_location.addWidget(l_loc)
-
-                lo_location.addStretch()
-                self.tw_versions.setCellWidget(row, self.versionLabels.index("Location"), w_location)
-                item = QTableWidgetItem()
+        rowData = {
+            "filepath": filepath,
+            "versionName": versionName,
+            "comment": comment,
+            "user": user,
+            "type": self.core.paths.splitext(filepath)[1],
+            "date": data.get("date", "") or self.core.getFileModificationDate(filepath, asString=False),
+            "data": data,
+            "locationData": data.get("locations", {}),
+            "locations": self.getVersionLocations(filepath, data),
+        }
+
+        if self.showFileSizes:
+            if "size" in data:
+                rowData["size"] = data["size"]
+            elif os.path.exists(filepath):
+                rowData["size"] = float(os.stat(filepath).st_size / 1024.0 / 1024.0)
             else:
-                item = QTableWidgetItem(", ".join(data.get("locations", {})))
-                item.setTextAlignment(Qt.AlignCenter)
+                rowData["size"] = 0
 
-            item.setData(Qt.UserRole, data.get("locations", {}))
-            self.tw_versions.setItem(row, self.versionLabels.index("Location"), item)
+        return rowData
 
-        item = QTableWidgetItem(user)
-        item.setTextAlignment(Qt.AlignCenter)
-        self.tw_versions.setItem(row, self.versionLabels.index("User"), item)
+    def getVersionLocations(self, filepath, data):
+        # returns the names of the locations, in which the version exists
+        locations = data.get("locations", {})
+        if not self.projectBrowser or len(self.projectBrowser.locations) < 2:
+            return list(locations)
 
-        if self.core.getConfig("globals", "showFileSizes", config="user"):
-            if "size" in data:
-                size = data["size"]
-            elif filepath and os.path.exists(filepath):
-                size = float(os.stat(filepath).st_size / 1024.0 / 1024.0)
-            else:
-                size = 0
+        existingLocations = []
+        for location in self.projectBrowser.locations:
+            if location.get("name") == "global":
+                globalPath = self.core.convertPath(filepath, "global")
+                if not os.path.exists(globalPath):
+                    continue
+
+            elif location.get("name") == "local" and self.core.useLocalFiles:
+                localPath = self.core.convertPath(filepath, "local")
+                if not os.path.exists(localPath):
+                    continue
+
+            elif location.get("name") not in locations:
+                continue
+
+            existingLocations.append(location["name"])
+
+        locationNames = [loc["name"] for loc in self.projectBrowser.locations]
+        existingLocations += [location for location in locations if location not in locationNames]
+        return existingLocations
+
+    @err_catcher(name=__name__)
+    def getLocationIcon(self, name):
+        if not self.projectBrowser:
+            return
 
-            sizeStr = "%.2f mb" % size
+        for location in self.projectBrowser.locations:
+            if location.get("name") != name:
+                continue
 
-            item = QTableWidgetItem(sizeStr)
-            item.setTextAlignment(Qt.AlignCenter)
-            self.tw_versions.setItem(row, self.versionLabels.index("Size"), item)
+            if "icon" not in location:
+                location["icon"] = self.projectBrowser.getLocationIcon(location["name"])
 
-        item = QTableWidgetItem()
-        item.setTextAlignment(Qt.AlignCenter)
-        
-        item.setData(Qt.DisplayRole, dateStamp)
-        self.tw_versions.setItem(row, self.versionLabels.index("Date"), item)
+            return location["icon"]
 
-        impPath = getattr(self.core.appPlugin, "fixImportPath", lambda x: x)(filepath)
-        item = QTableWidgetItem(impPath)
-        self.tw_versions.setItem(row, self.versionLabels.index("Path"), item)
+    @err_catcher(name=__name__)
+    def onVersionRowLoaded(self, row):
+        if not row["valid"]:
+            return
 
-        self.core.callback(name="productVersionAdded", args=[self, row, filepath, versionName, comment, user, data.get("locations", {})])
+        # productVersionAdded gets called once for every version with a preferred file, when its row
+        # got loaded. that can happen after updateVersions returned. the row argument is the
+        # position of the row in tw_versions at the time of the callback
+        row["path"] = getattr(self.core.appPlugin, "fixImportPath", lambda x: x)(row["filepath"])
+        position = self.versionModel.rowPositions.get(row["id"])
+        self.core.callback(
+            name="productVersionAdded",
+            args=[self, position, row["filepath"], row["versionName"], row["comment"], row["user"], row["locationData"]],
+        )
 
     @err_catcher(name=__name__)
     def getCurSelection(self):
@@ -1529,8 +1521,8 @@ class ProductBrowser(QDialog, ProductBrowser_ui.Ui_dlg_ProductBrowser):
             for versionNum in range(self.tw_versions.model().rowCount()):
                 curVerName = self.tw_versions.model().index(versionNum, 0).data()
                 if curVerName == version or (version == "master" and curVerName.startswith("master")):
-                    self.tw_versions.selectRow(versionNum)
-                    result = True
+                    if self.selectVersionRow(versionNum):
+                        result = True
 
         self.tw_versions.blockSignals(False)
         if prevVersion != self.getCurrentVersion():
@@ -1539,16 +1531,6 @@ class ProductBrowser(QDialog, ProductBrowser_ui.Ui_dlg_ProductBrowser):
         return result
 
 
-class MasterItem(QTableWidgetItem):
-    def __lt__(self, other):
-        return False if not other.text().startswith("master") else self.text() < other.text()
-
-
-class VersionItem(QTableWidgetItem):
-    def __lt__(self, other):
-        return True if other.text().startswith("master") else self.text() < other.text()
-
-
 class DateDelegate(QStyledItemDelegate):
     def displayText(self, value, locale):
         if self.core.isStr(value):
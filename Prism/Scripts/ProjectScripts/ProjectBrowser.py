@@ -647,9 +647,19 @@ class ProjectBrowser(QMainWindow, ProjectBrowser_ui.Ui_mw_ProjectBrowser):
     def getRefreshMenu(self):
         menu = QMenu(self)
         menu.addAction("Clear configcache", self.core.configs.clearCache)
+        if self.core.catalog.isEnabled():
+            menu.addAction("Rebuild project catalog", self.rebuildProjectCatalog)
+
         menu.addActions(self.b_refreshTabs.actions())
         return menu
 
+    @err_catcher(name=__name__)
+    def rebuildProjectCatalog(self):
+        with self.core.waitPopup(self.core, "Rebuilding project catalog. Please wait..."):
+            self.core.catalog.reconcile()
+
+        self.refreshUI()
+
     @err_catcher(name=__name__)
     def triggerOpen(self, checked=False):
         self.core.setConfig("globals", "showonstartup", checked)
@@ -80,7 +80,7 @@ class Ui_dlg_ProductBrowser(object):
 
         self.verticalLayout_2.addWidget(self.w_version)
 
-        self.tw_versions = QTableWidget(self.w_versions)
+        self.tw_versions = QTableView(self.w_versions)
         self.tw_versions.setObjectName(u"tw_versions")
         self.tw_versions.setContextMenuPolicy(Qt.CustomContextMenu)
         self.tw_versions.setEditTriggers(QAbstractItemView.NoEditTriggers)